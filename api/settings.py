@@ -42,6 +42,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'finscreen.metrics.MetricsMiddleware',
+    'finscreen.demand.DemandMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -122,3 +124,161 @@ USE_TZ = True
 STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Finscreen
+
+# Upper bound on concurrent upstream fetches during a scrape.
+FINSCREEN_SCRAP_MAX_WORKERS = 8
+
+# Number of scraped symbols written per bulk upsert transaction.
+FINSCREEN_SCRAP_BATCH_SIZE = 100
+
+# Seconds a worker may hold a scrape job item before another worker reclaims it.
+FINSCREEN_SCRAP_JOB_LEASE = 600
+
+# Claims after which a scrape job item that keeps crashing workers is failed.
+FINSCREEN_SCRAP_JOB_MAX_ATTEMPTS = 3
+
+
+# Caches
+# https://docs.djangoproject.com/en/4.1/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Upstream yfinance responses. Point this alias at Redis/Memcached to
+    # share the cache between worker processes.
+    'upstream': {
+        'BACKEND': 'finscreen.cache.BoundedLRUCache',
+        'OPTIONS': {
+            'MAX_BYTES': 64 * 1024 * 1024,
+        },
+    },
+}
+
+FINSCREEN_UPSTREAM_CACHE = 'upstream'
+
+# Seconds each upstream endpoint stays cached.
+FINSCREEN_UPSTREAM_CACHE_DEFAULT_TTL = 60
+FINSCREEN_UPSTREAM_CACHE_TTLS = {
+    'info': 15,
+    'history': 60,
+    'history_batch': 60,
+    'option_chain': 15,
+    'options': 300,
+    'news': 300,
+    'calendar': 3600,
+    'recommendations': 3600,
+    'actions': 24 * 3600,
+    'dividends': 24 * 3600,
+    'splits': 24 * 3600,
+    'isin': 24 * 3600,
+    'financials': 24 * 3600,
+    'quarterly_financials': 24 * 3600,
+    'earnings': 24 * 3600,
+    'quarterly_earnings': 24 * 3600,
+    'sustainability': 24 * 3600,
+    'institutional_holders': 24 * 3600,
+    'major_holders': 7 * 24 * 3600,
+}
+
+# Cache alias used as a cross-process lock so only one worker process fetches
+# a missing key (None keeps coalescing in-process only). Must be shared
+# between processes, e.g. Redis, Memcached or the database cache.
+FINSCREEN_UPSTREAM_LOCK_CACHE = None
+FINSCREEN_UPSTREAM_LOCK_TIMEOUT = 10
+
+# Largest symbol list accepted by POST /api/history/batch/.
+FINSCREEN_HISTORY_BATCH_MAX_SYMBOLS = 500
+
+# Calendar days of stored history loaded for indicators (MA200 plus warm-up).
+FINSCREEN_SIGNALS_LOOKBACK_DAYS = 450
+
+# Seconds the universe-wide FHS ranking is cached.
+FINSCREEN_FHS_CACHE_TTL = 300
+
+# Largest page POST /api/screen/ returns.
+FINSCREEN_SCREEN_MAX_LIMIT = 500
+
+# Rows serialized per chunk by the ?format=ndjson|csv streaming responses.
+FINSCREEN_STREAM_CHUNK_ROWS = 1000
+
+# Directory of the memory-mapped OHLCV archive, e.g. BASE_DIR / 'archive'.
+# None disables it; it needs a local writable disk, which Vercel lacks.
+FINSCREEN_ARCHIVE_DIR = None
+
+# Shared upstream client: process-wide token bucket (calls per second and
+# burst), seconds a call may wait for a token, per-call timeout and the size
+# of the pool that enforces it.
+FINSCREEN_UPSTREAM_RATE = 5
+FINSCREEN_UPSTREAM_BURST = 10
+FINSCREEN_UPSTREAM_MAX_WAIT = 10
+FINSCREEN_UPSTREAM_TIMEOUT = 20
+FINSCREEN_UPSTREAM_MAX_WORKERS = 32
+
+# Retries for rate-limited or failed calls, with jittered exponential backoff
+# (seconds).
+FINSCREEN_UPSTREAM_RETRIES = 3
+FINSCREEN_UPSTREAM_BACKOFF_BASE = 0.5
+FINSCREEN_UPSTREAM_BACKOFF_MAX = 8
+
+# Consecutive failures that open a host's circuit breaker, and seconds it
+# stays open before a trial call.
+FINSCREEN_UPSTREAM_BREAKER_THRESHOLD = 5
+FINSCREEN_UPSTREAM_BREAKER_RESET = 30
+
+# Seconds cached upstream data is kept past its TTL, to be served stale when
+# upstream is unavailable.
+FINSCREEN_UPSTREAM_STALE_TTL = 24 * 3600
+
+# Data source behind every yfinance call: 'yfinance', or 'replay' to serve
+# fixtures recorded by `manage.py record_fixtures` (see finscreen/replay.py)
+# with synthetic latency of REPLAY_LATENCY seconds +/- REPLAY_JITTER (a fraction).
+FINSCREEN_YFINANCE_CLIENT = 'yfinance'
+FINSCREEN_REPLAY_FIXTURES = BASE_DIR / 'fixtures' / 'yfinance'
+FINSCREEN_REPLAY_LATENCY = 0.0
+FINSCREEN_REPLAY_JITTER = 0.5
+
+# Seconds since a company's last scrape within which GET /api/info/ in the
+# default ?source=auto mode is served from the database instead of upstream.
+FINSCREEN_INFO_MAX_AGE = 3600
+
+# Symbol reads are counted per process and flushed to symbol_demand after a
+# response once DEMAND_FLUSH_INTERVAL seconds have passed; counts halve every
+# DEMAND_HALF_LIFE seconds.
+FINSCREEN_DEMAND_FLUSH_INTERVAL = 30
+FINSCREEN_DEMAND_HALF_LIFE = 6 * 3600
+
+# refresh_scheduler: upstream calls it may spend per minute, and seconds
+# after which each section is due again. Price cadence is stretched by
+# REFRESH_OFF_HOURS_FACTOR while the market is closed.
+FINSCREEN_REFRESH_BUDGET = 60
+FINSCREEN_REFRESH_CADENCES = {
+    'price': 15 * 60,
+    'statements': 7 * 24 * 3600,
+}
+FINSCREEN_REFRESH_OFF_HOURS_FACTOR = 8
+
+# Regular trading session used to prioritise price refreshes.
+FINSCREEN_MARKET_TIMEZONE = 'America/New_York'
+FINSCREEN_MARKET_OPEN = '09:30'
+FINSCREEN_MARKET_CLOSE = '16:00'
+
+# GET /api/option_analytics/: annual risk-free rate for Black-Scholes, how
+# many expirations to analyze and fetch at once, and seconds each
+# expiration's analytics stay cached.
+FINSCREEN_RISK_FREE_RATE = 0.04
+FINSCREEN_OPTION_MAX_EXPIRATIONS = 12
+FINSCREEN_OPTION_FETCH_WORKERS = 4
+FINSCREEN_OPTION_ANALYTICS_TTL = 60
+
+# POST /api/analytics/correlation/: largest universe, default window in
+# trading days, share of the window's dates a symbol needs closes on, EWMA
+# half-life in trading days, and seconds a universe's window state is kept.
+FINSCREEN_CORRELATION_MAX_SYMBOLS = 500
+FINSCREEN_CORRELATION_WINDOW = 252
+FINSCREEN_CORRELATION_MIN_COVERAGE = 0.9
+FINSCREEN_CORRELATION_EWMA_HALFLIFE = 60
+FINSCREEN_CORRELATION_CACHE_TTL = 7 * 24 * 3600
@@ -1,300 +1,432 @@
-CREATE TABLE Sector (
-    id SERIAL PRIMARY KEY,
-    sector_name VARCHAR(255)
-);
-
-CREATE TABLE Industry (
-    id SERIAL PRIMARY KEY,
-    industry_name VARCHAR(255)
-);
-
-CREATE TABLE Exchange (
-    id SERIAL PRIMARY KEY,
-    exchange_name VARCHAR(255)
-);
-
-CREATE TABLE Currency (
-    id SERIAL PRIMARY KEY,
-    currency_code VARCHAR(10),
-    currency_name VARCHAR(100)
-);
-
-CREATE TABLE Company (
-    id SERIAL PRIMARY KEY,
-    name VARCHAR(255),
-    symbol VARCHAR(50),
-    short_name VARCHAR(255),
-    long_name VARCHAR(255),
-    sector_id INT,
-    industry_id INT,
-    founded INT CHECK (founded >= 0 AND founded <= EXTRACT(YEAR FROM CURRENT_DATE)),
-    total_employees INT,
-    exchange_id INT,
-    currency_id INT,
-    CONSTRAINT fk_sector FOREIGN KEY (sector_id) REFERENCES Sector(id),
-    CONSTRAINT fk_industry FOREIGN KEY (industry_id) REFERENCES Industry(id),
-    CONSTRAINT fk_exchange FOREIGN KEY (exchange_id) REFERENCES Exchange(id),
-    CONSTRAINT fk_currency FOREIGN KEY (currency_id) REFERENCES Currency(id)
-);
-
-CREATE TABLE Address (
-    id SERIAL PRIMARY KEY,
-    company_id INT,
-    address1 VARCHAR(255),
-    address2 VARCHAR(255),
-    city VARCHAR(100),
-    zip VARCHAR(20),
-    country VARCHAR(100),
-    phone VARCHAR(50),
-    fax VARCHAR(50),
-    website VARCHAR(255),
-    CONSTRAINT fk_company_address FOREIGN KEY (company_id) REFERENCES Company(id)
-);
-
-CREATE TABLE Officer (
-    id SERIAL PRIMARY KEY,
-    company_id INT,
-    name VARCHAR(255),
-    title VARCHAR(255),
-    age INT,
-    fiscal_year INT CHECK (fiscal_year >= 1900 AND fiscal_year <= EXTRACT(YEAR FROM CURRENT_DATE)),
-    year_born INT CHECK (year_born >= 1900 AND year_born <= EXTRACT(YEAR FROM CURRENT_DATE)),
-    CONSTRAINT fk_company_officer FOREIGN KEY (company_id) REFERENCES Company(id)
-);
-
-CREATE TABLE Officer_Compensation (
-    id SERIAL PRIMARY KEY,
-    officer_id INT,
-    total_pay DECIMAL(15, 2),
-    exercised_value DECIMAL(15, 2),
-    unexercised_value DECIMAL(15, 2),
-    CONSTRAINT fk_officer_compensation FOREIGN KEY (officer_id) REFERENCES Officer(id)
-);
-
-CREATE TABLE Company_Financials (
-    id SERIAL PRIMARY KEY,
-    company_id INT,
-    year INT CHECK (year >= 1900 AND year <= EXTRACT(YEAR FROM CURRENT_DATE)),
-    currency_id INT,
-    market_cap DECIMAL(15, 2),
-    enterprise_value DECIMAL(15, 2),
-    total_cash DECIMAL(15, 2),
-    total_debt DECIMAL(15, 2),
-    total_revenue DECIMAL(15, 2),
-    revenue_per_share DECIMAL(15, 2),
-    gross_margin DECIMAL(5, 2),
-    ebitda_margin DECIMAL(5, 2),
-    operating_margin DECIMAL(5, 2),
-    profit_margin DECIMAL(5, 2),
-    book_value DECIMAL(15, 2),
-    debt_to_equity_ratio DECIMAL(5, 2),
-    current_ratio DECIMAL(5, 2),
-    quick_ratio DECIMAL(5, 2),
-    free_cashflow DECIMAL(15, 2),
-    operating_cashflow DECIMAL(15, 2),
-    CONSTRAINT fk_company_financials FOREIGN KEY (company_id) REFERENCES Company(id),
-    CONSTRAINT fk_currency_financials FOREIGN KEY (currency_id) REFERENCES Currency(id)
-);
-
-
-CREATE TABLE Dividend (
-    id SERIAL PRIMARY KEY,
-    company_id INT ,
-    year INT  CHECK (year >= 1900 AND year <= EXTRACT(YEAR FROM CURRENT_DATE)),
-    dividend_rate DECIMAL(5, 2),
-    dividend_yield DECIMAL(5, 2),
-    payout_ratio DECIMAL(5, 2),
-    ex_dividend_date DATE,
-    five_year_avg_dividend_yield DECIMAL(5, 2),
-    trailing_annual_dividend_rate DECIMAL(5, 2),
-    trailing_annual_dividend_yield DECIMAL(5, 2),
-    CONSTRAINT fk_company_dividend FOREIGN KEY (company_id) REFERENCES Company(id)
-);
-
-CREATE TABLE Stock_Price (
-    id SERIAL PRIMARY KEY,
-    company_id INT ,
-    date DATE ,
-    previous_close DECIMAL(15, 2),
-    open DECIMAL(15, 2),
-    day_low DECIMAL(15, 2),
-    day_high DECIMAL(15, 2),
-    current_price DECIMAL(15, 2),
-    fifty_two_week_low DECIMAL(15, 2),
-    fifty_two_week_high DECIMAL(15, 2),
-    fifty_day_avg DECIMAL(15, 2),
-    two_hundred_day_avg DECIMAL(15, 2),
-    volume BIGINT,
-    average_volume BIGINT,
-    CONSTRAINT fk_company_stock_price FOREIGN KEY (company_id) REFERENCES Company(id)
-);
-
-CREATE TABLE Risk_Metrics (
-    id SERIAL PRIMARY KEY,
-    company_id INT ,
-    audit_risk DECIMAL(5, 2),
-    board_risk DECIMAL(5, 2),
-    compensation_risk DECIMAL(5, 2),
-    shareholder_rights_risk DECIMAL(5, 2),
-    overall_risk DECIMAL(5, 2),
-    CONSTRAINT fk_company_risk FOREIGN KEY (company_id) REFERENCES Company(id)
-);
-
-CREATE TABLE Performance_Metrics (
-    id SERIAL PRIMARY KEY,
-    company_id INT ,
-    date DATE ,
-    week_52_change DECIMAL(5, 2),
-    sandp_52_week_change DECIMAL(5, 2),
-    beta DECIMAL(5, 2),
-    trailing_pe_ratio DECIMAL(5, 2),
-    forward_pe_ratio DECIMAL(5, 2),
-    peg_ratio DECIMAL(5, 2),
-    CONSTRAINT fk_company_performance FOREIGN KEY (company_id) REFERENCES Company(id)
-);
-
-CREATE TABLE Analyst_Opinion (
-    id SERIAL PRIMARY KEY,
-    company_id INT ,
-    date DATE ,
-    target_high_price DECIMAL(15, 2),
-    target_low_price DECIMAL(15, 2),
-    target_mean_price DECIMAL(15, 2),
-    target_median_price DECIMAL(15, 2),
-    recommendation_mean DECIMAL(5, 2),
-    recommendation_key VARCHAR(100),
-    number_of_analyst_opinions INT,
-    CONSTRAINT fk_company_analyst_opinion FOREIGN KEY (company_id) REFERENCES Company(id)
-);
-
-CREATE TABLE holder (
-    id SERIAL PRIMARY KEY,
-    company_id INT REFERENCES company(id) ON DELETE CASCADE,
-    holder_name VARCHAR(255) NOT NULL,
-    percentage_owned NUMERIC(5, 2),
-    shares BIGINT,
-    date_reported DATE,
-    change_in_shares BIGINT
-);
-
-CREATE TABLE company_action (
-    id SERIAL PRIMARY KEY,
-    company_id INT REFERENCES company(id) ON DELETE CASCADE,
-    action_type VARCHAR(50) NOT NULL,
-    action_date DATE NOT NULL,
-    details TEXT
-);
-
-CREATE TABLE company_event (
-    id SERIAL PRIMARY KEY,
-    company_id INT REFERENCES company(id) ON DELETE CASCADE,
-    event_type VARCHAR(50) NOT NULL,
-    event_date DATE NOT NULL,
-    description TEXT
-);
-
-CREATE TABLE insider_transaction (
-    id SERIAL PRIMARY KEY,
-    company_id INT REFERENCES company(id) ON DELETE CASCADE,
-    insider_name VARCHAR(255) NOT NULL,
-    relation VARCHAR(50),
-    last_date DATE,
-    transaction_type VARCHAR(50),
-    ownership_type VARCHAR(50),
-    shares_traded BIGINT,
-    last_price NUMERIC(15, 2),
-    shares_held BIGINT
-);
-
-CREATE TABLE stock_split (
-    id SERIAL PRIMARY KEY,
-    company_id INT REFERENCES company(id) ON DELETE CASCADE,
-    split_date DATE NOT NULL,
-    ratio VARCHAR(10) NOT NULL,
-    description TEXT
-);
-
-CREATE TABLE earnings (
-    id SERIAL PRIMARY KEY,
-    company_id INT REFERENCES company(id) ON DELETE CASCADE,
-    date DATE NOT NULL,
-    period VARCHAR(50),
-    revenue NUMERIC(15, 2),
-    earnings NUMERIC(15, 2),
-    eps NUMERIC(15, 2),
-    estimate NUMERIC(15, 2),
-    surprise NUMERIC(5, 2) -- percentage or actual value
-);
-
-CREATE TABLE balance_sheet (
-    id SERIAL PRIMARY KEY,
-    company_id INT REFERENCES company(id) ON DELETE CASCADE,
-    date DATE NOT NULL,
-    cash_and_cash_equivalents NUMERIC(15, 2),
-    short_term_investments NUMERIC(15, 2),
-    net_receivables NUMERIC(15, 2),
-    inventory NUMERIC(15, 2),
-    total_current_assets NUMERIC(15, 2),
-    long_term_investments NUMERIC(15, 2),
-    property_plant_equipment NUMERIC(15, 2),
-    intangible_assets NUMERIC(15, 2),
-    total_assets NUMERIC(15, 2),
-    total_liabilities NUMERIC(15, 2),
-    total_equity NUMERIC(15, 2)
-);
-
-CREATE TABLE income_statement (
-    id SERIAL PRIMARY KEY,
-    company_id INT REFERENCES company(id) ON DELETE CASCADE,
-    date DATE NOT NULL,
-    revenue NUMERIC(15, 2),
-    cost_of_revenue NUMERIC(15, 2),
-    gross_profit NUMERIC(15, 2),
-    operating_expense NUMERIC(15, 2),
-    operating_income NUMERIC(15, 2),
-    net_income NUMERIC(15, 2)
-);
-
-CREATE TABLE cash_flow_statement (
-    id SERIAL PRIMARY KEY,
-    company_id INT REFERENCES company(id) ON DELETE CASCADE,
-    date DATE NOT NULL,
-    net_cash_from_operating_activities NUMERIC(15, 2),
-    net_cash_used_for_investing_activities NUMERIC(15, 2),
-    net_cash_from_financing_activities NUMERIC(15, 2),
-    free_cash_flow NUMERIC(15, 2),
-    dividends_paid NUMERIC(15, 2)
-);
-
-CREATE TABLE recommendation (
-    id SERIAL PRIMARY KEY,
-    company_id INT REFERENCES company(id) ON DELETE CASCADE,
-    date DATE NOT NULL,
-    recommendation VARCHAR(50), -- e.g., "Buy", "Sell", "Hold"
-    source VARCHAR(255), -- e.g., "Analyst", "Agency"
-    rating NUMERIC(5, 2)
-);
-
-CREATE TABLE historical_data (
-    id SERIAL PRIMARY KEY,
-    company_id INT REFERENCES company(id) ON DELETE CASCADE,
-    date DATE NOT NULL,
-    open NUMERIC(15, 2),
-    high NUMERIC(15, 2),
-    low NUMERIC(15, 2),
-    close NUMERIC(15, 2),
-    volume BIGINT
-);
-
-CREATE TABLE esg_score (
-    id SERIAL PRIMARY KEY,
-    company_id INT REFERENCES company(id) ON DELETE CASCADE,
-    environmental_score NUMERIC(5, 2),
-    social_score NUMERIC(5, 2),
-    governance_score NUMERIC(5, 2),
-    total_esg_score NUMERIC(5, 2),
-    esg_rating VARCHAR(50), -- e.g., "AA", "BBB"
-    rating_agency VARCHAR(255), -- e.g., "MSCI", "S&P"
-    last_updated DATE
-);
-
+CREATE TABLE Sector (
+    id SERIAL PRIMARY KEY,
+    sector_name VARCHAR(255) UNIQUE
+);
+
+CREATE TABLE Industry (
+    id SERIAL PRIMARY KEY,
+    industry_name VARCHAR(255) UNIQUE
+);
+
+CREATE TABLE Exchange (
+    id SERIAL PRIMARY KEY,
+    exchange_name VARCHAR(255) UNIQUE
+);
+
+CREATE TABLE Currency (
+    id SERIAL PRIMARY KEY,
+    currency_code VARCHAR(10) UNIQUE,
+    currency_name VARCHAR(100)
+);
+
+CREATE TABLE Company (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(255),
+    symbol VARCHAR(50) UNIQUE,
+    short_name VARCHAR(255),
+    long_name VARCHAR(255),
+    sector_id INT,
+    industry_id INT,
+    founded INT CHECK (founded >= 0 AND founded <= EXTRACT(YEAR FROM CURRENT_DATE)),
+    total_employees INT,
+    exchange_id INT,
+    currency_id INT,
+    last_refreshed TIMESTAMP WITH TIME ZONE,
+    statements_refreshed TIMESTAMP WITH TIME ZONE,
+    history_adjusted_to DATE,
+    CONSTRAINT fk_sector FOREIGN KEY (sector_id) REFERENCES Sector(id),
+    CONSTRAINT fk_industry FOREIGN KEY (industry_id) REFERENCES Industry(id),
+    CONSTRAINT fk_exchange FOREIGN KEY (exchange_id) REFERENCES Exchange(id),
+    CONSTRAINT fk_currency FOREIGN KEY (currency_id) REFERENCES Currency(id)
+);
+
+CREATE INDEX company_sector_idx ON Company (sector_id);
+
+CREATE TABLE Address (
+    id SERIAL PRIMARY KEY,
+    company_id INT UNIQUE,
+    address1 VARCHAR(255),
+    address2 VARCHAR(255),
+    city VARCHAR(100),
+    zip VARCHAR(20),
+    country VARCHAR(100),
+    phone VARCHAR(50),
+    fax VARCHAR(50),
+    website VARCHAR(255),
+    CONSTRAINT fk_company_address FOREIGN KEY (company_id) REFERENCES Company(id)
+);
+
+CREATE TABLE Officer (
+    id SERIAL PRIMARY KEY,
+    company_id INT,
+    name VARCHAR(255),
+    title VARCHAR(255),
+    age INT,
+    fiscal_year INT CHECK (fiscal_year >= 1900 AND fiscal_year <= EXTRACT(YEAR FROM CURRENT_DATE)),
+    year_born INT CHECK (year_born >= 1900 AND year_born <= EXTRACT(YEAR FROM CURRENT_DATE)),
+    CONSTRAINT fk_company_officer FOREIGN KEY (company_id) REFERENCES Company(id),
+    CONSTRAINT officer_company_name_uniq UNIQUE (company_id, name)
+);
+
+CREATE TABLE Officer_Compensation (
+    id SERIAL PRIMARY KEY,
+    officer_id INT UNIQUE,
+    total_pay DECIMAL(15, 2),
+    exercised_value DECIMAL(15, 2),
+    unexercised_value DECIMAL(15, 2),
+    CONSTRAINT fk_officer_compensation FOREIGN KEY (officer_id) REFERENCES Officer(id)
+);
+
+CREATE TABLE Company_Financials (
+    id SERIAL PRIMARY KEY,
+    company_id INT UNIQUE,
+    year INT CHECK (year >= 1900 AND year <= EXTRACT(YEAR FROM CURRENT_DATE)),
+    currency_id INT,
+    market_cap DECIMAL(15, 2),
+    enterprise_value DECIMAL(15, 2),
+    total_cash DECIMAL(15, 2),
+    total_debt DECIMAL(15, 2),
+    total_revenue DECIMAL(15, 2),
+    revenue_per_share DECIMAL(15, 2),
+    gross_margin DECIMAL(5, 2),
+    ebitda_margin DECIMAL(5, 2),
+    operating_margin DECIMAL(5, 2),
+    profit_margin DECIMAL(5, 2),
+    book_value DECIMAL(15, 2),
+    debt_to_equity_ratio DECIMAL(5, 2),
+    current_ratio DECIMAL(5, 2),
+    quick_ratio DECIMAL(5, 2),
+    free_cashflow DECIMAL(15, 2),
+    operating_cashflow DECIMAL(15, 2),
+    CONSTRAINT fk_company_financials FOREIGN KEY (company_id) REFERENCES Company(id),
+    CONSTRAINT fk_currency_financials FOREIGN KEY (currency_id) REFERENCES Currency(id)
+);
+
+CREATE INDEX financials_market_cap_idx ON Company_Financials (market_cap);
+CREATE INDEX financials_debt_equity_idx ON Company_Financials (debt_to_equity_ratio);
+
+
+CREATE TABLE Dividend (
+    id SERIAL PRIMARY KEY,
+    company_id INT UNIQUE,
+    year INT  CHECK (year >= 1900 AND year <= EXTRACT(YEAR FROM CURRENT_DATE)),
+    dividend_rate DECIMAL(5, 2),
+    dividend_yield DECIMAL(5, 2),
+    payout_ratio DECIMAL(5, 2),
+    ex_dividend_date DATE,
+    five_year_avg_dividend_yield DECIMAL(5, 2),
+    trailing_annual_dividend_rate DECIMAL(5, 2),
+    trailing_annual_dividend_yield DECIMAL(5, 2),
+    CONSTRAINT fk_company_dividend FOREIGN KEY (company_id) REFERENCES Company(id)
+);
+
+CREATE INDEX dividend_yield_idx ON Dividend (dividend_yield);
+
+-- Stock_Price and historical_data are append-only, one row per company per
+-- day, and range-partitioned by month. Monthly partitions are created ahead
+-- of time by `manage.py create_partitions`; rows outside them land in the
+-- default partition until a partition for their month is created.
+CREATE TABLE Stock_Price (
+    id SERIAL,
+    company_id INT NOT NULL,
+    date DATE NOT NULL,
+    previous_close DECIMAL(15, 2),
+    open DECIMAL(15, 2),
+    day_low DECIMAL(15, 2),
+    day_high DECIMAL(15, 2),
+    current_price DECIMAL(15, 2),
+    fifty_two_week_low DECIMAL(15, 2),
+    fifty_two_week_high DECIMAL(15, 2),
+    fifty_day_avg DECIMAL(15, 2),
+    two_hundred_day_avg DECIMAL(15, 2),
+    volume BIGINT,
+    average_volume BIGINT,
+    PRIMARY KEY (id, date),
+    CONSTRAINT fk_company_stock_price FOREIGN KEY (company_id) REFERENCES Company(id),
+    CONSTRAINT stock_price_company_date_uniq UNIQUE (company_id, date)
+) PARTITION BY RANGE (date);
+
+CREATE TABLE stock_price_default PARTITION OF Stock_Price DEFAULT;
+CREATE INDEX stock_price_date_brin ON Stock_Price USING BRIN (date);
+
+-- Newest Stock_Price snapshot per company, kept by the scraper so latest-price
+-- reads and screens never touch the partitioned table.
+CREATE TABLE latest_stock_price (
+    company_id INT PRIMARY KEY REFERENCES Company(id) ON DELETE CASCADE,
+    date DATE NOT NULL,
+    previous_close DECIMAL(15, 2),
+    open DECIMAL(15, 2),
+    day_low DECIMAL(15, 2),
+    day_high DECIMAL(15, 2),
+    current_price DECIMAL(15, 2),
+    fifty_two_week_low DECIMAL(15, 2),
+    fifty_two_week_high DECIMAL(15, 2),
+    fifty_day_avg DECIMAL(15, 2),
+    two_hundred_day_avg DECIMAL(15, 2),
+    volume BIGINT,
+    average_volume BIGINT
+);
+
+CREATE TABLE Risk_Metrics (
+    id SERIAL PRIMARY KEY,
+    company_id INT UNIQUE,
+    audit_risk DECIMAL(5, 2),
+    board_risk DECIMAL(5, 2),
+    compensation_risk DECIMAL(5, 2),
+    shareholder_rights_risk DECIMAL(5, 2),
+    overall_risk DECIMAL(5, 2),
+    CONSTRAINT fk_company_risk FOREIGN KEY (company_id) REFERENCES Company(id)
+);
+
+CREATE TABLE Performance_Metrics (
+    id SERIAL PRIMARY KEY,
+    company_id INT ,
+    date DATE ,
+    week_52_change DECIMAL(5, 2),
+    sandp_52_week_change DECIMAL(5, 2),
+    beta DECIMAL(5, 2),
+    trailing_pe_ratio DECIMAL(5, 2),
+    forward_pe_ratio DECIMAL(5, 2),
+    peg_ratio DECIMAL(5, 2),
+    CONSTRAINT fk_company_performance FOREIGN KEY (company_id) REFERENCES Company(id)
+);
+
+CREATE INDEX perf_metrics_company_date_idx ON Performance_Metrics (company_id, date DESC);
+
+CREATE TABLE Analyst_Opinion (
+    id SERIAL PRIMARY KEY,
+    company_id INT ,
+    date DATE ,
+    target_high_price DECIMAL(15, 2),
+    target_low_price DECIMAL(15, 2),
+    target_mean_price DECIMAL(15, 2),
+    target_median_price DECIMAL(15, 2),
+    recommendation_mean DECIMAL(5, 2),
+    recommendation_key VARCHAR(100),
+    number_of_analyst_opinions INT,
+    CONSTRAINT fk_company_analyst_opinion FOREIGN KEY (company_id) REFERENCES Company(id)
+);
+
+CREATE TABLE holder (
+    id SERIAL PRIMARY KEY,
+    company_id INT REFERENCES company(id) ON DELETE CASCADE,
+    holder_name VARCHAR(255) NOT NULL,
+    percentage_owned NUMERIC(5, 2),
+    shares BIGINT,
+    date_reported DATE,
+    change_in_shares BIGINT
+);
+
+CREATE TABLE company_action (
+    id SERIAL PRIMARY KEY,
+    company_id INT REFERENCES company(id) ON DELETE CASCADE,
+    action_type VARCHAR(50) NOT NULL,
+    action_date DATE NOT NULL,
+    details TEXT
+);
+
+CREATE TABLE company_event (
+    id SERIAL PRIMARY KEY,
+    company_id INT REFERENCES company(id) ON DELETE CASCADE,
+    event_type VARCHAR(50) NOT NULL,
+    event_date DATE NOT NULL,
+    description TEXT
+);
+
+CREATE TABLE insider_transaction (
+    id SERIAL PRIMARY KEY,
+    company_id INT REFERENCES company(id) ON DELETE CASCADE,
+    insider_name VARCHAR(255) NOT NULL,
+    relation VARCHAR(50),
+    last_date DATE,
+    transaction_type VARCHAR(50),
+    ownership_type VARCHAR(50),
+    shares_traded BIGINT,
+    last_price NUMERIC(15, 2),
+    shares_held BIGINT
+);
+
+CREATE TABLE stock_split (
+    id SERIAL PRIMARY KEY,
+    company_id INT REFERENCES company(id) ON DELETE CASCADE,
+    split_date DATE NOT NULL,
+    ratio VARCHAR(10) NOT NULL,
+    description TEXT
+);
+
+CREATE TABLE earnings (
+    id SERIAL PRIMARY KEY,
+    company_id INT REFERENCES company(id) ON DELETE CASCADE,
+    date DATE NOT NULL,
+    period VARCHAR(50),
+    revenue NUMERIC(15, 2),
+    earnings NUMERIC(15, 2),
+    eps NUMERIC(15, 2),
+    estimate NUMERIC(15, 2),
+    surprise NUMERIC(5, 2) -- percentage or actual value
+);
+
+CREATE TABLE balance_sheet (
+    id SERIAL PRIMARY KEY,
+    company_id INT REFERENCES company(id) ON DELETE CASCADE,
+    date DATE NOT NULL,
+    frequency VARCHAR(10) NOT NULL DEFAULT 'annual', -- annual, quarterly
+    cash_and_cash_equivalents NUMERIC(15, 2),
+    short_term_investments NUMERIC(15, 2),
+    net_receivables NUMERIC(15, 2),
+    inventory NUMERIC(15, 2),
+    total_current_assets NUMERIC(15, 2),
+    long_term_investments NUMERIC(15, 2),
+    property_plant_equipment NUMERIC(15, 2),
+    intangible_assets NUMERIC(15, 2),
+    total_assets NUMERIC(15, 2),
+    total_liabilities NUMERIC(15, 2),
+    total_equity NUMERIC(15, 2),
+    CONSTRAINT balance_sheet_company_date_uniq UNIQUE (company_id, date, frequency)
+);
+
+CREATE TABLE income_statement (
+    id SERIAL PRIMARY KEY,
+    company_id INT REFERENCES company(id) ON DELETE CASCADE,
+    date DATE NOT NULL,
+    frequency VARCHAR(10) NOT NULL DEFAULT 'annual', -- annual, quarterly
+    revenue NUMERIC(15, 2),
+    cost_of_revenue NUMERIC(15, 2),
+    gross_profit NUMERIC(15, 2),
+    operating_expense NUMERIC(15, 2),
+    operating_income NUMERIC(15, 2),
+    ebitda NUMERIC(15, 2),
+    net_income NUMERIC(15, 2),
+    diluted_eps NUMERIC(10, 4),
+    CONSTRAINT income_statement_company_date_uniq UNIQUE (company_id, date, frequency)
+);
+
+CREATE TABLE cash_flow_statement (
+    id SERIAL PRIMARY KEY,
+    company_id INT REFERENCES company(id) ON DELETE CASCADE,
+    date DATE NOT NULL,
+    frequency VARCHAR(10) NOT NULL DEFAULT 'annual', -- annual, quarterly
+    net_cash_from_operating_activities NUMERIC(15, 2),
+    net_cash_used_for_investing_activities NUMERIC(15, 2),
+    net_cash_from_financing_activities NUMERIC(15, 2),
+    free_cash_flow NUMERIC(15, 2),
+    dividends_paid NUMERIC(15, 2),
+    CONSTRAINT cash_flow_statement_company_date_uniq UNIQUE (company_id, date, frequency)
+);
+
+-- Ratios and growth derived from the statements by `manage.py compute_fundamentals`
+CREATE TABLE fundamental_indicator (
+    id SERIAL PRIMARY KEY,
+    company_id INT NOT NULL REFERENCES company(id) ON DELETE CASCADE,
+    date DATE NOT NULL,
+    return_on_equity NUMERIC(5, 2),
+    return_on_assets NUMERIC(5, 2),
+    gross_profit_margin NUMERIC(5, 2),
+    net_profit_margin NUMERIC(5, 2),
+    pe_ratio NUMERIC(10, 2),
+    pb_ratio NUMERIC(10, 2),
+    ev_to_ebitda NUMERIC(10, 2),
+    price_to_cashflow NUMERIC(10, 2),
+    asset_turnover NUMERIC(5, 2),
+    inventory_turnover NUMERIC(5, 2),
+    CONSTRAINT fundamental_indicator_company_date_uniq UNIQUE (company_id, date)
+);
+
+CREATE INDEX fund_ind_company_date_idx ON fundamental_indicator (company_id, date DESC);
+
+CREATE TABLE growth_metric (
+    id SERIAL PRIMARY KEY,
+    company_id INT NOT NULL REFERENCES company(id) ON DELETE CASCADE,
+    date DATE NOT NULL,
+    revenue_growth NUMERIC(5, 2),
+    earnings_growth NUMERIC(5, 2),
+    eps_growth NUMERIC(5, 2),
+    dividend_growth NUMERIC(5, 2),
+    book_value_growth NUMERIC(5, 2),
+    CONSTRAINT growth_metric_company_date_uniq UNIQUE (company_id, date)
+);
+
+CREATE INDEX growth_metric_company_date_idx ON growth_metric (company_id, date DESC);
+
+CREATE TABLE recommendation (
+    id SERIAL PRIMARY KEY,
+    company_id INT REFERENCES company(id) ON DELETE CASCADE,
+    date DATE NOT NULL,
+    recommendation VARCHAR(50), -- e.g., "Buy", "Sell", "Hold"
+    source VARCHAR(255), -- e.g., "Analyst", "Agency"
+    rating NUMERIC(5, 2)
+);
+
+CREATE TABLE historical_data (
+    id SERIAL,
+    company_id INT NOT NULL REFERENCES company(id) ON DELETE CASCADE,
+    date DATE NOT NULL,
+    open NUMERIC(15, 2),
+    high NUMERIC(15, 2),
+    low NUMERIC(15, 2),
+    close NUMERIC(15, 2),
+    volume BIGINT,
+    PRIMARY KEY (id, date),
+    CONSTRAINT historical_data_company_date_uniq UNIQUE (company_id, date)
+) PARTITION BY RANGE (date);
+
+CREATE TABLE historical_data_default PARTITION OF historical_data DEFAULT;
+CREATE INDEX historical_data_date_brin ON historical_data USING BRIN (date);
+
+CREATE TABLE historical_data_range (
+    id SERIAL PRIMARY KEY,
+    company_id INT REFERENCES company(id) ON DELETE CASCADE,
+    start_date DATE NOT NULL,
+    end_date DATE NOT NULL
+);
+
+CREATE TABLE section_fingerprint (
+    id SERIAL PRIMARY KEY,
+    company_id INT NOT NULL REFERENCES company(id) ON DELETE CASCADE,
+    section VARCHAR(50) NOT NULL, -- company, address, financials, dividend, risk_metrics, officers, balance_sheet
+    digest VARCHAR(64) NOT NULL, -- SHA-256 of the normalized section
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    CONSTRAINT section_fingerprint_uniq UNIQUE (company_id, section)
+);
+
+CREATE TABLE esg_score (
+    id SERIAL PRIMARY KEY,
+    company_id INT REFERENCES company(id) ON DELETE CASCADE,
+    environmental_score NUMERIC(5, 2),
+    social_score NUMERIC(5, 2),
+    governance_score NUMERIC(5, 2),
+    total_esg_score NUMERIC(5, 2),
+    esg_rating VARCHAR(50), -- e.g., "AA", "BBB"
+    rating_agency VARCHAR(255), -- e.g., "MSCI", "S&P"
+    last_updated DATE
+);
+
+CREATE TABLE symbol_demand (
+    id SERIAL PRIMARY KEY,
+    symbol VARCHAR(50) NOT NULL UNIQUE,
+    score DOUBLE PRECISION NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL
+);
+
+CREATE TABLE scrap_job (
+    id SERIAL PRIMARY KEY,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE scrap_job_item (
+    id SERIAL PRIMARY KEY,
+    job_id INT NOT NULL REFERENCES scrap_job(id) ON DELETE CASCADE,
+    symbol VARCHAR(50) NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending', -- pending, running, done, failed
+    attempts INT NOT NULL DEFAULT 0,
+    error TEXT,
+    fetch_ms DOUBLE PRECISION,
+    write_ms DOUBLE PRECISION,
+    sections_written INT,
+    sections_skipped INT,
+    locked_at TIMESTAMP WITH TIME ZONE,
+    finished_at TIMESTAMP WITH TIME ZONE,
+    CONSTRAINT scrap_job_item_job_symbol_uniq UNIQUE (job_id, symbol)
+);
+
+CREATE INDEX scrap_job_item_status_idx ON scrap_job_item (status, locked_at);
@@ -1,5 +1,12 @@
 from django.apps import AppConfig # type: ignore
+from django.core.signals import request_finished
+from django.db.backends.signals import connection_created
 
 class FinscreenConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'finscreen'
+
+    def ready(self):
+        from . import demand, metrics
+        connection_created.connect(metrics.install_query_wrapper)
+        request_finished.connect(demand.flush_due)
@@ -0,0 +1,185 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+from contextlib import contextmanager
+from datetime import date
+from pathlib import Path
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:
+    # No flock on Windows: appends, reads and compaction must not overlap there.
+    fcntl = None
+
+# One fixed-width record per trading day. A missing volume is stored as -1.
+DTYPE = np.dtype([
+    ('date', 'M8[D]'),
+    ('open', '<f8'),
+    ('high', '<f8'),
+    ('low', '<f8'),
+    ('close', '<f8'),
+    ('volume', '<i8'),
+])
+
+COLUMNS = {'open': 'Open', 'high': 'High', 'low': 'Low', 'close': 'Close', 'volume': 'Volume'}
+
+# Layout, per symbol directory:
+#   <year>.bin         compacted records, sorted and unique by date
+#   <year>.compacting  appends being folded into <year>.bin by compact()
+#   <year>.log         appends not compacted yet, newest last
+#   <year>.lock        flock()ed shared by appends and reads, exclusively by compact()
+#   ranges.json        inclusive date ranges fetched from upstream
+
+
+def enabled():
+    return settings.FINSCREEN_ARCHIVE_DIR is not None
+
+
+def _directory(symbol):
+    return Path(settings.FINSCREEN_ARCHIVE_DIR) / symbol.upper()
+
+
+def symbols():
+    root = Path(settings.FINSCREEN_ARCHIVE_DIR)
+    return sorted(path.name for path in root.iterdir() if path.is_dir()) if root.is_dir() else []
+
+
+def to_records(frame):
+    """Convert an OHLCV frame indexed by date into archive records."""
+    frame = frame.reindex(columns=list(COLUMNS.values())).dropna(how='all')
+    records = np.empty(len(frame), dtype=DTYPE)
+    records['date'] = np.array(frame.index.date if isinstance(frame.index, pd.DatetimeIndex) else frame.index, dtype='M8[D]')
+    for field in ['open', 'high', 'low', 'close']:
+        # Same precision as historical_data
+        records[field] = np.round(frame[COLUMNS[field]].to_numpy(dtype=float), 2)
+    volume = frame['Volume'].to_numpy(dtype=float)
+    records['volume'] = np.where(np.isnan(volume), -1, volume)
+    return records
+
+
+def to_frame(records):
+    """Build a frame shaped like history.load() from archive records."""
+    volume = records['volume']
+    if (volume < 0).any():
+        volume = np.where(volume < 0, np.nan, volume)
+    frame = pd.DataFrame(
+        {COLUMNS[field]: records[field] for field in ['open', 'high', 'low', 'close']},
+        index=pd.Index(records['date'].astype(object), name='Date'),
+    )
+    frame['Volume'] = volume
+    return frame
+
+
+@contextmanager
+def _locked(directory, year, exclusive=False):
+    if fcntl is None:
+        yield
+        return
+    fd = os.open(directory / f'{year}.lock', os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        yield
+    finally:
+        os.close(fd)
+
+
+def append(symbol, records):
+    directory = _directory(symbol)
+    directory.mkdir(parents=True, exist_ok=True)
+    years = records['date'].astype('M8[Y]').astype(int) + 1970
+    for year in np.unique(years):
+        # One O_APPEND write per file, so concurrent writers never interleave
+        # records; the shared lock keeps compact() from moving the log away
+        # while it is open.
+        with _locked(directory, year):
+            fd = os.open(directory / f'{year}.log', os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, records[years == year].tobytes())
+            finally:
+                os.close(fd)
+
+
+def _open(path):
+    # A torn trailing record from an interrupted append is ignored.
+    count = path.stat().st_size // DTYPE.itemsize if path.exists() else 0
+    if not count:
+        return np.empty(0, dtype=DTYPE)
+    return np.memmap(path, dtype=DTYPE, mode='r', shape=(count,))
+
+
+def _dedupe(records):
+    # Stable sort, so the last record appended for a date wins.
+    records = records[np.argsort(records['date'], kind='stable')]
+    dates = records['date']
+    return records[np.append(dates[1:] != dates[:-1], True)]
+
+
+def _year(symbol, year):
+    directory = _directory(symbol)
+    paths = [directory / f'{year}{suffix}' for suffix in ['.bin', '.compacting', '.log']]
+    if not any(path.exists() for path in paths):
+        return np.empty(0, dtype=DTYPE)
+    # Opened together under the lock, so a compaction cannot move records
+    # between files in the meantime.
+    with _locked(directory, year):
+        compacted, *pending = [_open(path) for path in paths]
+    pending = [records for records in pending if len(records)]
+    if not pending:
+        return compacted
+    return _dedupe(np.concatenate([compacted, *pending]))
+
+
+def load(symbol, start, end):
+    """
+    Return the records dated within [start, end].
+
+    Compacted years are sliced straight out of the memory map, so a range
+    inside one compacted year is a view rather than a copy.
+    """
+    first, last = np.datetime64(start, 'D'), np.datetime64(end, 'D')
+    parts = []
+    for year in range(start.year, end.year + 1):
+        records = _year(symbol, year)
+        dates = records['date']
+        parts.append(records[np.searchsorted(dates, first):np.searchsorted(dates, last, side='right')])
+    return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+
+def ranges(symbol):
+    path = _directory(symbol) / 'ranges.json'
+    if not path.exists():
+        return []
+    return [(date.fromisoformat(start), date.fromisoformat(end)) for start, end in json.loads(path.read_text())]
+
+
+def set_ranges(symbol, covered):
+    directory = _directory(symbol)
+    directory.mkdir(parents=True, exist_ok=True)
+    tmp = directory / f'ranges.json.{os.getpid()}'
+    tmp.write_text(json.dumps([[start.isoformat(), end.isoformat()] for start, end in covered]))
+    os.replace(tmp, directory / 'ranges.json')
+
+
+def compact(symbol):
+    """
+    Fold appended records into each year's sorted file, returning the years rewritten.
+
+    Each year is locked exclusively while it is compacted, so appends and
+    reads of that year wait for it; appends then go to a fresh log.
+    """
+    directory = _directory(symbol)
+    years = sorted({int(path.name.split('.')[0]) for pattern in ['*.log', '*.compacting'] for path in directory.glob(pattern)})
+    for year in years:
+        log, compacting, compacted = (directory / f'{year}{suffix}' for suffix in ['.log', '.compacting', '.bin'])
+        with _locked(directory, year, exclusive=True):
+            # A leftover .compacting file from an interrupted run is finished first.
+            if not compacting.exists():
+                os.replace(log, compacting)
+            merged = _dedupe(np.concatenate([_open(compacted), _open(compacting)]))
+            tmp = directory / f'{year}.bin.tmp'
+            merged.tofile(tmp)
+            os.replace(tmp, compacted)
+            compacting.unlink()
+    return years
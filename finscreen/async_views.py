@@ -0,0 +1,68 @@
+import asyncio
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, HttpResponseNotAllowed
+from rest_framework.renderers import JSONRenderer
+from . import cache, upstream
+from .upstream import yf
+
+# DRF's @api_view is sync-only, so these are plain Django async views. Under
+# an ASGI server (e.g. `uvicorn api.asgi:application`) a request waiting on
+# upstream holds no worker thread; the blocking yfinance call itself runs on
+# a pooled thread until it returns.
+
+# endpoint -> (yf.Ticker attribute, serializer matching the sync view)
+ENDPOINTS = {
+    'info': ('info', lambda value: value),
+    'calendar': ('calendar', lambda value: value.to_dict()),
+    'recommendations': ('recommendations', lambda value: value.reset_index().to_dict('records')),
+    'options': ('options', lambda value: {'options': list(value)}),
+    'isin': ('isin', lambda value: {'isin': value}),
+    'news': ('news', lambda value: {'news': value}),
+}
+
+DASHBOARD_ENDPOINTS = ['info', 'calendar', 'recommendations']
+
+
+def _json(data, status=200):
+    # Same encoder and NaN handling as the DRF views
+    return HttpResponse(JSONRenderer().render(data), status=status, content_type='application/json')
+
+
+async def fetch(endpoint, symbol):
+    attribute, serialize = ENDPOINTS[endpoint]
+    cached = await sync_to_async(cache.fetch, thread_sensitive=False)(
+        endpoint, symbol, lambda: getattr(yf.Ticker(symbol), attribute)
+    )
+    return cached, serialize(cached.value)
+
+
+async def get_stock_data(request, endpoint, symbol):
+    # require_GET is not async-aware before Django 5.0
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    if endpoint not in ENDPOINTS:
+        return _json({"error": f"Unknown endpoint '{endpoint}'. Valid endpoints: {sorted(ENDPOINTS)}"}, status=404)
+    try:
+        cached, data = await fetch(endpoint, symbol)
+    except upstream.UpstreamError as e:
+        return _json({"error": str(e.detail)}, status=e.status_code)
+    return cache.respond(_json(data), cached)
+
+
+async def get_dashboard_tile(request, symbol):
+    """Info, calendar and recommendations for one symbol, fetched concurrently."""
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    results = await asyncio.gather(*(fetch(endpoint, symbol) for endpoint in DASHBOARD_ENDPOINTS), return_exceptions=True)
+    tile = {'symbol': symbol, 'errors': {}}
+    statuses = []
+    for endpoint, result in zip(DASHBOARD_ENDPOINTS, results):
+        if isinstance(result, Exception):
+            tile[endpoint] = None
+            tile['errors'][endpoint] = str(result)
+            continue
+        cached, tile[endpoint] = result
+        statuses.append(f'{endpoint}={cached.status}')
+    response = _json(tile, status=200 if len(tile['errors']) < len(DASHBOARD_ENDPOINTS) else 503)
+    response['X-Cache'] = ', '.join(statuses)
+    return response
@@ -0,0 +1,228 @@
+import hashlib
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict, namedtuple
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache, DEFAULT_TIMEOUT
+from . import metrics, upstream
+from .singleflight import SingleFlight
+
+# Stores are shared by every thread in the process, keyed by cache alias,
+# the same way Django's LocMemCache does it.
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+class _Store:
+    def __init__(self):
+        self.entries = OrderedDict()  # key -> (pickled value, expires_at)
+        self.size = 0
+        self.lock = threading.Lock()
+
+
+class BoundedLRUCache(BaseCache):
+    """
+    In-process cache backend with LRU eviction and a memory cap.
+
+    Entries are kept pickled and evicted least-recently-used first once their
+    combined size exceeds OPTIONS['MAX_BYTES'].
+    """
+
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, name, params):
+        super().__init__(params)
+        self._max_bytes = params.get('OPTIONS', {}).get('MAX_BYTES', 64 * 1024 * 1024)
+        with _stores_lock:
+            self._store = _stores.setdefault(name, _Store())
+
+    def _get_entry(self, key):
+        entry = self._store.entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] is not None and entry[1] <= time.time():
+            self._delete(key)
+            return None
+        self._store.entries.move_to_end(key)
+        return entry
+
+    def _set(self, key, pickled, timeout):
+        self._delete(key)
+        if len(pickled) > self._max_bytes:
+            return
+        store = self._store
+        store.entries[key] = (pickled, self.get_backend_timeout(timeout))
+        store.size += len(pickled)
+        while store.size > self._max_bytes:
+            evicted_key, (evicted, expires_at) = store.entries.popitem(last=False)
+            store.size -= len(evicted)
+
+    def _delete(self, key):
+        entry = self._store.entries.pop(key, None)
+        if entry is None:
+            return False
+        self._store.size -= len(entry[0])
+        return True
+
+    def get_backend_timeout(self, timeout=DEFAULT_TIMEOUT):
+        if timeout == DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        return None if timeout is None else time.time() + timeout
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        pickled = pickle.dumps(value, self.pickle_protocol)
+        with self._store.lock:
+            if self._get_entry(key) is not None:
+                return False
+            self._set(key, pickled, timeout)
+            return True
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        with self._store.lock:
+            entry = self._get_entry(key)
+        if entry is None:
+            return default
+        return pickle.loads(entry[0])
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        pickled = pickle.dumps(value, self.pickle_protocol)
+        with self._store.lock:
+            self._set(key, pickled, timeout)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        with self._store.lock:
+            entry = self._get_entry(key)
+            if entry is None:
+                return False
+            self._store.entries[key] = (entry[0], self.get_backend_timeout(timeout))
+            return True
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        with self._store.lock:
+            return self._delete(key)
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        with self._store.lock:
+            return self._get_entry(key) is not None
+
+    def clear(self):
+        with self._store.lock:
+            self._store.entries.clear()
+            self._store.size = 0
+
+
+CachedValue = namedtuple('CachedValue', ['value', 'status', 'age'])
+
+stats = {'hits': 0, 'misses': 0, 'stale': 0, 'lock_waits': 0}
+_stats_lock = threading.Lock()
+flight = SingleFlight()
+
+
+def _count(name):
+    with _stats_lock:
+        stats[name] += 1
+
+
+def make_key(endpoint, symbol, params=None):
+    key = f'upstream:{endpoint}:{symbol.upper()}'
+    if params:
+        key += ':' + hashlib.md5(repr(sorted(params.items())).encode()).hexdigest()
+    return key
+
+
+def get_ttl(endpoint):
+    return settings.FINSCREEN_UPSTREAM_CACHE_TTLS.get(endpoint, settings.FINSCREEN_UPSTREAM_CACHE_DEFAULT_TTL)
+
+
+def _fresh(entry, ttl):
+    return entry is not None and time.time() - entry[1] < ttl
+
+
+def _load(cache, key, ttl, loader, name):
+    # Entries outlive their TTL so they can be served stale when upstream is down.
+    timeout = ttl + settings.FINSCREEN_UPSTREAM_STALE_TTL
+    lock_alias = settings.FINSCREEN_UPSTREAM_LOCK_CACHE
+    if lock_alias is None:
+        entry = (upstream.call(loader, name), time.time())
+        cache.set(key, entry, timeout)
+        return entry
+
+    # Cross-process single flight: whoever adds the lock key fetches, everyone
+    # else polls the shared cache until the value shows up or the lock expires.
+    lock = caches[lock_alias]
+    lock_key = f'lock:{key}'
+    lock_timeout = settings.FINSCREEN_UPSTREAM_LOCK_TIMEOUT
+    # A token per holder, so a fetch that outlived its lock doesn't release
+    # the next holder's.
+    token = uuid.uuid4().hex
+    acquired = lock.add(lock_key, token, lock_timeout)
+    if not acquired:
+        _count('lock_waits')
+        deadline = time.time() + lock_timeout
+        while not acquired and time.time() < deadline:
+            time.sleep(0.05)
+            entry = cache.get(key)
+            if _fresh(entry, ttl):
+                return entry
+            # Taken over once the holder gives up without a value or its lock expires
+            acquired = lock.add(lock_key, token, lock_timeout)
+    try:
+        entry = (upstream.call(loader, name), time.time())
+        cache.set(key, entry, timeout)
+        return entry
+    finally:
+        if acquired and lock.get(lock_key) == token:
+            lock.delete(lock_key)
+
+
+def fetch(endpoint, symbol, loader, **params):
+    """
+    Read-through cache for upstream data keyed on (endpoint, symbol, params).
+
+    Concurrent misses for the same key share a single upstream fetch, made
+    through the upstream client. If that fails while an expired entry is still
+    around, the expired entry is served with status STALE.
+    """
+    cache = caches[settings.FINSCREEN_UPSTREAM_CACHE]
+    key = make_key(endpoint, symbol, params)
+    ttl = get_ttl(endpoint)
+    entry = cache.get(key)
+    if _fresh(entry, ttl):
+        _count('hits')
+        metrics.observe_cache(endpoint, 'HIT')
+        value, stored_at = entry
+        return CachedValue(value, 'HIT', time.time() - stored_at)
+
+    _count('misses')
+    try:
+        (value, stored_at), shared = flight.do(key, lambda: _load(cache, key, ttl, loader, endpoint))
+    except upstream.UpstreamError:
+        if entry is None:
+            raise
+        _count('stale')
+        metrics.observe_cache(endpoint, 'STALE')
+        value, stored_at = entry
+        return CachedValue(value, 'STALE', time.time() - stored_at)
+    status = 'COALESCED' if shared else 'MISS'
+    metrics.observe_cache(endpoint, status)
+    return CachedValue(value, status, time.time() - stored_at)
+
+
+def get_stats():
+    with _stats_lock:
+        return dict(stats, **flight.stats, upstream=upstream.get_stats())
+
+
+def respond(response, cached):
+    response['X-Cache'] = cached.status
+    response['Age'] = int(cached.age)
+    return response
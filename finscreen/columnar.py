@@ -0,0 +1,50 @@
+import io
+import pandas as pd
+from django.http import HttpResponse
+from .streaming import JSONErrorRenderer
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+
+class ArrowRenderer(JSONErrorRenderer):
+    media_type = 'application/vnd.apache.arrow.stream'
+    format = 'arrow'
+    charset = None
+
+
+class ParquetRenderer(JSONErrorRenderer):
+    media_type = 'application/vnd.apache.parquet'
+    format = 'parquet'
+    charset = None
+
+
+# Without pyarrow the formats are simply not offered, so DRF answers 404/406.
+RENDERERS = [ArrowRenderer, ParquetRenderer] if pa is not None else []
+FORMATS = {renderer.format: renderer.media_type for renderer in RENDERERS}
+
+
+def _column_name(column):
+    if isinstance(column, pd.Timestamp):
+        return column.date().isoformat() if column == column.normalize() else column.isoformat()
+    return str(column)
+
+
+def to_table(frame):
+    # A named index is kept as a column, so `to_pandas()` restores it.
+    return pa.Table.from_pandas(frame.rename(columns=_column_name))
+
+
+def frame_response(frame, fmt):
+    """Serialize a DataFrame as an Arrow IPC stream or a Parquet file."""
+    table = to_table(frame)
+    sink = io.BytesIO()
+    if fmt == 'parquet':
+        pq.write_table(table, sink, compression='zstd')
+    else:
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+    return HttpResponse(sink.getvalue(), content_type=FORMATS[fmt])
@@ -0,0 +1,194 @@
+import hashlib
+from datetime import date, timedelta
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.core.cache import caches
+from . import indicators
+from .models import Company
+
+METHODS = ['sample', 'ledoit_wolf', 'ewma']
+TRADING_DAYS = 252
+
+# Returns are daily log returns of stored closes on the union of trading
+# dates. A symbol without a close on a date is carried forward, so its move
+# is booked on its next close. Symbols with closes on fewer than
+# FINSCREEN_CORRELATION_MIN_COVERAGE of the window's dates are left out.
+#
+# Each (universe, window, decay) keeps, in the default cache, the window's
+# returns and the weighted sums s1 = sum(w r) and s2 = sum(w r r'), with
+# weights decay ** age (1 for the sample and Ledoit-Wolf estimators). New
+# trading days are folded into the sums and the days falling out of the
+# window taken out, at O(days x symbols^2) instead of O(window x symbols^2).
+
+
+class CorrelationError(ValueError):
+    pass
+
+
+def decay_for(halflife):
+    return 0.5 ** (1 / halflife) if halflife else 1.0
+
+
+def cache_key(symbols, window, decay):
+    universe = hashlib.sha1(','.join(sorted(symbols)).encode()).hexdigest()
+    return f'correlation:{universe}:{window}:{decay:.6f}'
+
+
+def load_closes(symbols, since):
+    """Stored closes from `since` through yesterday as a (dates x symbols) frame."""
+    panels = indicators.load_panel(symbols, max((date.today() - since).days, 1))
+    # Today's bar is still moving; folded into the sums it would never be
+    # corrected, so only completed days count, as for history coverage.
+    closes = panels['close'].reindex(columns=symbols)
+    return closes[closes.index < pd.Timestamp(date.today())]
+
+
+def adjusted_to(symbols):
+    """{symbol: latest split or dividend its stored closes are adjusted for}."""
+    return dict(Company.objects.filter(symbol__in=symbols).values_list('symbol', 'history_adjusted_to'))
+
+
+def _weights(count, decay, offset=0):
+    # Oldest row first
+    return decay ** (np.arange(count - 1, -1, -1) + offset)
+
+
+def _log_returns(closes, previous=None):
+    prices = closes.to_numpy(float)
+    if previous is not None:
+        prices = np.vstack([previous, prices])
+    prices = indicators._ffill(prices)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = np.diff(np.log(prices), axis=0)
+    # Nothing to carry forward before a symbol's first close
+    return np.where(np.isfinite(returns), returns, 0.0), prices[-1]
+
+
+def build(symbols, window, decay):
+    """Window state for `symbols` computed from scratch."""
+    # Calendar days comfortably holding window + 1 trading days
+    closes = load_closes(symbols, date.today() - timedelta(days=int((window + 1) * 365 / TRADING_DAYS) + 14))
+    closes = closes.iloc[-(window + 1):]
+    coverage = closes.notna().mean() if len(closes) else pd.Series(0.0, index=symbols)
+    excluded = {
+        symbol: 'no stored history' if not closes[symbol].notna().any() else f'closes on {coverage[symbol]:.0%} of dates'
+        for symbol in symbols if coverage[symbol] < settings.FINSCREEN_CORRELATION_MIN_COVERAGE
+    }
+    kept = [symbol for symbol in symbols if symbol not in excluded]
+    if len(kept) < 2 or len(closes) < 3:
+        raise CorrelationError('At least two symbols with stored history covering the window are needed.')
+    returns, last_close = _log_returns(closes[kept])
+    weights = _weights(len(returns), decay)
+    return {
+        'universe': symbols,
+        'symbols': kept,
+        'excluded': excluded,
+        'decay': decay,
+        'dates': closes.index[1:],
+        'returns': returns,
+        'last_close': last_close,
+        's1': weights @ returns,
+        's2': (returns * weights[:, None]).T @ returns,
+        'updates': 0,
+        'adjusted_to': adjusted_to(kept),
+    }
+
+
+def append(state, dates, returns):
+    """Slide the window forward by the rows of `returns`, updating the sums in place."""
+    window, count = len(state['returns']), len(returns)
+    old = state['returns'][:count]
+    decay = state['decay']
+    new_weights = _weights(count, decay)
+    old_weights = _weights(count, decay, window)
+    state['s1'] = decay ** count * state['s1'] + new_weights @ returns - old_weights @ old
+    state['s2'] = (
+        decay ** count * state['s2']
+        + (returns * new_weights[:, None]).T @ returns
+        - (old * old_weights[:, None]).T @ old
+    )
+    state['returns'] = np.vstack([state['returns'][count:], returns])
+    state['dates'] = state['dates'][count:].append(dates)
+    state['updates'] += count
+
+
+def refresh(state, window):
+    """
+    Bring a cached state up to the latest stored trading day. Returns the
+    state and whether it changed; after a full window of incremental updates
+    it is rebuilt to shed accumulated rounding, and after a split or dividend
+    because the stored closes it was built from were replaced.
+    """
+    if adjusted_to(state['symbols']) != state.get('adjusted_to'):
+        return build(state['universe'], window, state['decay']), True
+    closes = load_closes(state['symbols'], state['dates'][-1].date())
+    closes = closes[closes.index > state['dates'][-1]]
+    if closes.empty:
+        return state, False
+    if len(closes) >= window or state['updates'] + len(closes) >= window:
+        return build(state['universe'], window, state['decay']), True
+    returns, state['last_close'] = _log_returns(closes, state['last_close'])
+    append(state, closes.index, returns)
+    return state, True
+
+
+def covariance(state, method):
+    """(covariance, shrinkage intensity or None) of daily returns."""
+    returns, decay = state['returns'], state['decay']
+    count = len(returns)
+    weight_sum = count if decay == 1 else (1 - decay ** count) / (1 - decay)
+    mean = state['s1'] / weight_sum
+    # Biased (divide by the weight sum) second moment about the mean
+    biased = state['s2'] / weight_sum - np.outer(mean, mean)
+    if method == 'ledoit_wolf':
+        # Ledoit & Wolf (2004), shrinking toward a scaled identity
+        centered = returns - mean
+        n = biased.shape[0]
+        target = np.trace(biased) / n
+        distance = ((biased - target * np.eye(n)) ** 2).sum()
+        spread = (((centered ** 2).sum(axis=1) ** 2).sum() / count - (biased ** 2).sum()) / count
+        shrinkage = min(max(spread, 0) / distance, 1.0) if distance > 0 else 0.0
+        return shrinkage * target * np.eye(n) + (1 - shrinkage) * biased, shrinkage
+    # Unbiased for the (possibly exponential) weights
+    squared_sum = count if decay == 1 else (1 - decay ** (2 * count)) / (1 - decay ** 2)
+    return biased * weight_sum ** 2 / (weight_sum ** 2 - squared_sum), None
+
+
+def correlation_from(cov):
+    std = np.sqrt(np.clip(np.diag(cov), 0, None))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corr = cov / np.outer(std, std)
+    corr = np.clip(corr, -1, 1)
+    np.fill_diagonal(corr, np.where(std > 0, 1.0, np.nan))
+    return corr
+
+
+def compute(symbols, window, method='sample', halflife=None):
+    """
+    Return (result, cache status) for `symbols` over the last `window`
+    trading days; status is HIT, UPDATED or MISS.
+    """
+    decay = decay_for(halflife if method == 'ewma' else None)
+    store = caches['default']
+    key = cache_key(symbols, window, decay)
+    state = store.get(key)
+    if state is None:
+        state, status = build(symbols, window, decay), 'MISS'
+    else:
+        state, changed = refresh(state, window)
+        status = 'UPDATED' if changed else 'HIT'
+    if status != 'HIT':
+        store.set(key, state, settings.FINSCREEN_CORRELATION_CACHE_TTL)
+
+    cov, shrinkage = covariance(state, method)
+    return {
+        'symbols': state['symbols'],
+        'excluded': state['excluded'],
+        'start': state['dates'][0].date(),
+        'end': state['dates'][-1].date(),
+        'observations': len(state['returns']),
+        'shrinkage': shrinkage,
+        'covariance': cov,
+        'correlation': correlation_from(cov),
+    }, status
@@ -0,0 +1,96 @@
+import math
+import threading
+import time
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.utils import timezone
+from django.utils.deprecation import MiddlewareMixin
+from .models import SymbolDemand
+
+# Reads are counted in process memory, so a read costs no query. Once a
+# response has gone out, flush_due folds the counts into symbol_demand if
+# FINSCREEN_DEMAND_FLUSH_INTERVAL seconds passed since the last flush.
+
+_pending = {}
+_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+# Decays the stored score to the time of this flush and adds the new reads
+# in one statement, so concurrent flushes from other processes all count.
+UPSERT = """
+    INSERT INTO {table} (symbol, score, updated_at) VALUES {values}
+    ON CONFLICT (symbol) DO UPDATE SET
+        score = {table}.score * power(
+            0.5, greatest(extract(epoch FROM EXCLUDED.updated_at - {table}.updated_at), 0) / %s
+        ) + EXCLUDED.score,
+        updated_at = greatest({table}.updated_at, EXCLUDED.updated_at)
+"""
+
+
+def decay(score, seconds):
+    """`score` after `seconds` of exponential decay with FINSCREEN_DEMAND_HALF_LIFE."""
+    return score * math.pow(0.5, max(seconds, 0) / settings.FINSCREEN_DEMAND_HALF_LIFE)
+
+
+def record(symbol):
+    with _lock:
+        _pending[symbol.upper()] = _pending.get(symbol.upper(), 0) + 1
+
+
+def flush():
+    """
+    Add the reads counted since the last flush to symbol_demand, returning
+    how many symbols were written. On a database error the counts are kept
+    for the next flush and the error is raised.
+    """
+    with _lock:
+        counts = dict(_pending)
+        _pending.clear()
+    if not counts:
+        return 0
+    now = timezone.now()
+    table = connection.ops.quote_name(SymbolDemand._meta.db_table)
+    params = []
+    for symbol, count in sorted(counts.items()):
+        params += [symbol, float(count), now]
+    sql = UPSERT.format(table=table, values=', '.join(['(%s, %s, %s)'] * len(counts)))
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params + [settings.FINSCREEN_DEMAND_HALF_LIFE])
+    except DatabaseError:
+        with _lock:
+            for symbol, count in counts.items():
+                _pending[symbol] = _pending.get(symbol, 0) + count
+        raise
+    return len(counts)
+
+
+def flush_due(**kwargs):
+    """request_finished receiver: flush once FINSCREEN_DEMAND_FLUSH_INTERVAL has passed."""
+    global _last_flush
+    with _lock:
+        if time.monotonic() - _last_flush < settings.FINSCREEN_DEMAND_FLUSH_INTERVAL:
+            return
+        _last_flush = time.monotonic()
+    try:
+        flush()
+    except DatabaseError:
+        # The response is already out; the counts wait for the next flush
+        pass
+
+
+def scores():
+    """{symbol: demand score decayed to now}."""
+    now = timezone.now()
+    return {
+        symbol: decay(score, (now - updated_at).total_seconds())
+        for symbol, score, updated_at in SymbolDemand.objects.values_list('symbol', 'score', 'updated_at')
+    }
+
+
+class DemandMiddleware(MiddlewareMixin):
+    """Count GETs of views taking a `symbol` argument."""
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method == 'GET' and view_kwargs.get('symbol'):
+            record(view_kwargs['symbol'])
@@ -0,0 +1,151 @@
+import numpy as np
+import pandas as pd
+from django.db.models import FloatField, Max
+from django.db.models.functions import Cast
+from .models import BalanceSheet, CashFlowStatement, CompanyFinancials, FundamentalIndicator, GrowthMetric, IncomeStatement
+
+# Statement columns the ratios need, all from annual statements
+PANEL_FIELDS = {
+    IncomeStatement: ['revenue', 'cost_of_revenue', 'gross_profit', 'ebitda', 'net_income', 'diluted_eps'],
+    BalanceSheet: ['total_assets', 'total_equity', 'inventory'],
+    CashFlowStatement: ['net_cash_from_operating_activities', 'dividends_paid'],
+}
+
+# Days between two annual periods for the earlier one to count as the prior year
+PRIOR_YEAR_DAYS = (330, 400)
+
+# Ratios are NUMERIC(5, 2) and multiples NUMERIC(10, 2); values too large
+# to store are written as NULL.
+MULTIPLES = ['pe_ratio', 'pb_ratio', 'ev_to_ebitda', 'price_to_cashflow']
+RATIO_LIMIT = 1e3
+MULTIPLE_LIMIT = 1e8
+
+
+def stale_companies():
+    """Ids of companies with an annual statement newer than their latest indicators."""
+    latest = {}
+    for model in PANEL_FIELDS:
+        for company_id, date in (
+            model.objects.filter(frequency=model.ANNUAL).values('company_id').annotate(latest=Max('date')).values_list('company_id', 'latest')
+        ):
+            latest[company_id] = max(date, latest.get(company_id, date))
+    computed = dict(FundamentalIndicator.objects.values('company_id').annotate(latest=Max('date')).values_list('company_id', 'latest'))
+    return sorted(company_id for company_id, date in latest.items() if company_id not in computed or computed[company_id] < date)
+
+
+def load_panel(company_ids=None):
+    """Annual statements as one frame indexed by (company_id, date), one query per statement table."""
+    frames = []
+    for model, fields in PANEL_FIELDS.items():
+        queryset = model.objects.filter(frequency=model.ANNUAL)
+        if company_ids is not None:
+            queryset = queryset.filter(company_id__in=company_ids)
+        rows = queryset.annotate(**{f'{field}_f': Cast(field, FloatField()) for field in fields}).values_list(
+            'company_id', 'date', *(f'{field}_f' for field in fields)
+        )
+        frames.append(
+            pd.DataFrame.from_records(list(rows), columns=['company_id', 'date'] + fields).set_index(['company_id', 'date'])
+        )
+    panel = pd.concat(frames, axis=1).sort_index()
+    return panel.astype(float)
+
+
+def _ratio(numerator, denominator):
+    return numerator / denominator.where(denominator != 0)
+
+
+def compute(panel):
+    """
+    Return (indicators, growth) frames indexed like `panel`.
+
+    Everything is column arithmetic over the whole panel. Balance sheet
+    denominators are averaged with the prior year when there is one, and
+    growth is only computed against a period about a year earlier.
+    """
+    dates = pd.Series(pd.to_datetime(panel.index.get_level_values('date')), index=panel.index)
+    by_company = panel.groupby(level='company_id')
+    gap = (dates - dates.groupby(level='company_id').shift(1)).dt.days
+    prior = by_company.shift(1).where(gap.between(*PRIOR_YEAR_DAYS), np.nan)
+
+    def average(column):
+        return ((panel[column] + prior[column]) / 2).fillna(panel[column])
+
+    gross_profit = panel['gross_profit'].fillna(panel['revenue'] - panel['cost_of_revenue'])
+    indicators = pd.DataFrame({
+        'return_on_equity': _ratio(panel['net_income'], average('total_equity')),
+        'return_on_assets': _ratio(panel['net_income'], average('total_assets')),
+        'gross_profit_margin': _ratio(gross_profit, panel['revenue']),
+        'net_profit_margin': _ratio(panel['net_income'], panel['revenue']),
+        'asset_turnover': _ratio(panel['revenue'], average('total_assets')),
+        'inventory_turnover': _ratio(panel['cost_of_revenue'], average('inventory')),
+    }, index=panel.index)
+
+    def growth(column):
+        # Relative to the prior value's magnitude, so a shrinking loss reads as growth
+        return _ratio(panel[column] - prior[column], prior[column].abs())
+
+    dividends = panel['dividends_paid'].abs()
+    growth_metrics = pd.DataFrame({
+        'revenue_growth': growth('revenue'),
+        'earnings_growth': growth('net_income'),
+        'eps_growth': growth('diluted_eps'),
+        'dividend_growth': _ratio(dividends - prior['dividends_paid'].abs(), prior['dividends_paid'].abs()),
+        'book_value_growth': growth('total_equity'),
+    }, index=panel.index)
+
+    # Multiples need a price, and only the current one is stored, so they are
+    # filled for each company's latest period alone.
+    market = pd.DataFrame.from_records(
+        list(CompanyFinancials.objects.filter(company_id__in=panel.index.get_level_values('company_id').unique()).annotate(
+            market_cap_f=Cast('market_cap', FloatField()), enterprise_value_f=Cast('enterprise_value', FloatField()),
+        ).values_list('company_id', 'market_cap_f', 'enterprise_value_f')),
+        columns=['company_id', 'market_cap', 'enterprise_value'],
+    ).set_index('company_id').astype(float)
+    latest = by_company.tail(1)
+    latest_market = market.reindex(latest.index.get_level_values('company_id'))
+    latest_market.index = latest.index
+    indicators = indicators.join(pd.DataFrame({
+        'pe_ratio': _ratio(latest_market['market_cap'], latest['net_income']),
+        'pb_ratio': _ratio(latest_market['market_cap'], latest['total_equity']),
+        'ev_to_ebitda': _ratio(latest_market['enterprise_value'], latest['ebitda']),
+        'price_to_cashflow': _ratio(latest_market['market_cap'], latest['net_cash_from_operating_activities']),
+    }, index=latest.index))
+    return _fit(indicators), _fit(growth_metrics)
+
+
+def _fit(frame):
+    frame = frame.replace([np.inf, -np.inf], np.nan).round(2)
+    limits = pd.Series({column: MULTIPLE_LIMIT if column in MULTIPLES else RATIO_LIMIT for column in frame.columns})
+    return frame.where(frame.abs() < limits)
+
+
+def write(model, frame):
+    """Upsert a computed frame into `model`, one statement per 1,000 rows. Returns rows written."""
+    frame = frame.astype(object).where(frame.notna(), None)
+    rows = [
+        model(company_id=company_id, date=date, **values)
+        for (company_id, date), values in zip(frame.index, frame.to_dict('records'))
+    ]
+    model.objects.bulk_create(
+        rows, batch_size=1000, update_conflicts=True,
+        unique_fields=['company_id', 'date'], update_fields=list(frame.columns),
+    )
+    return len(rows)
+
+
+def refresh(company_ids=None, full=False):
+    """
+    Recompute indicators and growth for `company_ids`, every company if
+    `full`, or else the stale ones. Returns (companies, periods) computed.
+    """
+    if not full:
+        company_ids = stale_companies() if company_ids is None else company_ids
+        if not company_ids:
+            return 0, 0
+    panel = load_panel(None if full else company_ids)
+    if panel.empty:
+        return 0, 0
+    indicators, growth = compute(panel)
+    write(FundamentalIndicator, indicators)
+    write(GrowthMetric, growth)
+    return panel.index.get_level_values('company_id').nunique(), len(panel)
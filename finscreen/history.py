@@ -0,0 +1,326 @@
+import numpy as np
+import pandas as pd
+from datetime import date, timedelta
+from django.db import transaction
+from . import archive, cache, metrics
+from .upstream import yf
+from .models import Company, HistoricalData, HistoricalDataRange
+
+PERIODS = ['1d', '5d', '1mo', '3mo', '6mo', '1y', '2y', '5y', '10y', 'ytd', 'max']
+INTERVALS = ['1m', '2m', '5m', '15m', '30m', '60m', '90m', '1h', '1d', '5d', '1wk', '1mo', '3mo']
+
+# How far back each daily period reaches; 'max' has no fixed start and is
+# always served live.
+PERIOD_OFFSETS = {
+    '1d': pd.DateOffset(days=1),
+    '5d': pd.DateOffset(days=5),
+    '1mo': pd.DateOffset(months=1),
+    '3mo': pd.DateOffset(months=3),
+    '6mo': pd.DateOffset(months=6),
+    '1y': pd.DateOffset(years=1),
+    '2y': pd.DateOffset(years=2),
+    '5y': pd.DateOffset(years=5),
+    '10y': pd.DateOffset(years=10),
+}
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+ACTION_COLUMNS = ['Dividends', 'Stock Splits']
+INTRADAY_INTERVALS = ['1m', '2m', '5m', '15m', '30m', '60m', '90m', '1h']
+
+ONE_DAY = timedelta(days=1)
+
+
+def download(symbols, period='1mo', interval='1d', start=None, end=None):
+    """Fetch OHLCV for many symbols in one bulk call, returning {symbol: DataFrame}."""
+    frame = yf.download(
+        symbols,
+        period=period,
+        interval=interval,
+        start=start,
+        end=end,
+        group_by='ticker',
+        threads=True,
+        progress=False,
+    )
+    if not isinstance(frame.columns, pd.MultiIndex):
+        return {symbols[0]: frame}
+    present = set(frame.columns.get_level_values(0))
+    return {symbol: frame[symbol] for symbol in symbols if symbol in present}
+
+
+def to_columnar(frame):
+    """
+    Serialize a DataFrame as {'index': [...], 'columns': {name: [...]}}.
+
+    Column names are sent once instead of on every row, and NaN becomes None
+    so the payload stays valid JSON.
+    """
+    frame = frame.dropna(how='all')
+    columns = {}
+    for column in frame.columns:
+        values = frame[column].to_numpy(dtype=object)
+        values[pd.isna(values)] = None
+        columns[str(column)] = values.tolist()
+    index = frame.index
+    if isinstance(index, pd.DatetimeIndex):
+        index = index.strftime('%Y-%m-%dT%H:%M:%S%z')
+    return {'index': np.asarray(index).tolist(), 'columns': columns}
+
+
+def response_frame(frame, interval='1d'):
+    """
+    Shape stored and live bars alike for history responses: OHLCV at
+    historical_data's precision, indexed by `Date`, which is a calendar date
+    for daily and longer intervals.
+    """
+    frame = frame.reindex(columns=OHLCV_COLUMNS)
+    prices = OHLCV_COLUMNS[:4]
+    frame[prices] = frame[prices].astype(float).round(2)
+    if interval not in INTRADAY_INTERVALS and isinstance(frame.index, pd.DatetimeIndex):
+        frame.index = frame.index.date
+    return frame.rename_axis('Date')
+
+
+def period_start(period, today=None):
+    today = today or date.today()
+    if period == 'ytd':
+        return date(today.year, 1, 1)
+    if period in PERIOD_OFFSETS:
+        return (pd.Timestamp(today) - PERIOD_OFFSETS[period]).date()
+    return None
+
+
+def get_company(symbol, create=False):
+    """The stored company for `symbol`, or None; with `create`, one is added for it."""
+    symbol = symbol.upper()
+    if create:
+        return Company.objects.get_or_create(symbol=symbol, defaults={'name': symbol})[0]
+    return Company.objects.filter(symbol=symbol).first()
+
+
+def missing_ranges(covered, start, end):
+    """Return the parts of [start, end] not inside any of the sorted `covered` ranges."""
+    gaps = []
+    cursor = start
+    for range_start, range_end in covered:
+        if range_end < cursor:
+            continue
+        if range_start > end:
+            break
+        if range_start > cursor:
+            gaps.append((cursor, range_start - ONE_DAY))
+        cursor = range_end + ONE_DAY
+    if cursor <= end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+def _merge_ranges(ranges):
+    merged = []
+    for range_start, range_end in sorted(ranges):
+        if merged and range_start <= merged[-1][1] + ONE_DAY:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], range_end))
+        else:
+            merged.append((range_start, range_end))
+    return merged
+
+
+def plan(company, start, end):
+    covered = HistoricalDataRange.objects.filter(company=company).order_by('start_date').values_list('start_date', 'end_date')
+    return missing_ranges(list(covered), start, end)
+
+
+def fetch_gap(symbol, gap_start, gap_end):
+    # `end` is exclusive in yfinance
+    return yf.Ticker(symbol).history(start=gap_start, end=gap_end + ONE_DAY, interval='1d')
+
+
+def _has_bars(frame):
+    return not frame.reindex(columns=OHLCV_COLUMNS).dropna(how='all').empty
+
+
+def _covered(gap, frame):
+    # An empty answer may be a failed or throttled fetch, so it only counts
+    # for a gap without weekdays. Exchange holidays are asked for again.
+    gap_start, gap_end = gap
+    return _has_bars(frame) or not np.busday_count(gap_start, gap_end + ONE_DAY)
+
+
+def latest_action(frames):
+    """The date of the latest split or dividend in `frames`, or None."""
+    dates = []
+    for frame in frames:
+        actions = frame.reindex(columns=ACTION_COLUMNS).fillna(0)
+        days = frame.index[(actions != 0).any(axis=1).to_numpy()]
+        if len(days):
+            dates.append(max(pd.Timestamp(day).date() for day in days))
+    return max(dates, default=None)
+
+
+def _after(ranges, day):
+    # The parts of `ranges` from `day` on
+    return [(max(range_start, day), range_end) for range_start, range_end in ranges if range_end >= day]
+
+
+def store(company, gaps, frames):
+    """
+    Write fetched bars and record the gaps they cover.
+
+    yfinance adjusts every bar before a split or dividend for it, so when a
+    frame shows one newer than the company's history_adjusted_to, the bars
+    stored before it are on an older basis: they are deleted and their
+    coverage dropped, so the next reads fetch them again. Returns the date of
+    that split or dividend, or None.
+    """
+    rows = []
+    for frame in frames:
+        frame = frame.reindex(columns=OHLCV_COLUMNS).dropna(how='all')
+        if frame.empty:
+            continue
+        for day, open_, high, low, close, volume in zip(frame.index.date, *(frame[c].to_numpy() for c in OHLCV_COLUMNS)):
+            rows.append(HistoricalData(
+                company=company,
+                date=day,
+                open=None if np.isnan(open_) else open_,
+                high=None if np.isnan(high) else high,
+                low=None if np.isnan(low) else low,
+                close=None if np.isnan(close) else close,
+                volume=None if np.isnan(volume) else int(volume),
+            ))
+
+    # Today's bar is still moving, so coverage stops at yesterday and the
+    # tail is refreshed on the next read.
+    last_complete = date.today() - ONE_DAY
+    fetched = [
+        (gap_start, min(gap_end, last_complete))
+        for (gap_start, gap_end), frame in zip(gaps, frames)
+        if gap_start <= last_complete and _covered((gap_start, gap_end), frame)
+    ]
+
+    action = latest_action(frames)
+    rebased = None
+    with metrics.span('history_store'), transaction.atomic():
+        if fetched or action:
+            # Serialize range bookkeeping per company.
+            adjusted_to = Company.objects.select_for_update().filter(id=company.id).values_list('history_adjusted_to', flat=True).first()
+            covered = list(HistoricalDataRange.objects.filter(company=company).values_list('start_date', 'end_date'))
+            if action and (adjusted_to is None or action > adjusted_to):
+                rebased = action
+                HistoricalData.objects.filter(company=company, date__lt=action).delete()
+                Company.objects.filter(id=company.id).update(history_adjusted_to=action)
+                covered = _after(covered, action)
+        HistoricalData.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['company_id', 'date'],
+            update_fields=['open', 'high', 'low', 'close', 'volume'],
+        )
+        if fetched or rebased:
+            HistoricalDataRange.objects.filter(company=company).delete()
+            HistoricalDataRange.objects.bulk_create([
+                HistoricalDataRange(company=company, start_date=range_start, end_date=range_end)
+                for range_start, range_end in _merge_ranges(covered + fetched)
+            ])
+        if archive.enabled():
+            transaction.on_commit(lambda: _append_archive(company.symbol, frames, fetched, rebased))
+    return rebased
+
+
+def _append_archive(symbol, frames, fetched, rebased=None):
+    for frame in frames:
+        archive.append(symbol, archive.to_records(frame))
+    if fetched or rebased:
+        covered = archive.ranges(symbol)
+        if rebased:
+            covered = _after(covered, rebased)
+        archive.set_ranges(symbol, _merge_ranges(covered + fetched))
+
+
+def read_archive(symbol, start, end):
+    """
+    Serve [start, end] from the local archive without touching the database.
+
+    Returns None unless the archive covers every complete day in the window.
+    Today's moving bar is refreshed through the upstream cache like ensure()
+    does, and only written on a cache miss.
+    """
+    if not archive.enabled():
+        return None
+    symbol = symbol.upper()
+    last_complete = min(end, date.today() - ONE_DAY)
+    if missing_ranges(archive.ranges(symbol), start, last_complete):
+        return None
+    records = []
+    if end > last_complete:
+        tail_start = last_complete + ONE_DAY
+        tail = cache.fetch(
+            'history', symbol, lambda: fetch_gap(symbol, tail_start, end),
+            start=tail_start.isoformat(), end=end.isoformat(),
+        )
+        if tail.status == 'MISS' and _has_bars(tail.value):
+            store(get_company(symbol, create=True), [(tail_start, end)], [tail.value])
+            # A split or dividend in the tail drops the older coverage.
+            if missing_ranges(archive.ranges(symbol), start, last_complete):
+                return None
+        records = archive.to_records(tail.value)
+    frame = archive.to_frame(archive.load(symbol, start, last_complete))
+    if len(records):
+        frame = pd.concat([frame, archive.to_frame(records)])
+    return frame
+
+
+def seed_archive(company):
+    """Copy everything stored for `company` into the archive, returning the record count."""
+    covered = list(HistoricalDataRange.objects.filter(company=company).order_by('start_date').values_list('start_date', 'end_date'))
+    if not covered:
+        return 0
+    records = archive.to_records(load(company, covered[0][0], date.today()))
+    archive.append(company.symbol, records)
+    archive.set_ranges(company.symbol, _merge_ranges(archive.ranges(company.symbol) + covered))
+    archive.compact(company.symbol)
+    return len(records)
+
+
+def ensure(symbol, start, end):
+    """
+    Backfill only the parts of [start, end] not already stored for `symbol`.
+
+    Returns (company, gaps fetched upstream that had bars). A company row is
+    only added once upstream has returned bars for the symbol, so company is
+    None for symbols with neither.
+    """
+    symbol = symbol.upper()
+    company = get_company(symbol)
+    gaps = plan(company, start, end) if company else [(start, end)]
+    fresh_gaps = []
+    frames = []
+    for gap_start, gap_end in gaps:
+        # Going through the upstream cache means the always-open tail (today)
+        # is fetched and written at most once per TTL, not on every read.
+        # Frames cached before a split or dividend are not reused after it.
+        result = cache.fetch(
+            'history', symbol,
+            lambda gap_start=gap_start, gap_end=gap_end: fetch_gap(symbol, gap_start, gap_end),
+            start=gap_start.isoformat(), end=gap_end.isoformat(), adjusted_to=company and company.history_adjusted_to,
+        )
+        if result.status == 'MISS':
+            fresh_gaps.append((gap_start, gap_end))
+            frames.append(result.value)
+    fetched = [gap for gap, frame in zip(fresh_gaps, frames) if _has_bars(frame)]
+    if fetched and company is None:
+        company = get_company(symbol, create=True)
+    if fresh_gaps and company is not None and store(company, fresh_gaps, frames):
+        # Bars before a newly seen split or dividend were dropped; fetch them
+        # again on the new basis.
+        fetched += ensure(symbol, start, end)[1]
+    return company, fetched
+
+
+def load(company, start, end):
+    rows = HistoricalData.objects.filter(company=company, date__gte=start, date__lte=end).order_by('date').values_list(
+        'date', 'open', 'high', 'low', 'close', 'volume'
+    )
+    frame = pd.DataFrame.from_records(list(rows), columns=['Date'] + OHLCV_COLUMNS)
+    prices = OHLCV_COLUMNS[:4]
+    frame[prices] = frame[prices].astype(float)
+    return frame.set_index('Date')
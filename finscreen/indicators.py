@@ -0,0 +1,203 @@
+import numpy as np
+import pandas as pd
+from datetime import date, timedelta
+from django.conf import settings
+from django.db.models import FloatField
+from django.db.models.functions import Cast
+from . import archive, history
+from .models import HistoricalData
+from .scoring import TTS_WEIGHTS, score_labels
+
+# Points technical_score() gives each signal
+TECHNICAL_POINTS = {'rsi': 2, 'ma': 2, 'macd': 1, 'adx': 1, 'bollinger': 1, 'volume': 1}
+
+
+def load_panel(symbols=None, lookback_days=None):
+    """
+    Load stored daily bars as (dates x symbols) panels, one per field.
+
+    Prices are cast to float in SQL so no Decimal objects are built per row.
+    When the local archive covers every requested symbol it is read instead.
+    """
+    lookback_days = lookback_days or settings.FINSCREEN_SIGNALS_LOOKBACK_DAYS
+    start = date.today() - timedelta(days=lookback_days)
+    frame = _archive_frame(symbols, start) if symbols else None
+    if frame is None:
+        rows = HistoricalData.objects.filter(date__gte=start)
+        if symbols:
+            rows = rows.filter(company__symbol__in=symbols)
+        rows = rows.annotate(
+            high_f=Cast('high', FloatField()),
+            low_f=Cast('low', FloatField()),
+            close_f=Cast('close', FloatField()),
+            volume_f=Cast('volume', FloatField()),
+        ).values_list('company__symbol', 'date', 'high_f', 'low_f', 'close_f', 'volume_f')
+        frame = pd.DataFrame.from_records(rows.iterator(), columns=['symbol', 'date', 'high', 'low', 'close', 'volume'])
+
+    frame['date'] = pd.to_datetime(frame['date'])
+    if frame.empty:
+        return {field: pd.DataFrame(index=pd.DatetimeIndex([], name='date')) for field in ['high', 'low', 'close', 'volume']}
+    wide = frame.pivot(index='date', columns='symbol').sort_index()
+    return {field: wide[field] for field in ['high', 'low', 'close', 'volume']}
+
+
+def _archive_frame(symbols, start):
+    # Only used when the archive covers every requested symbol.
+    if not archive.enabled():
+        return None
+    last_complete = date.today() - timedelta(days=1)
+    parts = []
+    for symbol in symbols:
+        symbol = symbol.upper()
+        if history.missing_ranges(archive.ranges(symbol), start, last_complete):
+            return None
+        records = archive.load(symbol, start, date.today())
+        volume = records['volume'].astype(float)
+        volume[volume < 0] = np.nan
+        parts.append(pd.DataFrame({
+            'symbol': symbol, 'date': records['date'], 'high': records['high'], 'low': records['low'],
+            'close': records['close'], 'volume': volume,
+        }))
+    return pd.concat(parts, ignore_index=True)
+
+
+# The kernels below work on (dates x symbols) float arrays and loop over time
+# at most, never over symbols.
+
+def _shift(a, periods=1):
+    out = np.full_like(a, np.nan)
+    out[periods:] = a[:-periods]
+    return out
+
+
+def _ffill(a):
+    index = np.where(np.isnan(a), 0, np.arange(len(a))[:, None])
+    np.maximum.accumulate(index, axis=0, out=index)
+    return a[index, np.arange(a.shape[1])]
+
+
+def _rolling_sum(a, window):
+    valid = ~np.isnan(a)
+    sums = np.cumsum(np.where(valid, a, 0.0), axis=0)
+    counts = np.cumsum(valid, axis=0)
+    sums[window:] = sums[window:] - sums[:-window]
+    counts[window:] = counts[window:] - counts[:-window]
+    return np.where(counts == window, sums, np.nan)
+
+
+def _rolling_mean(a, window):
+    return _rolling_sum(a, window) / window
+
+
+def _rolling_std(a, window):
+    mean = _rolling_mean(a, window)
+    variance = (_rolling_sum(a * a, window) - window * mean * mean) / (window - 1)
+    return np.sqrt(np.clip(variance, 0, None))
+
+
+def _ewm(a, alpha, min_periods=1):
+    out = np.full_like(a, np.nan)
+    state = np.full(a.shape[1], np.nan)
+    seen = np.zeros(a.shape[1])
+    valid = ~np.isnan(a)
+    for t in range(len(a)):
+        # The first observation seeds the average; later ones blend in.
+        np.copyto(state, a[t], where=valid[t] & np.isnan(state))
+        np.copyto(state, alpha * a[t] + (1 - alpha) * state, where=valid[t])
+        seen += valid[t]
+        np.copyto(out[t], state, where=seen >= min_periods)
+    return out
+
+
+def _wilder(a, period):
+    return _ewm(a, 1 / period, period)
+
+
+def rsi(close, period=14):
+    delta = close - _shift(close)
+    gain = _wilder(np.where(np.isnan(delta), np.nan, np.clip(delta, 0, None)), period)
+    loss = _wilder(np.where(np.isnan(delta), np.nan, np.clip(-delta, 0, None)), period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return 100 - 100 / (1 + gain / loss)
+
+
+def macd(close, fast=12, slow=26, signal=9):
+    line = _ewm(close, 2 / (fast + 1)) - _ewm(close, 2 / (slow + 1))
+    return line, _ewm(line, 2 / (signal + 1))
+
+
+def adx(high, low, close, period=14):
+    prev_close = _shift(close)
+    true_range = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+    up = high - _shift(high)
+    down = _shift(low) - low
+    plus_dm = np.where(np.isnan(up), np.nan, np.where((up > down) & (up > 0), up, 0.0))
+    minus_dm = np.where(np.isnan(down), np.nan, np.where((down > up) & (down > 0), down, 0.0))
+
+    atr = _wilder(true_range, period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        plus_di = 100 * _wilder(plus_dm, period) / atr
+        minus_di = 100 * _wilder(minus_dm, period) / atr
+        dx = 100 * np.abs(plus_di - minus_di) / (plus_di + minus_di)
+    return _wilder(dx, period)
+
+
+def bollinger(close, window=20, width=2):
+    middle = _rolling_mean(close, window)
+    spread = width * _rolling_std(close, window)
+    return middle - spread, middle + spread
+
+
+def compute(panels):
+    """
+    Compute the latest indicator values and signal scores for every symbol.
+
+    Every indicator is evaluated over the whole panel at once; only each
+    symbol's last trading day is kept.
+    """
+    close_panel = panels['close']
+    observed = close_panel.notna().to_numpy()
+    # Holes (holidays on one exchange but not another) are carried forward so
+    # rolling windows stay intact.
+    high, low, close, volume = (_ffill(panels[field].to_numpy(dtype=float)) for field in ['high', 'low', 'close', 'volume'])
+
+    # Row of each symbol's last real bar
+    last = len(observed) - 1 - np.argmax(observed[::-1], axis=0)
+    columns = np.arange(close.shape[1])
+
+    def latest(a):
+        return a[last, columns]
+
+    macd_line, macd_signal = macd(close)
+    lower, upper = bollinger(close)
+    values = pd.DataFrame({
+        'rsi': latest(rsi(close)),
+        'ma_50': latest(_rolling_mean(close, 50)),
+        'ma_200': latest(_rolling_mean(close, 200)),
+        'macd': latest(macd_line),
+        'macd_signal': latest(macd_signal),
+        'adx': latest(adx(high, low, close)),
+        'close': latest(close),
+        'bollinger_lower': latest(lower),
+        'bollinger_upper': latest(upper),
+        'volume': latest(volume),
+        'average_volume': latest(_rolling_mean(volume, 20)),
+        'as_of': close_panel.index[last],
+    }, index=close_panel.columns)
+    values = values[observed.any(axis=0)]
+
+    # Each signal becomes +1/0/-1, mirroring the branches in technical_score().
+    # NaN comparisons are False, so missing indicators score 0 there as well.
+    signals = pd.DataFrame({
+        'rsi': np.select([values['rsi'] < 30, values['rsi'] > 70], [1, -1], 0),
+        'ma': np.select([values['ma_50'] > values['ma_200'], values['ma_50'] < values['ma_200']], [1, -1], 0),
+        'macd': np.select([values['macd'] > values['macd_signal'], values['macd'] < values['macd_signal']], [1, -1], 0),
+        'adx': np.select([values['adx'] > 25, values['adx'] < 20], [1, -1], 0),
+        'bollinger': np.select([values['close'] < values['bollinger_lower'], values['close'] > values['bollinger_upper']], [1, -1], 0),
+        'volume': np.select([values['volume'] > values['average_volume'], values['volume'] < values['average_volume']], [1, -1], 0),
+    }, index=values.index)
+
+    values['technical_score'] = signals.to_numpy() @ np.array([TECHNICAL_POINTS[name] for name in signals.columns])
+    values['tts'] = signals.to_numpy() @ np.array([TTS_WEIGHTS[name] for name in signals.columns])
+    values['label'] = score_labels(values['tts'])
+    return values.sort_values('tts', ascending=False)
@@ -0,0 +1,104 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+from . import metrics
+from .models import ScrapJob, ScrapJobItem
+from .scraper import timed_fetch, write_batch
+
+
+def enqueue(symbols):
+    """Queue a job scraping `symbols`, uppercased and without duplicates."""
+    symbols = list(dict.fromkeys(symbol.strip().upper() for symbol in symbols if symbol.strip()))
+    with transaction.atomic():
+        job = ScrapJob.objects.create()
+        ScrapJobItem.objects.bulk_create([ScrapJobItem(job=job, symbol=symbol) for symbol in symbols])
+    return job
+
+
+def claim(limit):
+    """
+    Lock up to `limit` items for this worker.
+
+    Pending items are taken first; items left `running` by a worker whose lease
+    expired are picked up again, so a crash never loses a symbol and symbols
+    that already finished are never fetched twice.
+    """
+    now = timezone.now()
+    expired = now - timedelta(seconds=settings.FINSCREEN_SCRAP_JOB_LEASE)
+    with transaction.atomic():
+        # Give up on items that keep killing workers.
+        ScrapJobItem.objects.filter(
+            status=ScrapJobItem.RUNNING,
+            locked_at__lt=expired,
+            attempts__gte=settings.FINSCREEN_SCRAP_JOB_MAX_ATTEMPTS,
+        ).update(status=ScrapJobItem.FAILED, error='Worker lease expired', finished_at=now)
+
+        items = list(
+            ScrapJobItem.objects.select_for_update(skip_locked=True)
+            .filter(Q(status=ScrapJobItem.PENDING) | Q(status=ScrapJobItem.RUNNING, locked_at__lt=expired))
+            .order_by('id')[:limit]
+        )
+        ScrapJobItem.objects.filter(id__in=[item.id for item in items]).update(
+            status=ScrapJobItem.RUNNING, locked_at=now, attempts=F('attempts') + 1
+        )
+    return items
+
+
+def process(items, max_workers):
+    with metrics.span('scrap_fetch'), ThreadPoolExecutor(max_workers=max(max_workers, 1)) as executor:
+        fetched = list(executor.map(timed_fetch, [item.symbol for item in items]))
+
+    pending = {}
+    for item, (payload, error, fetch_seconds) in zip(items, fetched):
+        item.fetch_ms = round(fetch_seconds * 1000, 2)
+        if error is not None:
+            item.status = ScrapJobItem.FAILED
+            item.error = str(error)
+        else:
+            pending[item.symbol] = payload
+
+    if pending:
+        started = time.perf_counter()
+        with metrics.span('scrap_write'):
+            results = write_batch(pending)
+        write_ms = round((time.perf_counter() - started) * 1000, 2)
+        for item in items:
+            if item.symbol not in pending:
+                continue
+            result = results[item.symbol]
+            item.write_ms = write_ms
+            item.sections_written = result['written']
+            item.sections_skipped = result['skipped']
+            if result['errors']:
+                item.status = ScrapJobItem.FAILED
+                item.error = result['errors'][0]['error']
+            else:
+                item.status = ScrapJobItem.DONE
+                item.error = None
+
+    now = timezone.now()
+    for item in items:
+        item.finished_at = now
+    ScrapJobItem.objects.bulk_update(
+        items, ['status', 'error', 'fetch_ms', 'write_ms', 'sections_written', 'sections_skipped', 'finished_at']
+    )
+
+
+def job_status(job):
+    counts = dict(job.items.values_list('status').annotate(total=Count('id')))
+    sections = job.items.aggregate(written=Sum('sections_written'), skipped=Sum('sections_skipped'))
+    items = job.items.order_by('id').values(
+        'symbol', 'status', 'attempts', 'error', 'fetch_ms', 'write_ms', 'sections_written', 'sections_skipped', 'finished_at'
+    )
+    return {
+        'job_id': job.id,
+        'created_at': job.created_at,
+        'done': not counts.get(ScrapJobItem.PENDING) and not counts.get(ScrapJobItem.RUNNING),
+        'counts': counts,
+        'sections': {key: value or 0 for key, value in sections.items()},
+        'symbols': {item.pop('symbol'): item for item in items},
+    }
@@ -0,0 +1,43 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from finscreen import history
+
+
+class Command(BaseCommand):
+    help = 'Store daily OHLCV for the given symbols, fetching only dates not already stored.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('symbols', nargs='+')
+        parser.add_argument('--period', default='1y', choices=list(history.PERIOD_OFFSETS) + ['ytd'])
+        parser.add_argument('--workers', type=int, default=settings.FINSCREEN_SCRAP_MAX_WORKERS)
+
+    def _backfill(self, symbol, start, end):
+        try:
+            return history.ensure(symbol, start, end)
+        finally:
+            connection.close()
+
+    def handle(self, *args, **options):
+        start = history.period_start(options['period'])
+        end = date.today()
+        if start is None:
+            raise CommandError(f"Unsupported period {options['period']}")
+
+        with ThreadPoolExecutor(max_workers=max(options['workers'], 1)) as executor:
+            futures = {
+                symbol: executor.submit(self._backfill, symbol, start, end)
+                for symbol in options['symbols']
+            }
+            for symbol, future in futures.items():
+                try:
+                    company, fetched = future.result()
+                except Exception as e:
+                    self.stderr.write(f'{symbol}: {e}')
+                    continue
+                if company is None:
+                    self.stderr.write(f'{symbol}: no price history upstream')
+                    continue
+                self.stdout.write(f'{symbol}: {len(fetched)} gap(s) fetched')
@@ -0,0 +1,49 @@
+import time
+import numpy as np
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from finscreen import archive, history
+
+
+def _time(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return np.percentile(timings, [50, 95])
+
+
+class Command(BaseCommand):
+    help = 'Compare daily history read latency from the archive, historical_data and upstream.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('symbol')
+        parser.add_argument('--period', default='1y', choices=list(history.PERIOD_OFFSETS) + ['ytd'])
+        parser.add_argument('--repeat', type=int, default=200)
+        parser.add_argument('--upstream-repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        symbol = options['symbol'].upper()
+        start = history.period_start(options['period'])
+        end = date.today()
+        company, fetched = history.ensure(symbol, start, end)
+        if company is None:
+            raise CommandError(f'No price history found for {symbol}.')
+
+        readers = {
+            'db': (lambda: history.load(company, start, end), options['repeat']),
+            'upstream': (lambda: history.fetch_gap(symbol, start, end), options['upstream_repeat']),
+        }
+        if archive.enabled():
+            history.seed_archive(company)
+            readers['archive slice'] = (lambda: archive.load(symbol, start, end), options['repeat'])
+            readers['archive frame'] = (lambda: history.read_archive(symbol, start, end), options['repeat'])
+        else:
+            self.stderr.write('FINSCREEN_ARCHIVE_DIR is not set; skipping the archive.')
+
+        for name, (reader, repeat) in readers.items():
+            if repeat < 1:
+                continue
+            p50, p95 = _time(reader, repeat)
+            self.stdout.write(f'{name:<14} p50 {p50:9.3f} ms  p95 {p95:9.3f} ms  ({repeat} reads)')
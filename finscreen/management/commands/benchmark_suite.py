@@ -0,0 +1,240 @@
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+import numpy as np
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from finscreen import jobs, replay, upstream
+from finscreen.models import ScrapJobItem
+
+VIEWS = {
+    'info': lambda symbol, expiration: f'/api/info/{symbol}/',
+    'history': lambda symbol, expiration: f'/api/history/{symbol}/?period=1y',
+    'options': lambda symbol, expiration: f'/api/options/{symbol}/',
+    'option_chain': lambda symbol, expiration: f'/api/option_chain/{symbol}/{expiration}/',
+    'technical_signals': lambda symbol, expiration: f'/api/signals/technical/?symbols={symbol}',
+    'fhs_screen': lambda symbol, expiration: '/api/screen/fhs/?page_size=50',
+}
+
+# Lower is better for every metric except these
+HIGHER_IS_BETTER = {'symbols_per_second'}
+
+
+@contextmanager
+def _count_queries(counter):
+    def wrapper(execute, sql, params, many, context):
+        counter[0] += 1
+        return execute(sql, params, many, context)
+    with connection.execute_wrapper(wrapper):
+        yield
+
+
+def _clear_caches():
+    for cache in caches.all():
+        cache.clear()
+
+
+def _percentiles(timings):
+    p50, p95, p99 = np.percentile(timings, [50, 95, 99])
+    return {'p50_ms': round(p50, 3), 'p95_ms': round(p95, 3), 'p99_ms': round(p99, 3)}
+
+
+def _peak_rss_mb():
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _flatten(results, prefix=''):
+    flat = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f'{prefix}{key}.'))
+        elif isinstance(value, (int, float)):
+            flat[f'{prefix}{key}'] = value
+    return flat
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark scrape throughput, view latency, DB round trips and peak memory against the '
+        'replay client, in a throwaway test database. Results are written as JSON so runs on '
+        'different commits can be compared with --baseline.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000], help='Universe sizes to scrape.')
+        parser.add_argument('--output', type=Path, help='Write results here as JSON.')
+        parser.add_argument('--baseline', type=Path, help='Earlier results to compare against.')
+        parser.add_argument('--fixtures', type=Path, help='Fixture directory; defaults to FINSCREEN_REPLAY_FIXTURES, '
+                                                          'or 20 synthetic symbols if that is empty.')
+        parser.add_argument('--latency', type=float, default=0.05, help='Synthetic seconds per upstream call.')
+        parser.add_argument('--jitter', type=float, default=0.5)
+        parser.add_argument('--workers', type=int, default=settings.FINSCREEN_SCRAP_MAX_WORKERS)
+        parser.add_argument('--batch-size', type=int, default=settings.FINSCREEN_SCRAP_BATCH_SIZE)
+        parser.add_argument('--view-symbols', type=int, default=20, help='Symbols sampled per view.')
+        parser.add_argument('--view-repeat', type=int, default=5, help='Warm requests per sampled symbol.')
+        parser.add_argument('--tracemalloc', action='store_true',
+                            help='Also record the Python heap peak while scraping; slows the scrape down.')
+
+    def handle(self, *args, **options):
+        fixtures = options['fixtures'] or Path(settings.FINSCREEN_REPLAY_FIXTURES)
+        if not (fixtures.is_dir() and any(path.is_dir() for path in fixtures.iterdir())):
+            fixtures = Path(tempfile.mkdtemp(prefix='finscreen-fixtures-'))
+            self.stderr.write(f'No fixtures recorded; generating 20 synthetic symbols in {fixtures}')
+            for i in range(20):
+                replay.synthetic(f'SYN{i:04d}', fixtures)
+
+        config = {
+            'sizes': sorted(options['sizes']),
+            'latency': options['latency'],
+            'jitter': options['jitter'],
+            'workers': options['workers'],
+            'batch_size': options['batch_size'],
+            'view_symbols': options['view_symbols'],
+            'view_repeat': options['view_repeat'],
+            'fixtures': str(fixtures),
+            'database': connection.vendor,
+        }
+        overrides = override_settings(
+            FINSCREEN_YFINANCE_CLIENT='replay',
+            FINSCREEN_REPLAY_FIXTURES=fixtures,
+            FINSCREEN_REPLAY_LATENCY=options['latency'],
+            FINSCREEN_REPLAY_JITTER=options['jitter'],
+            # Measure the code, not the production rate limit
+            FINSCREEN_UPSTREAM_RATE=1e9,
+            FINSCREEN_UPSTREAM_BURST=1e9,
+            FINSCREEN_UPSTREAM_MAX_WORKERS=max(options['workers'] * 2, 32),
+            # Private in-process caches, so clearing them for cold runs touches nothing shared
+            CACHES={
+                'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'benchmark'},
+                settings.FINSCREEN_UPSTREAM_CACHE: {'BACKEND': 'finscreen.cache.BoundedLRUCache', 'LOCATION': 'benchmark-upstream'},
+            },
+            FINSCREEN_UPSTREAM_LOCK_CACHE=None,
+            FINSCREEN_ARCHIVE_DIR=None,
+            ALLOWED_HOSTS=['testserver'],
+            DEBUG=False,
+        )
+
+        results = {}
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with overrides:
+                upstream.reset()
+                for size in config['sizes']:
+                    call_command('flush', interactive=False, verbosity=0)
+                    _clear_caches()
+                    results[str(size)] = self.run_size(size, options)
+                    self.report(size, results[str(size)])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            upstream.reset()
+
+        report = {
+            'commit': _commit(),
+            'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'config': config,
+            'results': results,
+        }
+        if options['output']:
+            options['output'].write_text(json.dumps(report, indent=2))
+            self.stdout.write(f'Results written to {options["output"]}')
+        if options['baseline']:
+            self.compare(json.loads(options['baseline'].read_text()), report)
+
+    def run_size(self, size, options):
+        symbols = [f'BENCH{i:05d}' for i in range(size)]
+        job = jobs.enqueue(symbols)
+
+        queries = [0]
+        if options['tracemalloc']:
+            tracemalloc.start()
+        started = time.perf_counter()
+        with _count_queries(queries):
+            while True:
+                items = jobs.claim(options['batch_size'])
+                if not items:
+                    break
+                jobs.process(items, options['workers'])
+        elapsed = time.perf_counter() - started
+        scrape = {
+            'seconds': round(elapsed, 3),
+            'symbols_per_second': round(size / elapsed, 2),
+            'queries_per_symbol': round(queries[0] / size, 2),
+            'failed': job.items.filter(status=ScrapJobItem.FAILED).count(),
+            'peak_rss_mb': _peak_rss_mb(),
+        }
+        if options['tracemalloc']:
+            scrape['heap_peak_mb'] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 1)
+            tracemalloc.stop()
+
+        client = Client()
+        sample = symbols[:options['view_symbols']]
+        expirations = {symbol: replay.client().Ticker(symbol).options[0] for symbol in sample}
+        views = {}
+        for name, url in VIEWS.items():
+            _clear_caches()
+            view = {}
+            for phase, repeat in [('cold', 1), ('warm', options['view_repeat'])]:
+                timings, queries, errors = [], [0], 0
+                with _count_queries(queries):
+                    for _ in range(repeat):
+                        for symbol in sample:
+                            started = time.perf_counter()
+                            response = client.get(url(symbol, expirations[symbol]))
+                            timings.append((time.perf_counter() - started) * 1000)
+                            errors += response.status_code >= 400
+                view[phase] = dict(
+                    _percentiles(timings), queries_per_request=round(queries[0] / len(timings), 2), errors=errors
+                )
+            views[name] = view
+        return {'scrape': scrape, 'views': views, 'peak_rss_mb': _peak_rss_mb()}
+
+    def report(self, size, result):
+        scrape = result['scrape']
+        self.stdout.write(
+            f'{size} symbols: {scrape["symbols_per_second"]} symbols/s, {scrape["queries_per_symbol"]} queries/symbol, '
+            f'{scrape["failed"]} failed, peak RSS {result["peak_rss_mb"]} MB'
+        )
+        for name, view in result['views'].items():
+            cold, warm = view['cold'], view['warm']
+            self.stdout.write(
+                f'  {name:<18} cold p50 {cold["p50_ms"]:9.2f} ms  warm p50 {warm["p50_ms"]:9.2f} ms  '
+                f'p95 {warm["p95_ms"]:9.2f} ms  p99 {warm["p99_ms"]:9.2f} ms  {warm["queries_per_request"]:6.1f} queries'
+                + (f'  {cold["errors"] + warm["errors"]} errors' if cold['errors'] + warm['errors'] else '')
+            )
+
+    def compare(self, baseline, report):
+        self.stdout.write(f'Compared with {baseline.get("commit")} ({baseline.get("created_at")}):')
+        if baseline.get('config') != report['config']:
+            self.stderr.write('Configurations differ; deltas may not be meaningful.')
+        before, after = _flatten(baseline['results']), _flatten(report['results'])
+        for key in sorted(before.keys() & after.keys()):
+            if not before[key] or key.endswith('errors') or key.endswith('failed'):
+                continue
+            change = (after[key] - before[key]) / before[key] * 100
+            worse = change < 0 if key.rsplit('.', 1)[-1] in HIGHER_IS_BETTER else change > 0
+            marker = '  REGRESSION' if worse and abs(change) >= 10 else ''
+            self.stdout.write(f'  {key:<48} {before[key]:>12} -> {after[key]:>12}  {change:+7.1f}%{marker}')
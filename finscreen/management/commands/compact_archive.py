@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+from finscreen import archive, history
+from finscreen.models import Company
+
+
+class Command(BaseCommand):
+    help = 'Merge appended records in the local OHLCV archive into sorted per-year files.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('symbols', nargs='*', help='Defaults to every archived symbol.')
+        parser.add_argument('--from-db', action='store_true', help='First copy historical_data into the archive.')
+
+    def handle(self, *args, **options):
+        if not archive.enabled():
+            raise CommandError('FINSCREEN_ARCHIVE_DIR is not set.')
+
+        symbols = [symbol.upper() for symbol in options['symbols']]
+        if options['from_db']:
+            companies = Company.objects.filter(historicaldatarange__isnull=False).distinct()
+            if symbols:
+                companies = companies.filter(symbol__in=symbols)
+            for company in companies:
+                self.stdout.write(f'{company.symbol}: {history.seed_archive(company)} record(s) copied')
+
+        for symbol in symbols or archive.symbols():
+            years = archive.compact(symbol)
+            self.stdout.write(f'{symbol}: {len(years)} year(s) compacted')
@@ -0,0 +1,27 @@
+import time
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from finscreen import fundamentals, screener
+from finscreen.models import Company
+
+
+class Command(BaseCommand):
+    help = (
+        'Compute fundamental_indicator and growth_metric from the stored annual statements. '
+        'By default only companies with periods newer than their last computed indicators.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('symbols', nargs='*', help='Recompute just these symbols.')
+        parser.add_argument('--full', action='store_true', help='Recompute every company.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        company_ids = None
+        if options['symbols']:
+            company_ids = list(Company.objects.filter(symbol__in=[s.upper() for s in options['symbols']]).values_list('id', flat=True))
+        companies, periods = fundamentals.refresh(company_ids, full=options['full'])
+        if companies:
+            # Scores read the latest indicators
+            caches['default'].delete(screener.FHS_CACHE_KEY)
+        self.stdout.write(f'Computed {periods} periods for {companies} companies in {time.perf_counter() - started:.2f}s')
@@ -0,0 +1,66 @@
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+# Tables range-partitioned by month on `date` in ddl.sql
+PARTITIONED_TABLES = ['stock_price', 'historical_data']
+
+
+def _add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+class Command(BaseCommand):
+    help = 'Create monthly partitions for the partitioned time-series tables (Postgres only).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ahead', type=int, default=3, help='Months to create after the current one.')
+        parser.add_argument('--since', help='First month to create, as YYYY-MM. Defaults to the current month.')
+
+    def _existing(self, table):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT child.relname FROM pg_inherits '
+                'JOIN pg_class parent ON parent.oid = pg_inherits.inhparent '
+                'JOIN pg_class child ON child.oid = pg_inherits.inhrelid '
+                'WHERE parent.relname = %s',
+                [table],
+            )
+            return {name for name, in cursor.fetchall()}
+
+    def _create(self, table, name, start, end):
+        # Rows for this month may already sit in the default partition, which
+        # would block attaching; they are moved into the new partition first.
+        quote = connection.ops.quote_name
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'CREATE TABLE {quote(name)} (LIKE {quote(table)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+            cursor.execute(
+                f'WITH moved AS (DELETE FROM {quote(table + "_default")} WHERE date >= %s AND date < %s RETURNING *) '
+                f'INSERT INTO {quote(name)} SELECT * FROM moved',
+                [start, end],
+            )
+            moved = cursor.rowcount
+            cursor.execute(f'ALTER TABLE {quote(table)} ATTACH PARTITION {quote(name)} FOR VALUES FROM (%s) TO (%s)', [start, end])
+        return moved
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Partitioning needs PostgreSQL.')
+
+        current = date.today().replace(day=1)
+        try:
+            first = date.fromisoformat(f"{options['since']}-01") if options['since'] else current
+        except ValueError:
+            raise CommandError('--since must look like YYYY-MM.')
+        last = _add_months(current, options['ahead'])
+
+        for table in PARTITIONED_TABLES:
+            existing = self._existing(table)
+            month = first
+            while month <= last:
+                name = f'{table}_{month:%Y_%m}'
+                if name not in existing:
+                    moved = self._create(table, name, month, _add_months(month, 1))
+                    self.stdout.write(f'{name}: created, {moved} row(s) moved from the default partition')
+                month = _add_months(month, 1)
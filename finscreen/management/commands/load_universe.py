@@ -0,0 +1,152 @@
+import csv
+import json
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from finscreen import scraper
+
+
+def read_symbols(path):
+    """Symbols from a CSV with a `symbol` column, or a text file with one per line."""
+    with open(path, newline='') as f:
+        sample = f.read(4096)
+        f.seek(0)
+        rows = csv.reader(f)
+        header = next(rows, [])
+        columns = [column.strip().lower() for column in header]
+        if 'symbol' in columns or 'ticker' in columns:
+            index = columns.index('symbol' if 'symbol' in columns else 'ticker')
+        else:
+            if ',' in sample:
+                raise CommandError(f'{path} looks like a CSV but has no "symbol" or "ticker" column.')
+            index = 0
+            f.seek(0)
+            rows = csv.reader(f)
+        symbols = (row[index].strip().upper() for row in rows if len(row) > index)
+        return list(dict.fromkeys(symbol for symbol in symbols if symbol and not symbol.startswith('#')))
+
+
+def read_checkpoint(path):
+    """Return ({symbol: None}, {symbol: error}) for symbols already loaded or failed."""
+    done, failed = {}, {}
+    if not path.exists():
+        return done, failed
+    with open(path) as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # Torn last line from an interrupted write
+                continue
+            done.update(dict.fromkeys(entry['done']))
+            failed.update(entry['failed'])
+    for symbol in done:
+        failed.pop(symbol, None)
+    return done, failed
+
+
+def _fetch(symbol):
+    try:
+        return scraper.fetch_symbol(symbol), None
+    except Exception as e:
+        return None, e
+
+
+class Command(BaseCommand):
+    help = (
+        'Load a symbol listing: fetch upstream with bounded concurrency, normalize payloads in a '
+        'process pool and write in batches, checkpointing progress so an interrupted run resumes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', type=Path, help='CSV with a symbol/ticker column, or one symbol per line.')
+        parser.add_argument('--checkpoint', type=Path, help='Defaults to <file>.checkpoint.')
+        parser.add_argument('--concurrency', type=int, default=settings.FINSCREEN_SCRAP_MAX_WORKERS, help='Concurrent upstream fetches.')
+        parser.add_argument('--processes', type=int, default=os.cpu_count(), help='Normalizing processes.')
+        parser.add_argument('--batch-size', type=int, default=settings.FINSCREEN_SCRAP_BATCH_SIZE)
+        parser.add_argument('--retry-failed', action='store_true', help='Retry symbols that failed in earlier runs.')
+
+    def handle(self, *args, **options):
+        symbols = read_symbols(options['file'])
+        checkpoint = options['checkpoint'] or options['file'].with_name(options['file'].name + '.checkpoint')
+        done, failed = read_checkpoint(checkpoint)
+        skip = done.keys() | (set() if options['retry_failed'] else failed.keys())
+        todo = [symbol for symbol in symbols if symbol not in skip]
+        self.stdout.write(
+            f'{len(symbols)} symbols in {options["file"]}: {len(done)} already loaded, '
+            f'{len(failed)} failed before, {len(todo)} to load. Checkpoint: {checkpoint}'
+        )
+        if not todo:
+            return
+
+        batch_size = max(options['batch_size'], 1)
+        batches = [todo[i:i + batch_size] for i in range(0, len(todo), batch_size)]
+        errors = {}
+        loaded = 0
+        started = time.perf_counter()
+        # Workers set Django up before unpickling their first task, which
+        # matters where processes are spawned rather than forked.
+        with ThreadPoolExecutor(max_workers=max(options['concurrency'], 1)) as fetcher, \
+                ProcessPoolExecutor(max_workers=max(options['processes'] or 1, 1), initializer=django.setup) as parser, \
+                open(checkpoint, 'a') as log:
+            if log.tell():
+                # Start on a fresh line after a torn write, or it would swallow this run's first entry
+                with open(checkpoint, 'rb') as f:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read() != b'\n':
+                        log.write('\n')
+            # The next batch is fetched while the current one is normalized and written.
+            pending = [fetcher.submit(_fetch, symbol) for symbol in batches[0]]
+            for i, batch in enumerate(batches):
+                fetched = [future.result() for future in pending]
+                if i + 1 < len(batches):
+                    pending = [fetcher.submit(_fetch, symbol) for symbol in batches[i + 1]]
+
+                batch_errors = {}
+                normalizing = {}
+                for symbol, (raw, error) in zip(batch, fetched):
+                    if error is not None:
+                        batch_errors[symbol] = f'fetch: {error}'
+                    else:
+                        normalizing[symbol] = parser.submit(scraper.normalize, symbol, *raw)
+                payloads = {}
+                for symbol, future in normalizing.items():
+                    try:
+                        payloads[symbol] = future.result()
+                    except Exception as e:
+                        batch_errors[symbol] = f'normalize: {e}'
+                if payloads:
+                    for symbol, result in scraper.write_batch(payloads).items():
+                        if result['errors']:
+                            batch_errors[symbol] = f'write: {result["errors"][0]["error"]}'
+
+                batch_done = [symbol for symbol in batch if symbol not in batch_errors]
+                log.write(json.dumps({'done': batch_done, 'failed': batch_errors}) + '\n')
+                log.flush()
+                os.fsync(log.fileno())
+
+                errors.update(batch_errors)
+                loaded += len(batch_done)
+                elapsed = time.perf_counter() - started
+                processed = loaded + len(errors)
+                self.stdout.write(
+                    f'[{processed}/{len(todo)}] {loaded} loaded, {len(errors)} failed, '
+                    f'{processed / elapsed:.1f} symbols/s, ETA {(len(todo) - processed) / (processed / elapsed):.0f}s'
+                )
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'Loaded {loaded} of {len(todo)} symbols in {elapsed:.1f}s ({len(todo) / elapsed:.1f} symbols/s), {len(errors)} failed.'
+        )
+        if errors:
+            # Group by message with the symbol taken out, so one cause shows up once.
+            causes = Counter(error.replace(symbol, '<symbol>') for symbol, error in errors.items())
+            self.stdout.write('Failures:')
+            for cause, count in causes.most_common(10):
+                self.stdout.write(f'  {count:>6}  {cause[:200]}')
+            self.stdout.write(f'Rerun with --retry-failed to try the {len(errors)} failed symbols again.')
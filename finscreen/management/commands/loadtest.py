@@ -0,0 +1,47 @@
+import time
+import urllib.error
+import urllib.request
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand
+
+
+def _get(url, timeout):
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            response.read()
+            ok = response.status < 400
+    except (urllib.error.URLError, OSError):
+        ok = False
+    return ok, time.perf_counter() - started
+
+
+class Command(BaseCommand):
+    help = (
+        'Fire concurrent GETs at one or more running servers and compare throughput, '
+        'e.g. `uvicorn api.asgi:application --port 8001` against `gunicorn api.wsgi --port 8000`.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('targets', nargs='+', help='Base URLs, e.g. http://127.0.0.1:8000')
+        parser.add_argument('--path', default='/api/dashboard/AAPL/')
+        parser.add_argument('--concurrency', type=int, default=100)
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--timeout', type=float, default=30)
+
+    def handle(self, *args, **options):
+        for target in options['targets']:
+            url = target.rstrip('/') + options['path']
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+                results = list(executor.map(lambda _: _get(url, options['timeout']), range(options['requests'])))
+            elapsed = time.perf_counter() - started
+
+            latencies = np.array([seconds for ok, seconds in results]) * 1000
+            failed = sum(not ok for ok, seconds in results)
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+            self.stdout.write(
+                f'{url}: {len(results) / elapsed:8.1f} req/s  p50 {p50:8.1f} ms  p95 {p95:8.1f} ms  '
+                f'p99 {p99:8.1f} ms  {failed} failed'
+            )
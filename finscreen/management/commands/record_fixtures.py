@@ -0,0 +1,29 @@
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from finscreen import replay
+
+
+class Command(BaseCommand):
+    help = (
+        'Record yfinance responses for the replay client (FINSCREEN_YFINANCE_CLIENT = "replay"), '
+        'or with --synthetic generate made-up fixtures that need no network.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('symbols', nargs='*')
+        parser.add_argument('--synthetic', type=int, default=0, metavar='N', help='Generate N synthetic symbols (SYN0000, ...).')
+        parser.add_argument('--chains', type=int, default=3, help='Option chains recorded per symbol.')
+        parser.add_argument('--output', default=settings.FINSCREEN_REPLAY_FIXTURES, type=Path)
+
+    def handle(self, *args, **options):
+        if not options['symbols'] and not options['synthetic']:
+            raise CommandError('Give symbols to record or --synthetic N.')
+        for symbol in options['symbols']:
+            saved = replay.record(symbol.upper(), options['output'], options['chains'])
+            self.stdout.write(f'{symbol.upper()}: recorded {len(saved)} fixtures')
+        for i in range(options['synthetic']):
+            replay.synthetic(f'SYN{i:04d}', options['output'])
+        if options['synthetic']:
+            self.stdout.write(f'Generated {options["synthetic"]} synthetic symbols')
+        self.stdout.write(f'Fixtures in {options["output"]}')
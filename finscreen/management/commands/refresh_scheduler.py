@@ -0,0 +1,50 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from finscreen import scheduler
+
+
+class Command(BaseCommand):
+    help = (
+        'Keep stored data fresh: every tick, refresh the most overdue and most read symbols '
+        'within an upstream call budget, then report data age percentiles.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--budget', type=float, default=settings.FINSCREEN_REFRESH_BUDGET, help='Upstream calls per minute.')
+        parser.add_argument('--tick', type=float, default=60, help='Seconds between scheduling rounds.')
+        parser.add_argument('--workers', type=int, default=settings.FINSCREEN_SCRAP_MAX_WORKERS)
+        parser.add_argument('--once', action='store_true', help='Run a single round and exit.')
+
+    def handle(self, *args, **options):
+        # Symbols that failed are left alone for one price cadence, so a bad
+        # symbol that keeps being read does not eat the budget every tick.
+        backoff = {}
+        while True:
+            started = time.monotonic()
+            backoff = {symbol: until for symbol, until in backoff.items() if until > started}
+            heap = scheduler.plan()
+            due = len(heap)
+            picked = scheduler.take(heap, int(options['budget'] * options['tick'] / 60), skip=backoff)
+            results = scheduler.refresh(picked, options['workers']) if picked else {}
+            failed = 0
+            for symbol, error in results.items():
+                if error:
+                    failed += 1
+                    backoff[symbol] = started + settings.FINSCREEN_REFRESH_CADENCES['price']
+            self.stdout.write(
+                f'{due} symbols due, refreshed {len(picked) - failed} ({failed} failed, '
+                f'{sum(scheduler.cost(sections) for symbol, sections in picked)} upstream calls) '
+                f'in {time.monotonic() - started:.2f}s'
+            )
+            for section, entry in scheduler.freshness().items():
+                if 'p50' not in entry:
+                    self.stdout.write(f'  {section:<14} no data ({entry["never"]} never refreshed)')
+                    continue
+                self.stdout.write(
+                    f'  {section:<14} age p50 {entry["p50"]}s  p90 {entry["p90"]}s  p99 {entry["p99"]}s  '
+                    f'{entry["within_cadence"]:.1%} within cadence, {entry["never"]} never refreshed'
+                )
+            if options['once']:
+                return
+            time.sleep(max(options['tick'] - (time.monotonic() - started), 0))
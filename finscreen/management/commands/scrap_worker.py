@@ -0,0 +1,30 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from finscreen import jobs
+
+
+class Command(BaseCommand):
+    help = 'Drain queued scrape jobs, fetching upstream in parallel and writing in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=settings.FINSCREEN_SCRAP_MAX_WORKERS)
+        parser.add_argument('--batch-size', type=int, default=settings.FINSCREEN_SCRAP_BATCH_SIZE)
+        parser.add_argument('--poll-interval', type=float, default=5.0)
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is empty.')
+
+    def handle(self, *args, **options):
+        while True:
+            items = jobs.claim(options['batch_size'])
+            if not items:
+                if options['once']:
+                    return
+                time.sleep(options['poll_interval'])
+                continue
+
+            started = time.perf_counter()
+            jobs.process(items, options['workers'])
+            failed = sum(1 for item in items if item.status == item.FAILED)
+            self.stdout.write(
+                f'Processed {len(items)} symbols ({failed} failed) in {time.perf_counter() - started:.2f}s'
+            )
@@ -0,0 +1,210 @@
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.utils.decorators import sync_and_async_middleware
+
+# Metrics live in process memory; with several worker processes each one
+# reports its own series, which Prometheus sums per instance.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250, 1000)
+
+_lock = threading.Lock()
+
+# Timings collected for the request being served, if any
+_current = ContextVar('finscreen_request_metrics', default=None)
+
+
+class Histogram:
+    def __init__(self, name, help, labels, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self.series = {}  # label values -> [bucket counts..., sum, count]
+
+    def observe(self, value, *label_values):
+        with _lock:
+            series = self.series.setdefault(label_values, [0] * len(self.buckets) + [0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with _lock:
+            series = {key: list(values) for key, values in self.series.items()}
+        for label_values, values in sorted(series.items()):
+            labels = list(zip(self.labels, label_values))
+            for bound, count in zip(self.buckets, values):
+                lines.append(f"{self.name}_bucket{_labels(labels + [('le', bound)])} {count}")
+            lines.append(f"{self.name}_bucket{_labels(labels + [('le', '+Inf')])} {values[-1]}")
+            lines.append(f'{self.name}_sum{_labels(labels)} {values[-2]}')
+            lines.append(f'{self.name}_count{_labels(labels)} {values[-1]}')
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help, labels):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.series = {}
+
+    def inc(self, *label_values, amount=1):
+        with _lock:
+            self.series[label_values] = self.series.get(label_values, 0) + amount
+
+    def values(self):
+        with _lock:
+            return dict(self.series)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        for label_values, value in sorted(self.values().items()):
+            lines.append(f'{self.name}{_labels(list(zip(self.labels, label_values)))} {value}')
+        return lines
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(pairs):
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+request_seconds = Histogram(
+    'finscreen_request_duration_seconds', 'Request latency by route.', ['route', 'method', 'status']
+)
+request_queries = Histogram(
+    'finscreen_request_db_queries', 'ORM queries per request by route.', ['route'], QUERY_BUCKETS
+)
+request_db_seconds = Histogram(
+    'finscreen_request_db_seconds', 'Time spent in ORM queries per request by route.', ['route']
+)
+upstream_seconds = Histogram(
+    'finscreen_upstream_duration_seconds', 'Upstream call latency by yfinance attribute.', ['attribute', 'outcome']
+)
+span_seconds = Histogram('finscreen_span_duration_seconds', 'Time spent in instrumented code blocks.', ['span'])
+cache_lookups = Counter('finscreen_cache_lookups_total', 'Upstream cache lookups by endpoint and status.', ['endpoint', 'status'])
+
+
+def _add(name, seconds):
+    timings = _current.get()
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + seconds
+
+
+def observe_upstream(attribute, seconds, outcome):
+    upstream_seconds.observe(seconds, attribute, outcome)
+    _add('upstream', seconds)
+
+
+def observe_cache(endpoint, status):
+    cache_lookups.inc(endpoint, status)
+
+
+@contextmanager
+def span(name):
+    """Time a block of code; it shows up in the span histogram and Server-Timing."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - started
+        span_seconds.observe(seconds, name)
+        _add(name, seconds)
+
+
+def _query_wrapper(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings['db'] = timings.get('db', 0.0) + time.perf_counter() - started
+        timings['db_queries'] = timings.get('db_queries', 0) + 1
+
+
+def install_query_wrapper(sender, connection, **kwargs):
+    """connection_created receiver; counts queries on every thread's connection, async views included."""
+    if _query_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_query_wrapper)
+
+
+def _start():
+    return _current.set({}), time.perf_counter()
+
+
+def _finish(request, response, token, started):
+    total = time.perf_counter() - started
+    timings = _current.get()
+    _current.reset(token)
+
+    match = getattr(request, 'resolver_match', None)
+    route = match.route if match else 'unmatched'
+    queries = timings.pop('db_queries', 0)
+    request_seconds.observe(total, route, request.method, response.status_code)
+    request_queries.observe(queries, route)
+    request_db_seconds.observe(timings.get('db', 0.0), route)
+
+    entries = [f'total;dur={total * 1000:.1f}']
+    for name, seconds in timings.items():
+        entry = f'{name};dur={seconds * 1000:.1f}'
+        if name == 'db':
+            entry += f';desc="{queries} queries"'
+        entries.append(entry)
+    response['Server-Timing'] = ', '.join(entries)
+    return response
+
+
+@sync_and_async_middleware
+def MetricsMiddleware(get_response):
+    if asyncio.iscoroutinefunction(get_response):
+        async def middleware(request):
+            token, started = _start()
+            response = await get_response(request)
+            return _finish(request, response, token, started)
+    else:
+        def middleware(request):
+            token, started = _start()
+            response = get_response(request)
+            return _finish(request, response, token, started)
+    return middleware
+
+
+def render(cache_stats, upstream_stats):
+    """Prometheus text exposition of every metric plus the cache and upstream counters."""
+    lines = []
+    for metric in [request_seconds, request_queries, request_db_seconds, upstream_seconds, span_seconds, cache_lookups]:
+        lines.extend(metric.render())
+
+    lookups = {}
+    for (endpoint, status), count in cache_lookups.values().items():
+        hits, total = lookups.get(endpoint, (0, 0))
+        lookups[endpoint] = (hits + count * (status in ('HIT', 'COALESCED')), total + count)
+    lines += ['# HELP finscreen_cache_hit_ratio Share of cache lookups served without an upstream call.',
+              '# TYPE finscreen_cache_hit_ratio gauge']
+    lines += [f'finscreen_cache_hit_ratio{_labels([("endpoint", endpoint)])} {hits / total}' for endpoint, (hits, total) in sorted(lookups.items())]
+
+    lines += ['# HELP finscreen_cache_events_total Upstream cache and single-flight counters.',
+              '# TYPE finscreen_cache_events_total counter']
+    lines += [f'finscreen_cache_events_total{_labels([("event", name)])} {value}' for name, value in sorted(cache_stats.items())]
+
+    breakers = upstream_stats.pop('breakers', {})
+    lines += ['# HELP finscreen_upstream_events_total Upstream client counters.',
+              '# TYPE finscreen_upstream_events_total counter']
+    lines += [f'finscreen_upstream_events_total{_labels([("event", name)])} {value}' for name, value in sorted(upstream_stats.items())]
+    lines += ['# HELP finscreen_upstream_circuit_open Whether a host circuit breaker is open (half-open counts as open).',
+              '# TYPE finscreen_upstream_circuit_open gauge']
+    lines += [f'finscreen_upstream_circuit_open{_labels([("host", host)])} {int(state != "closed")}' for host, state in sorted(breakers.items())]
+    return '\n'.join(lines) + '\n'
@@ -3,14 +3,14 @@ from django.db import models
 # 1. Sector Table
 class Sector(models.Model):
     id = models.AutoField(primary_key=True)
-    sector_name = models.CharField(max_length=255)
+    sector_name = models.CharField(max_length=255, unique=True)
     class Meta:
         db_table = 'sector'
 
 # 2. Industry Table
 class Industry(models.Model):
     id = models.AutoField(primary_key=True)
-    industry_name = models.CharField(max_length=255)
+    industry_name = models.CharField(max_length=255, unique=True)
     class Meta:
         db_table = 'industry'
 
@@ -18,7 +18,7 @@ class Industry(models.Model):
 # 3. Exchange Table
 class Exchange(models.Model):
     id = models.AutoField(primary_key=True)
-    exchange_name = models.CharField(max_length=255)
+    exchange_name = models.CharField(max_length=255, unique=True)
     class Meta:
         db_table = 'exchange'
 
@@ -26,7 +26,7 @@ class Exchange(models.Model):
 # 4. Currency Table
 class Currency(models.Model):
     id = models.AutoField(primary_key=True)
-    currency_code = models.CharField(max_length=10)
+    currency_code = models.CharField(max_length=10, unique=True)
     currency_name = models.CharField(max_length=100, null=True, blank=True)
     class Meta:
         db_table = 'currency'
@@ -36,7 +36,7 @@ class Currency(models.Model):
 class Company(models.Model):
     id = models.AutoField(primary_key=True)
     name = models.CharField(max_length=255)
-    symbol = models.CharField(max_length=50, null=True, blank=True)
+    symbol = models.CharField(max_length=50, null=True, blank=True, unique=True)
     short_name = models.CharField(max_length=255, null=True, blank=True)
     long_name = models.CharField(max_length=255, null=True, blank=True)
     sector = models.ForeignKey(Sector, on_delete=models.SET_NULL, null=True)
@@ -45,6 +45,9 @@ class Company(models.Model):
     total_employees = models.IntegerField(null=True, blank=True)
     exchange = models.ForeignKey(Exchange, on_delete=models.SET_NULL, null=True)
     currency = models.ForeignKey(Currency, on_delete=models.SET_NULL, null=True)
+    last_refreshed = models.DateTimeField(null=True, blank=True)  # Last successful scrape
+    statements_refreshed = models.DateTimeField(null=True, blank=True)
+    history_adjusted_to = models.DateField(null=True, blank=True)  # Latest split or dividend historical_data is adjusted for
     class Meta:
         db_table = 'company'
 
@@ -52,7 +55,7 @@ class Company(models.Model):
 # 6. Address Table
 class Address(models.Model):
     id = models.AutoField(primary_key=True)
-    company = models.ForeignKey(Company, on_delete=models.CASCADE)
+    company = models.OneToOneField(Company, on_delete=models.CASCADE)
     address1 = models.CharField(max_length=255, null=True, blank=True)
     address2 = models.CharField(max_length=255, null=True, blank=True)
     city = models.CharField(max_length=100, null=True, blank=True)
@@ -76,12 +79,15 @@ class Officer(models.Model):
     year_born = models.IntegerField(null=True, blank=True)  # YEAR type stored as Integer
     class Meta:
         db_table = 'officer'
+        constraints = [
+            models.UniqueConstraint(fields=['company', 'name'], name='officer_company_name_uniq'),
+        ]
 
 
 # 8. Officer Compensation Table
 class OfficerCompensation(models.Model):
     id = models.AutoField(primary_key=True)
-    officer = models.ForeignKey(Officer, on_delete=models.CASCADE)
+    officer = models.OneToOneField(Officer, on_delete=models.CASCADE)
     total_pay = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
     exercised_value = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
     unexercised_value = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
@@ -92,7 +98,7 @@ class OfficerCompensation(models.Model):
 # 9. Company Financials Table
 class CompanyFinancials(models.Model):
     id = models.AutoField(primary_key=True)
-    company = models.ForeignKey(Company, on_delete=models.CASCADE)
+    company = models.OneToOneField(Company, on_delete=models.CASCADE)
     currency = models.ForeignKey(Currency, on_delete=models.SET_NULL, null=True)
     market_cap = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
     enterprise_value = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
@@ -112,12 +118,16 @@ class CompanyFinancials(models.Model):
     operating_cashflow = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
     class Meta:
         db_table = 'company_financials'
+        indexes = [
+            models.Index(fields=['market_cap'], name='financials_market_cap_idx'),
+            models.Index(fields=['debt_to_equity_ratio'], name='financials_debt_equity_idx'),
+        ]
 
 
 # 10. Dividend Table
 class Dividend(models.Model):
     id = models.AutoField(primary_key=True)
-    company = models.ForeignKey(Company, on_delete=models.CASCADE)
+    company = models.OneToOneField(Company, on_delete=models.CASCADE)
     dividend_rate = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
     dividend_yield = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
     payout_ratio = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
@@ -127,13 +137,14 @@ class Dividend(models.Model):
     trailing_annual_dividend_yield = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
     class Meta:
         db_table = 'dividend'
+        indexes = [
+            models.Index(fields=['dividend_yield'], name='dividend_yield_idx'),
+        ]
 
 
 # 11. Stock Price Table
-class StockPrice(models.Model):
-    id = models.AutoField(primary_key=True)
-    company = models.ForeignKey(Company, on_delete=models.CASCADE)
-    date = models.DateField(auto_now_add=True)
+# Quote fields shared by StockPrice and LatestStockPrice
+class StockQuote(models.Model):
     previous_close = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
     open = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
     day_low = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
@@ -145,14 +156,34 @@ class StockPrice(models.Model):
     two_hundred_day_avg = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
     volume = models.BigIntegerField(null=True, blank=True)
     average_volume = models.BigIntegerField(null=True, blank=True)
+    class Meta:
+        abstract = True
+
+
+# Append-only daily snapshots, partitioned by month in Postgres (see ddl.sql)
+class StockPrice(StockQuote):
+    id = models.AutoField(primary_key=True)
+    company = models.ForeignKey(Company, on_delete=models.CASCADE)
+    date = models.DateField(auto_now_add=True)
     class Meta:
         db_table = 'stock_price'
+        constraints = [
+            models.UniqueConstraint(fields=['company', 'date'], name='stock_price_company_date_uniq'),
+        ]
+
+
+# Each company's newest StockPrice snapshot, written alongside it
+class LatestStockPrice(StockQuote):
+    company = models.OneToOneField(Company, on_delete=models.CASCADE, primary_key=True)
+    date = models.DateField()
+    class Meta:
+        db_table = 'latest_stock_price'
 
 
 # 12. Risk Metrics Table
 class RiskMetrics(models.Model):
     id = models.AutoField(primary_key=True)
-    company = models.ForeignKey(Company, on_delete=models.CASCADE)
+    company = models.OneToOneField(Company, on_delete=models.CASCADE)
     audit_risk = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
     board_risk = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
     compensation_risk = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
@@ -178,6 +209,9 @@ class PerformanceMetrics(models.Model):
     enterprise_value_to_ebitda = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
     class Meta:
         db_table = 'performance_metrics'
+        indexes = [
+            models.Index(fields=['company', '-date'], name='perf_metrics_company_date_idx'),
+        ]
 
 class AnalystOpinion(models.Model):
     id = models.AutoField(primary_key=True)
@@ -209,6 +243,12 @@ class FundamentalIndicator(models.Model):
     inventory_turnover = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
     class Meta:
         db_table = 'fundamental_indicator'
+        constraints = [
+            models.UniqueConstraint(fields=['company', 'date'], name='fundamental_indicator_company_date_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['company', '-date'], name='fund_ind_company_date_idx'),
+        ]
 
 class GrowthMetric(models.Model):
     id = models.AutoField(primary_key=True)
@@ -221,10 +261,26 @@ class GrowthMetric(models.Model):
     book_value_growth = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
     class Meta:
         db_table = 'growth_metric'
+        constraints = [
+            models.UniqueConstraint(fields=['company', 'date'], name='growth_metric_company_date_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['company', '-date'], name='growth_metric_company_date_idx'),
+        ]
+
+# Financial statements, one row per company, period end and frequency
+class FinancialStatement(models.Model):
+    ANNUAL = 'annual'
+    QUARTERLY = 'quarterly'
 
-class BalanceSheet(models.Model):
     company = models.ForeignKey(Company, on_delete=models.CASCADE)
     date = models.DateField()
+    frequency = models.CharField(max_length=10, default=ANNUAL)
+    class Meta:
+        abstract = True
+
+
+class BalanceSheet(FinancialStatement):
     cash_and_cash_equivalents = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
     short_term_investments = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
     net_receivables = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
@@ -239,7 +295,41 @@ class BalanceSheet(models.Model):
 
     class Meta:
         db_table = "balance_sheet"
-        
+        constraints = [
+            models.UniqueConstraint(fields=['company', 'date', 'frequency'], name='balance_sheet_company_date_uniq'),
+        ]
+
+
+class IncomeStatement(FinancialStatement):
+    revenue = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
+    cost_of_revenue = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
+    gross_profit = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
+    operating_expense = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
+    operating_income = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
+    ebitda = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
+    net_income = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
+    diluted_eps = models.DecimalField(max_digits=10, decimal_places=4, null=True, blank=True)
+
+    class Meta:
+        db_table = "income_statement"
+        constraints = [
+            models.UniqueConstraint(fields=['company', 'date', 'frequency'], name='income_statement_company_date_uniq'),
+        ]
+
+
+class CashFlowStatement(FinancialStatement):
+    net_cash_from_operating_activities = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
+    net_cash_used_for_investing_activities = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
+    net_cash_from_financing_activities = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
+    free_cash_flow = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
+    dividends_paid = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
+
+    class Meta:
+        db_table = "cash_flow_statement"
+        constraints = [
+            models.UniqueConstraint(fields=['company', 'date', 'frequency'], name='cash_flow_statement_company_date_uniq'),
+        ]
+
 class EsgScore(models.Model):
     company = models.ForeignKey('Company', on_delete=models.CASCADE, related_name='esg_scores')
     environmental_score = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
@@ -252,3 +342,93 @@ class EsgScore(models.Model):
 
     class Meta:
         db_table = 'esg_score'
+
+
+# Daily OHLCV, partitioned by month in Postgres (see ddl.sql)
+class HistoricalData(models.Model):
+    id = models.AutoField(primary_key=True)
+    company = models.ForeignKey(Company, on_delete=models.CASCADE)
+    date = models.DateField()
+    open = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
+    high = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
+    low = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
+    close = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
+    volume = models.BigIntegerField(null=True, blank=True)
+    class Meta:
+        db_table = 'historical_data'
+        constraints = [
+            models.UniqueConstraint(fields=['company', 'date'], name='historical_data_company_date_uniq'),
+        ]
+
+
+# Date ranges (inclusive) already fetched into historical_data, so days
+# without bars (weekends, holidays) are not fetched again.
+class HistoricalDataRange(models.Model):
+    id = models.AutoField(primary_key=True)
+    company = models.ForeignKey(Company, on_delete=models.CASCADE)
+    start_date = models.DateField()
+    end_date = models.DateField()
+    class Meta:
+        db_table = 'historical_data_range'
+
+
+# Digest of each normalized scrape section last written for a company, so
+# unchanged sections are not rewritten.
+class SectionFingerprint(models.Model):
+    id = models.AutoField(primary_key=True)
+    company = models.ForeignKey(Company, on_delete=models.CASCADE)
+    section = models.CharField(max_length=50)
+    digest = models.CharField(max_length=64)
+    updated_at = models.DateTimeField(auto_now=True)
+    class Meta:
+        db_table = 'section_fingerprint'
+        constraints = [
+            models.UniqueConstraint(fields=['company', 'section'], name='section_fingerprint_uniq'),
+        ]
+
+
+# Decayed count of reads per symbol, flushed from each process by
+# finscreen.demand and used to prioritise scheduled refreshes.
+class SymbolDemand(models.Model):
+    id = models.AutoField(primary_key=True)
+    symbol = models.CharField(max_length=50, unique=True)
+    score = models.FloatField(default=0)
+    updated_at = models.DateTimeField()
+    class Meta:
+        db_table = 'symbol_demand'
+
+
+# Scrape Job Tables
+class ScrapJob(models.Model):
+    id = models.AutoField(primary_key=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    class Meta:
+        db_table = 'scrap_job'
+
+
+class ScrapJobItem(models.Model):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    id = models.AutoField(primary_key=True)
+    job = models.ForeignKey(ScrapJob, on_delete=models.CASCADE, related_name='items')
+    symbol = models.CharField(max_length=50)
+    status = models.CharField(max_length=20, default=PENDING)
+    attempts = models.IntegerField(default=0)
+    error = models.TextField(null=True, blank=True)
+    fetch_ms = models.FloatField(null=True, blank=True)
+    write_ms = models.FloatField(null=True, blank=True)
+    sections_written = models.IntegerField(null=True, blank=True)
+    sections_skipped = models.IntegerField(null=True, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    class Meta:
+        db_table = 'scrap_job_item'
+        constraints = [
+            models.UniqueConstraint(fields=['job', 'symbol'], name='scrap_job_item_job_symbol_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'locked_at'], name='scrap_job_item_status_idx'),
+        ]
@@ -0,0 +1,289 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time as dtime
+from zoneinfo import ZoneInfo
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+from . import cache
+from .upstream import yf
+
+# Black-Scholes-Merton with a continuous dividend yield, evaluated on whole
+# chains at once. Greeks are per share: vega per volatility point, theta per
+# calendar day.
+
+MIN_VOL = 1e-4
+MAX_VOL = 5.0
+# Newton stops once the price is this close or the step this small
+PRICE_TOLERANCE = 1e-8
+VOL_TOLERANCE = 1e-6
+NEWTON_STEPS = 20
+BISECTION_STEPS = 60
+
+_SQRT_2PI = np.sqrt(2 * np.pi)
+
+
+def norm_pdf(x):
+    return np.exp(-0.5 * x * x) / _SQRT_2PI
+
+
+def norm_cdf(x):
+    # Abramowitz & Stegun 26.2.17, absolute error below 7.5e-8
+    x = np.asarray(x, dtype=float)
+    t = 1 / (1 + 0.2316419 * np.abs(x))
+    poly = t * (0.319381530 + t * (-0.356563782 + t * (1.781477937 + t * (-1.821255978 + t * 1.330274429))))
+    upper = norm_pdf(x) * poly
+    return np.where(x >= 0, 1 - upper, upper)
+
+
+def _d1_d2(spot, strike, years, rate, dividend_yield, vol):
+    root = vol * np.sqrt(years)
+    d1 = (np.log(spot / strike) + (rate - dividend_yield + 0.5 * vol * vol) * years) / root
+    return d1, d1 - root
+
+
+def price(spot, strike, years, rate, dividend_yield, vol, is_call):
+    d1, d2 = _d1_d2(spot, strike, years, rate, dividend_yield, vol)
+    spot_pv = spot * np.exp(-dividend_yield * years)
+    strike_pv = strike * np.exp(-rate * years)
+    call = spot_pv * norm_cdf(d1) - strike_pv * norm_cdf(d2)
+    return np.where(is_call, call, call - spot_pv + strike_pv)
+
+
+def _vega(spot, strike, years, rate, dividend_yield, vol):
+    d1, _ = _d1_d2(spot, strike, years, rate, dividend_yield, vol)
+    return spot * np.exp(-dividend_yield * years) * norm_pdf(d1) * np.sqrt(years)
+
+
+def implied_volatility(premium, spot, strike, years, rate, dividend_yield, is_call):
+    """
+    Solve for volatility across a whole array of contracts.
+
+    Newton steps run on every contract together; contracts that leave the
+    bracket, stall on a flat vega or do not converge are finished by
+    vectorized bisection. Premiums outside the no-arbitrage bounds give NaN.
+    """
+    premium, strike, years, is_call = np.broadcast_arrays(
+        np.asarray(premium, float), np.asarray(strike, float), np.asarray(years, float), np.asarray(is_call, bool)
+    )
+    shape = premium.shape
+    premium, strike, years, is_call = (array.ravel() for array in (premium, strike, years, is_call))
+    spot_pv = spot * np.exp(-dividend_yield * years)
+    strike_pv = strike * np.exp(-rate * years)
+    lower = np.where(is_call, np.maximum(spot_pv - strike_pv, 0), np.maximum(strike_pv - spot_pv, 0))
+    upper = np.where(is_call, spot_pv, strike_pv)
+    valid = np.isfinite(premium) & (years > 0) & (premium > lower) & (premium < upper)
+
+    # Brenner-Subrahmanyam starting point
+    with np.errstate(divide='ignore', invalid='ignore'):
+        vol = np.clip(np.sqrt(2 * np.pi / years) * premium / spot, 0.05, 2.0)
+    vol = np.where(valid, vol, np.nan)
+    done = ~valid
+    for _ in range(NEWTON_STEPS):
+        active = ~done
+        if not active.any():
+            break
+        args = (spot, strike[active], years[active], rate, dividend_yield, vol[active])
+        diff = price(*args, is_call[active]) - premium[active]
+        vega = _vega(*args)
+        with np.errstate(divide='ignore', over='ignore', invalid='ignore'):
+            change = diff / vega
+        step = vol[active] - change
+        converged = (np.abs(diff) < PRICE_TOLERANCE) | (np.abs(change) < VOL_TOLERANCE)
+        stalled = ~converged & ((vega < 1e-8) | ~np.isfinite(step) | (step <= MIN_VOL) | (step >= MAX_VOL))
+        index = np.flatnonzero(active)
+        vol[index[~converged & ~stalled]] = step[~converged & ~stalled]
+        done[index[converged]] = True
+        # Left for bisection
+        done[index[stalled]] = True
+        vol[index[stalled]] = np.nan
+
+    unsolved = valid & (np.isnan(vol) | ~done)
+    if unsolved.any():
+        index = np.flatnonzero(unsolved)
+        low = np.full(len(index), MIN_VOL)
+        high = np.full(len(index), MAX_VOL)
+        for _ in range(BISECTION_STEPS):
+            middle = (low + high) / 2
+            above = price(spot, strike[index], years[index], rate, dividend_yield, middle, is_call[index]) > premium[index]
+            high = np.where(above, middle, high)
+            low = np.where(above, low, middle)
+        vol[index] = (low + high) / 2
+    return vol.reshape(shape)
+
+
+def greeks(spot, strike, years, rate, dividend_yield, vol, is_call):
+    d1, d2 = _d1_d2(spot, strike, years, rate, dividend_yield, vol)
+    carry = np.exp(-dividend_yield * years)
+    discount = np.exp(-rate * years)
+    pdf = norm_pdf(d1)
+    root = np.sqrt(years)
+    decay = -spot * carry * pdf * vol / (2 * root)
+    call_theta = decay - rate * strike * discount * norm_cdf(d2) + dividend_yield * spot * carry * norm_cdf(d1)
+    put_theta = decay + rate * strike * discount * norm_cdf(-d2) - dividend_yield * spot * carry * norm_cdf(-d1)
+    return {
+        'delta': np.where(is_call, carry * norm_cdf(d1), -carry * norm_cdf(-d1)),
+        'gamma': carry * pdf / (spot * vol * root),
+        'vega': spot * carry * pdf * root / 100,
+        'theta': np.where(is_call, call_theta, put_theta) / 365,
+    }
+
+
+def years_to(expiration, now):
+    """Years from `now` until the close of trading on the expiration date."""
+    close = datetime.combine(
+        date.fromisoformat(expiration), dtime.fromisoformat(settings.FINSCREEN_MARKET_CLOSE),
+        ZoneInfo(settings.FINSCREEN_MARKET_TIMEZONE),
+    )
+    return (close - now).total_seconds() / (365 * 24 * 3600)
+
+
+def load_chain(symbol, expiration):
+    # yfinance returns a namedtuple built on the fly, which can't be pickled
+    options = yf.Ticker(symbol).option_chain(expiration)
+    return {'calls': options.calls, 'puts': options.puts}
+
+
+def _premium(frame):
+    # Mid quote when there is a two-sided market, else the last trade
+    bid, ask = frame['bid'].to_numpy(float), frame['ask'].to_numpy(float)
+    mid = (bid + ask) / 2
+    return np.where((bid > 0) & (ask > 0) & (ask >= bid), mid, frame['lastPrice'].to_numpy(float))
+
+
+def max_pain(strikes, call_open_interest, put_open_interest):
+    """The settlement strike that minimizes the total payout to option holders."""
+    if not len(strikes):
+        return None
+    settle = strikes[:, None]
+    payout = (
+        (np.maximum(settle - strikes, 0) * call_open_interest).sum(axis=1)
+        + (np.maximum(strikes - settle, 0) * put_open_interest).sum(axis=1)
+    )
+    return float(strikes[np.argmin(payout)])
+
+
+def _nearest_iv(contracts, target_delta):
+    candidates = contracts[contracts['iv'].notna()]
+    if candidates.empty:
+        return None
+    return float(candidates.loc[(candidates['delta'] - target_delta).abs().idxmin(), 'iv'])
+
+
+def analyze_expiration(chain, spot, expiration, rate, dividend_yield, now):
+    """IV and Greeks for every contract of one expiration, with its smile, skew and max pain."""
+    frames = []
+    for side, is_call in [('calls', True), ('puts', False)]:
+        frame = chain[side]
+        frames.append(pd.DataFrame({
+            'contract': frame['contractSymbol'].to_numpy(),
+            'type': 'call' if is_call else 'put',
+            'strike': frame['strike'].to_numpy(float),
+            'premium': _premium(frame),
+            'volume': frame['volume'].to_numpy(float) if 'volume' in frame else np.nan,
+            'open_interest': frame['openInterest'].fillna(0).to_numpy(float) if 'openInterest' in frame else 0.0,
+            'is_call': is_call,
+        }))
+    contracts = pd.concat(frames, ignore_index=True)
+    years = years_to(expiration, now)
+    strike = contracts['strike'].to_numpy()
+    is_call = contracts['is_call'].to_numpy()
+    with np.errstate(divide='ignore', over='ignore', invalid='ignore'):
+        iv = implied_volatility(contracts['premium'].to_numpy(), spot, strike, years, rate, dividend_yield, is_call)
+        contracts['iv'] = iv
+        for name, values in greeks(spot, strike, years, rate, dividend_yield, iv, is_call).items():
+            contracts[name] = values
+
+    # Smile from out-of-the-money contracts: puts below spot, calls at and above
+    otm = contracts[(contracts['is_call'] & (contracts['strike'] >= spot)) | (~contracts['is_call'] & (contracts['strike'] < spot))]
+    otm = otm[otm['iv'].notna()].sort_values('strike')
+    atm_iv = float(np.interp(spot, otm['strike'], otm['iv'])) if len(otm) else None
+    calls, puts = contracts[contracts['is_call']], contracts[~contracts['is_call']]
+    call_25d, put_25d = _nearest_iv(calls, 0.25), _nearest_iv(puts, -0.25)
+
+    oi = contracts.groupby(['strike', 'is_call'])['open_interest'].sum().unstack(fill_value=0.0)
+    oi = oi.reindex(columns=[True, False], fill_value=0.0)
+    return {
+        'expiration': expiration,
+        'days': round(years * 365, 2),
+        'atm_iv': atm_iv,
+        'call_25d_iv': call_25d,
+        'put_25d_iv': put_25d,
+        # Positive when downside protection is bid over upside
+        'skew_25d': put_25d - call_25d if call_25d is not None and put_25d is not None else None,
+        'put_call_oi_ratio': float(puts['open_interest'].sum() / calls['open_interest'].sum()) if calls['open_interest'].sum() else None,
+        'max_pain': max_pain(oi.index.to_numpy(float), oi[True].to_numpy(), oi[False].to_numpy()),
+        'smile': {'strike': otm['strike'].tolist(), 'iv': otm['iv'].tolist()},
+        'contracts': contracts.drop(columns=['is_call']),
+    }
+
+
+def _dividend_yield(info, spot):
+    # dividendYield switched from a fraction to percent between yfinance
+    # releases, so use the fields whose units have not changed.
+    if info.get('dividendRate'):
+        return float(info['dividendRate']) / spot
+    return float(info.get('trailingAnnualDividendYield') or 0)
+
+
+def _spot(symbol):
+    info = cache.fetch('info', symbol, lambda: yf.Ticker(symbol).info).value
+    for key in ['currentPrice', 'regularMarketPrice', 'previousClose']:
+        if info.get(key):
+            spot = float(info[key])
+            return spot, _dividend_yield(info, spot)
+    raise LookupError(f'No price available for {symbol}.')
+
+
+def analyze(symbol, max_expirations=None):
+    """
+    Analytics for every listed expiration of `symbol`.
+
+    Each expiration's result is cached for FINSCREEN_OPTION_ANALYTICS_TTL
+    seconds; the chains that are not are fetched concurrently.
+    """
+    expirations = list(cache.fetch('options', symbol, lambda: yf.Ticker(symbol).options).value)
+    expirations = expirations[:max_expirations or settings.FINSCREEN_OPTION_MAX_EXPIRATIONS]
+    spot, dividend_yield = _spot(symbol)
+    rate = settings.FINSCREEN_RISK_FREE_RATE
+    now = timezone.now()
+
+    store = caches['default']
+    keys = {expiration: f'option_analytics:{symbol.upper()}:{expiration}' for expiration in expirations}
+    cached = store.get_many(list(keys.values()))
+    results = {expiration: cached[key] for expiration, key in keys.items() if key in cached}
+    missing = [expiration for expiration in expirations if expiration not in results]
+
+    def compute(expiration):
+        chain = cache.fetch('option_chain', symbol, lambda: load_chain(symbol, expiration), expiration=expiration).value
+        return analyze_expiration(chain, spot, expiration, rate, dividend_yield, now)
+
+    errors = {}
+    if missing:
+        with ThreadPoolExecutor(max_workers=min(settings.FINSCREEN_OPTION_FETCH_WORKERS, len(missing))) as executor:
+            futures = {expiration: executor.submit(compute, expiration) for expiration in missing}
+        computed = {}
+        for expiration, future in futures.items():
+            try:
+                computed[expiration] = future.result()
+            except Exception as e:
+                errors[expiration] = str(e)
+        store.set_many({keys[expiration]: result for expiration, result in computed.items()}, settings.FINSCREEN_OPTION_ANALYTICS_TTL)
+        results.update(computed)
+
+    ordered = [results[expiration] for expiration in expirations if expiration in results]
+    return {
+        'symbol': symbol,
+        'spot': spot,
+        'rate': rate,
+        'dividend_yield': dividend_yield,
+        'expirations': ordered,
+        'surface': {
+            'expiration': [result['expiration'] for result in ordered for _ in result['smile']['strike']],
+            'days': [result['days'] for result in ordered for _ in result['smile']['strike']],
+            'strike': [strike for result in ordered for strike in result['smile']['strike']],
+            'iv': [iv for result in ordered for iv in result['smile']['iv']],
+        },
+        'errors': errors,
+    }
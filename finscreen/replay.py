@@ -0,0 +1,323 @@
+import pickle
+import random
+import time
+import zlib
+from collections import namedtuple
+from datetime import date
+from functools import lru_cache
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from .history import PERIOD_OFFSETS
+
+# Offline stand-in for the part of yfinance the project uses, serving fixtures
+# recorded by `manage.py record_fixtures` with synthetic latency. Select it
+# with FINSCREEN_YFINANCE_CLIENT = 'replay'.
+#
+# Fixtures are pickles under <FINSCREEN_REPLAY_FIXTURES>/<SYMBOL>/:
+#   <attribute>.pkl            info, balance_sheet, calendar, ...
+#   history.pkl                daily bars for the longest period available
+#   options.pkl                expiration dates
+#   option_chain-<date>.pkl    {'calls': DataFrame, 'puts': DataFrame}
+#   recorded_on.pkl            date the fixture was taken
+# Symbols without fixtures of their own are served a recorded symbol's data.
+
+ATTRIBUTES = [
+    'info', 'balance_sheet', 'quarterly_balance_sheet', 'income_stmt', 'quarterly_income_stmt', 'cashflow',
+    'quarterly_cashflow', 'financials', 'quarterly_financials', 'earnings', 'quarterly_earnings',
+    'actions', 'dividends', 'splits', 'sustainability', 'recommendations', 'major_holders',
+    'institutional_holders', 'calendar', 'isin', 'news',
+]
+
+Options = namedtuple('Options', ['calls', 'puts', 'underlying'])
+
+RESAMPLE_RULES = {'5d': '5B', '1wk': 'W-FRI', '1mo': 'ME', '3mo': 'QE'}
+
+
+def _save(directory, name, value):
+    with open(directory / f'{name}.pkl', 'wb') as f:
+        pickle.dump(value, f, pickle.HIGHEST_PROTOCOL)
+
+
+def record(symbol, directory, chains=3):
+    """Record a live symbol's fixtures, returning the names saved."""
+    import yfinance
+    directory = Path(directory) / symbol.upper()
+    directory.mkdir(parents=True, exist_ok=True)
+    ticker = yfinance.Ticker(symbol)
+    saved = []
+    for name in ATTRIBUTES:
+        try:
+            _save(directory, name, getattr(ticker, name))
+            saved.append(name)
+        except Exception:
+            continue
+    _save(directory, 'history', ticker.history(period='max', interval='1d'))
+    expirations = tuple(ticker.options)
+    _save(directory, 'options', expirations)
+    for expiration in expirations[:chains]:
+        chain = ticker.option_chain(expiration)
+        _save(directory, f'option_chain-{expiration}', {'calls': chain.calls, 'puts': chain.puts})
+    _save(directory, 'recorded_on', date.today())
+    return saved + ['history', 'options', 'recorded_on']
+
+
+def _third_friday(year, month):
+    first = date(year, month, 1)
+    return first + pd.Timedelta(days=(4 - first.weekday()) % 7 + 14)
+
+
+def synthetic(symbol, directory, seed=None):
+    """Write deterministic made-up fixtures for `symbol` so benchmarks run with nothing recorded."""
+    rng = np.random.default_rng(zlib.crc32(symbol.encode()) if seed is None else seed)
+    directory = Path(directory) / symbol.upper()
+    directory.mkdir(parents=True, exist_ok=True)
+
+    days = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=5 * 252, name='Date').tz_localize('America/New_York')
+    close = 20 + 80 * rng.random() * np.exp(np.cumsum(rng.normal(0.0003, 0.02, len(days))))
+    open_ = close * (1 + rng.normal(0, 0.005, len(days)))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.01, len(days))))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.01, len(days))))
+    volume = rng.integers(100_000, 10_000_000, len(days))
+    dividends = np.where(np.arange(len(days)) % 63 == 62, round(close[-1] * 0.005, 2), 0.0)
+    history = pd.DataFrame({
+        'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Volume': volume,
+        'Dividends': dividends, 'Stock Splits': 0.0,
+    }, index=days)
+
+    price = float(close[-1])
+    shares = int(rng.integers(50, 5000)) * 1_000_000
+    revenue = float(rng.uniform(0.2, 3)) * price * shares
+    info = {
+        'symbol': symbol, 'longName': f'{symbol} Holdings Inc.', 'shortName': symbol,
+        'sector': rng.choice(['Technology', 'Healthcare', 'Financial Services', 'Energy', 'Industrials', 'Consumer Cyclical']),
+        'industry': rng.choice(['Software', 'Biotechnology', 'Banks', 'Oil & Gas', 'Machinery', 'Retail']),
+        'exchange': 'NMS', 'currency': 'USD', 'fullTimeEmployees': int(rng.integers(100, 200_000)),
+        'address1': f'{int(rng.integers(1, 999))} Market Street', 'city': 'Springfield', 'zip': '12345',
+        'country': 'United States', 'phone': '555-0100', 'website': f'https://{symbol.lower()}.example.com',
+        'previousClose': float(close[-2]), 'open': float(open_[-1]), 'dayLow': float(low[-1]), 'dayHigh': float(high[-1]),
+        'currentPrice': price, 'fiftyTwoWeekLow': float(low[-252:].min()), 'fiftyTwoWeekHigh': float(high[-252:].max()),
+        'fiftyDayAverage': float(close[-50:].mean()), 'twoHundredDayAverage': float(close[-200:].mean()),
+        'volume': int(volume[-1]), 'averageVolume': int(volume[-60:].mean()),
+        'marketCap': price * shares, 'enterpriseValue': price * shares * float(rng.uniform(0.9, 1.3)),
+        'totalCash': revenue * float(rng.uniform(0.05, 0.5)), 'totalDebt': revenue * float(rng.uniform(0, 1)),
+        'totalRevenue': revenue, 'revenuePerShare': revenue / shares,
+        'grossMargins': float(rng.uniform(0.1, 0.8)), 'ebitdaMargins': float(rng.uniform(0, 0.4)),
+        'operatingMargins': float(rng.uniform(-0.1, 0.35)), 'profitMargins': float(rng.uniform(-0.1, 0.3)),
+        'bookValue': price * float(rng.uniform(0.1, 0.8)), 'debtToEquity': float(rng.uniform(0, 250)),
+        'currentRatio': float(rng.uniform(0.5, 4)), 'quickRatio': float(rng.uniform(0.3, 3)),
+        'freeCashflow': revenue * float(rng.uniform(-0.05, 0.25)), 'operatingCashflow': revenue * float(rng.uniform(0, 0.3)),
+        'dividendRate': float(dividends[dividends > 0][-4:].sum()), 'dividendYield': float(rng.uniform(0, 0.05)),
+        'payoutRatio': float(rng.uniform(0, 0.8)), 'fiveYearAvgDividendYield': float(rng.uniform(0, 5)),
+        'trailingAnnualDividendRate': float(dividends[-252:].sum()), 'trailingAnnualDividendYield': float(rng.uniform(0, 0.05)),
+        'exDividendDate': int(days[dividends > 0][-1].timestamp()),
+        'auditRisk': int(rng.integers(1, 11)), 'boardRisk': int(rng.integers(1, 11)), 'compensationRisk': int(rng.integers(1, 11)),
+        'shareHolderRightsRisk': int(rng.integers(1, 11)), 'overallRisk': int(rng.integers(1, 11)),
+        'beta': float(rng.uniform(0.3, 2)), 'trailingPE': float(rng.uniform(5, 60)), 'forwardPE': float(rng.uniform(5, 50)),
+        'companyOfficers': [
+            {'name': f'Officer {i} of {symbol}', 'title': title, 'age': int(rng.integers(35, 75)), 'fiscalYear': days[-1].year - 1,
+             'yearBorn': int(rng.integers(1950, 1990)), 'totalPay': int(rng.integers(200_000, 20_000_000)),
+             'exercisedValue': 0, 'unexercisedValue': int(rng.integers(0, 5_000_000))}
+            for i, title in enumerate(['Chief Executive Officer', 'Chief Financial Officer', 'General Counsel'])
+        ],
+    }
+
+    year_ends = [pd.Timestamp(days[-1].year - i, 12, 31) for i in range(1, 5)]
+    quarter_ends = [pd.Timestamp(days[-1].normalize().tz_localize(None) - pd.offsets.QuarterEnd(i)) for i in range(1, 6)]
+
+    def statement(shares_of_revenue, columns, scale):
+        # Each period drifts on its own, so growth rates come out non-zero.
+        values = np.outer(list(shares_of_revenue.values()), rng.uniform(0.8, 1.1, len(columns))) * scale
+        return pd.DataFrame(values, index=list(shares_of_revenue), columns=columns)
+
+    def income_statement(columns, scale):
+        frame = statement({
+            'Total Revenue': 1, 'Cost Of Revenue': 0.55, 'Gross Profit': 0.45, 'Operating Expense': 0.25,
+            'Operating Income': 0.2, 'EBITDA': 0.25, 'Net Income': 0.12,
+        }, columns, scale)
+        frame.loc['Diluted EPS'] = frame.loc['Net Income'] / shares
+        return frame
+
+    def cash_flow(columns, scale):
+        return statement({
+            'Operating Cash Flow': 0.18, 'Investing Cash Flow': -0.08, 'Financing Cash Flow': -0.06,
+            'Free Cash Flow': 0.1, 'Cash Dividends Paid': -0.03,
+        }, columns, scale)
+
+    def balance(columns):
+        return statement({
+            'Cash And Cash Equivalents': 0.1, 'Other Short Term Investments': 0.05, 'Accounts Receivable': 0.08,
+            'Inventory': 0.06, 'Total Assets': 1, 'Investments And Advances': 0.1, 'Net PPE': 0.3,
+            'Goodwill And Other Intangible Assets': 0.15, 'Total Liabilities Net Minority Interest': 0.6,
+            'Stockholders Equity': 0.4,
+        }, columns, revenue * float(rng.uniform(1, 3)))
+
+    today = date.today()
+    expirations = tuple(
+        _third_friday(today.year + (today.month + i - 1) // 12, (today.month + i - 1) % 12 + 1).isoformat()
+        for i in range(1, 5)
+    )
+    strikes = np.round(price * np.linspace(0.7, 1.3, 25), 1)
+
+    def chain(kind, expiration):
+        years = max((date.fromisoformat(expiration) - today).days, 1) / 365
+        iv = 0.25 + 0.3 * (strikes / price - 1) ** 2 + rng.normal(0, 0.01, len(strikes))
+        intrinsic = np.maximum(price - strikes, 0) if kind == 'C' else np.maximum(strikes - price, 0)
+        last = intrinsic + price * iv * np.sqrt(years) * 0.4 * np.exp(-((strikes / price - 1) ** 2) * 20)
+        return pd.DataFrame({
+            'contractSymbol': [f'{symbol}{expiration.replace("-", "")[2:]}{kind}{int(k * 1000):08d}' for k in strikes],
+            'strike': strikes, 'lastPrice': np.round(last, 2), 'bid': np.round(last * 0.97, 2), 'ask': np.round(last * 1.03, 2),
+            'volume': rng.integers(0, 5000, len(strikes)), 'openInterest': rng.integers(0, 20000, len(strikes)),
+            'impliedVolatility': iv, 'inTheMoney': intrinsic > 0,
+        })
+
+    fixtures = {
+        'info': info,
+        'history': history,
+        'balance_sheet': balance(year_ends),
+        'quarterly_balance_sheet': balance(quarter_ends),
+        'income_stmt': income_statement(year_ends, revenue),
+        'quarterly_income_stmt': income_statement(quarter_ends, revenue / 4),
+        'cashflow': cash_flow(year_ends, revenue),
+        'quarterly_cashflow': cash_flow(quarter_ends, revenue / 4),
+        'earnings': pd.DataFrame({'Revenue': [revenue * 0.9, revenue], 'Earnings': [revenue * 0.1, revenue * 0.12]},
+                                 index=pd.Index([year_ends[1].year, year_ends[0].year], name='Year')),
+        'quarterly_earnings': pd.DataFrame({'Revenue': [revenue / 4] * 4, 'Earnings': [revenue / 40] * 4},
+                                           index=pd.Index([f'{q.year}Q{q.quarter}' for q in quarter_ends[:4]], name='Quarter')),
+        'actions': history.loc[history['Dividends'] > 0, ['Dividends', 'Stock Splits']],
+        'dividends': history.loc[history['Dividends'] > 0, 'Dividends'],
+        'splits': history['Stock Splits'].iloc[:0],
+        'sustainability': pd.DataFrame({'esgScores': {'totalEsg': float(rng.uniform(10, 40)), 'environmentScore': float(rng.uniform(0, 15))}}),
+        'recommendations': pd.DataFrame({
+            'period': ['0m', '-1m', '-2m', '-3m'], 'strongBuy': rng.integers(0, 10, 4), 'buy': rng.integers(0, 15, 4),
+            'hold': rng.integers(0, 15, 4), 'sell': rng.integers(0, 5, 4), 'strongSell': rng.integers(0, 3, 4),
+        }),
+        'major_holders': pd.DataFrame({'Value': [float(rng.uniform(0, 0.1)), float(rng.uniform(0.3, 0.9))]},
+                                      index=['insidersPercentHeld', 'institutionsPercentHeld']),
+        'institutional_holders': pd.DataFrame({'Holder': ['Fund A', 'Fund B'], 'Shares': [shares // 20, shares // 30]}),
+        'calendar': pd.DataFrame({'Value': [pd.Timestamp(expirations[0]), info['trailingPE']]}, index=['Earnings Date', 'PE']),
+        'isin': '-',
+        'news': [{'title': f'{symbol} reports results', 'publisher': 'Newswire', 'providerPublishTime': int(days[-1].timestamp())}],
+        'options': expirations,
+        'recorded_on': today,
+    }
+    fixtures['financials'] = fixtures['income_stmt']
+    fixtures['quarterly_financials'] = fixtures['quarterly_income_stmt']
+    for expiration in expirations:
+        fixtures[f'option_chain-{expiration}'] = {'calls': chain('C', expiration), 'puts': chain('P', expiration)}
+    for name, value in fixtures.items():
+        _save(directory, name, value)
+    return list(fixtures)
+
+
+class ReplayTicker:
+    def __init__(self, client, symbol):
+        self._client = client
+        self._symbol = symbol
+        self._directory = client.fixture_directory(symbol)
+
+    def _load(self, name):
+        self._client.sleep()
+        return self._client.load(self._directory, name)
+
+    def __getattr__(self, name):
+        if name not in ATTRIBUTES:
+            raise AttributeError(name)
+        value = self._load(name)
+        if name == 'info':
+            value = dict(value, symbol=self._symbol)
+        return value
+
+    def history(self, period='1mo', interval='1d', start=None, end=None, **kwargs):
+        if interval not in ['1d'] + list(RESAMPLE_RULES):
+            raise LookupError(f'No {interval} bars recorded')
+        frame = self._client.shifted(self._directory, self._load('history'))
+        dates = frame.index.tz_localize(None).normalize()
+        if start is not None:
+            frame = frame[dates >= pd.Timestamp(start)]
+            if end is not None:
+                frame = frame[frame.index.tz_localize(None).normalize() < pd.Timestamp(end)]
+        elif period == 'ytd':
+            frame = frame[dates >= pd.Timestamp(date.today().year, 1, 1)]
+        elif period in PERIOD_OFFSETS:
+            frame = frame[dates > pd.Timestamp(date.today()) - PERIOD_OFFSETS[period]]
+        if interval != '1d':
+            frame = frame.resample(RESAMPLE_RULES[interval]).agg({
+                'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum',
+                'Dividends': 'sum', 'Stock Splits': 'max',
+            }).dropna(subset=['Close'])
+        return frame
+
+    @property
+    def options(self):
+        offset = self._client.offset(self._directory)
+        return tuple((date.fromisoformat(expiration) + offset).isoformat() for expiration in self._load('options'))
+
+    def option_chain(self, expiration):
+        recorded = (date.fromisoformat(expiration) - self._client.offset(self._directory)).isoformat()
+        try:
+            chain = self._load(f'option_chain-{recorded}')
+        except FileNotFoundError:
+            raise LookupError(f'No option chain recorded for {self._symbol} {expiration}')
+        return Options(chain['calls'], chain['puts'], {})
+
+
+class ReplayClient:
+    """Module-like replacement for `yfinance` exposing `Ticker` and `download`."""
+
+    def __init__(self, root, latency, jitter):
+        self.root = Path(root)
+        self.latency = latency
+        self.jitter = jitter
+        self.symbols = sorted(path.name for path in self.root.iterdir() if path.is_dir()) if self.root.is_dir() else []
+        if not self.symbols:
+            raise LookupError(f'No replay fixtures under {self.root}; run `manage.py record_fixtures` first.')
+
+    def sleep(self):
+        if self.latency:
+            time.sleep(self.latency * random.uniform(1 - self.jitter, 1 + self.jitter))
+
+    def fixture_directory(self, symbol):
+        symbol = symbol.upper()
+        if symbol not in self.symbols:
+            symbol = self.symbols[zlib.crc32(symbol.encode()) % len(self.symbols)]
+        return self.root / symbol
+
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def load(directory, name):
+        with open(directory / f'{name}.pkl', 'rb') as f:
+            return pickle.load(f)
+
+    def offset(self, directory):
+        # Whole weeks, so recorded data ends near today and weekdays stay weekdays.
+        weeks = (date.today() - self.load(directory, 'recorded_on')).days // 7
+        return pd.Timedelta(weeks=weeks).to_pytimedelta()
+
+    def shifted(self, directory, frame):
+        offset = self.offset(directory)
+        return frame if not offset else frame.set_axis(frame.index + offset)
+
+    def Ticker(self, symbol):
+        return ReplayTicker(self, symbol)
+
+    def download(self, symbols, period='1mo', interval='1d', start=None, end=None, **kwargs):
+        if isinstance(symbols, str):
+            symbols = symbols.split()
+        self.sleep()
+        frames = {}
+        for symbol in symbols:
+            ticker = ReplayTicker(self, symbol)
+            ticker._load = lambda name, ticker=ticker: self.load(ticker._directory, name)
+            frames[symbol] = ticker.history(period=period, interval=interval, start=start, end=end)
+        return pd.concat(frames, axis=1)
+
+
+def client():
+    return _client(str(settings.FINSCREEN_REPLAY_FIXTURES), settings.FINSCREEN_REPLAY_LATENCY, settings.FINSCREEN_REPLAY_JITTER)
+
+
+@lru_cache(maxsize=8)
+def _client(root, latency, jitter):
+    return ReplayClient(root, latency, jitter)
@@ -0,0 +1,132 @@
+import heapq
+import math
+from concurrent.futures import ThreadPoolExecutor
+from datetime import time as dtime
+from zoneinfo import ZoneInfo
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+from . import demand
+from .models import Company
+from .scraper import STATEMENTS, timed_fetch, write_batch
+
+# Section -> Company field holding its last refresh. Price comes from the
+# `info` call, which also carries the profile, officers, financials,
+# dividend and risk sections; those are rewritten only when their
+# fingerprint changed. Statements take one more call per statement and
+# frequency.
+SECTIONS = {
+    'price': 'last_refreshed',
+    'statements': 'statements_refreshed',
+}
+STATEMENT_CALLS = sum(len(attributes) for model, fields, attributes in STATEMENTS.values())
+
+# Staleness assigned to sections never fetched, so they go first
+NEVER = 1e6
+
+
+def market_open(now):
+    local = now.astimezone(ZoneInfo(settings.FINSCREEN_MARKET_TIMEZONE))
+    opens, closes = (dtime.fromisoformat(value) for value in [settings.FINSCREEN_MARKET_OPEN, settings.FINSCREEN_MARKET_CLOSE])
+    return local.weekday() < 5 and opens <= local.time() < closes
+
+
+def cadence(section, is_open):
+    seconds = settings.FINSCREEN_REFRESH_CADENCES[section]
+    if section == 'price' and not is_open:
+        seconds *= settings.FINSCREEN_REFRESH_OFF_HOURS_FACTOR
+    return seconds
+
+
+def cost(sections):
+    # Every fetch includes `info`.
+    return 1 + STATEMENT_CALLS * ('statements' in sections)
+
+
+def plan(now=None):
+    """
+    Return a heap of (-priority, symbol, due sections) over stored companies
+    and symbols read but never scraped.
+
+    A section is due once its age exceeds its cadence; priority is how many
+    cadences overdue the stalest section is, scaled by read demand and, for
+    prices, doubled while the market is open.
+    """
+    now = now or timezone.now()
+    is_open = market_open(now)
+    scores = demand.scores()
+    refreshed = {
+        symbol: dict(zip(SECTIONS, stamps))
+        for symbol, *stamps in Company.objects.exclude(symbol=None).values_list('symbol', *SECTIONS.values())
+    }
+    for symbol in scores.keys() - refreshed.keys():
+        refreshed[symbol] = dict.fromkeys(SECTIONS)
+
+    heap = []
+    for symbol, stamps in refreshed.items():
+        staleness = {
+            section: NEVER if stamp is None else (now - stamp).total_seconds() / cadence(section, is_open)
+            for section, stamp in stamps.items()
+        }
+        due = sorted(section for section, value in staleness.items() if value >= 1)
+        if not due:
+            continue
+        priority = max(staleness[section] for section in due) * (1 + math.log1p(scores.get(symbol, 0)))
+        if is_open and 'price' in due:
+            priority *= 2
+        heap.append((-priority, symbol, due))
+    heapq.heapify(heap)
+    return heap
+
+
+def take(heap, budget, skip=()):
+    """Pop the highest-priority symbols, other than `skip`, whose fetches fit in `budget` upstream calls."""
+    picked = []
+    while heap and budget > 0:
+        priority, symbol, sections = heapq.heappop(heap)
+        if symbol in skip:
+            continue
+        if cost(sections) > budget:
+            # Still refresh the price if the statements don't fit
+            if 'price' not in sections:
+                continue
+            sections = ['price']
+        picked.append((symbol, sections))
+        budget -= cost(sections)
+    return picked
+
+
+def refresh(picked, max_workers):
+    """Fetch and write the picked symbols, returning {symbol: error or None}."""
+    with ThreadPoolExecutor(max_workers=max(max_workers, 1)) as executor:
+        fetched = list(executor.map(lambda item: timed_fetch(item[0], 'statements' in item[1]), picked))
+    results = {}
+    payloads = {}
+    for (symbol, sections), (payload, error, seconds) in zip(picked, fetched):
+        results[symbol] = error and str(error)
+        if error is None:
+            payloads[symbol] = payload
+    if payloads:
+        for symbol, result in write_batch(payloads).items():
+            if result['errors']:
+                results[symbol] = result['errors'][0]['error']
+    return results
+
+
+def freshness(now=None):
+    """Per section: percentiles of data age in seconds and the share of companies within cadence."""
+    now = now or timezone.now()
+    is_open = market_open(now)
+    report = {}
+    for section, field in SECTIONS.items():
+        stamps = list(Company.objects.exclude(symbol=None).values_list(field, flat=True))
+        ages = np.array([(now - stamp).total_seconds() for stamp in stamps if stamp is not None])
+        entry = {'companies': len(stamps), 'never': len(stamps) - len(ages)}
+        if len(ages):
+            p50, p90, p99 = np.percentile(ages, [50, 90, 99])
+            entry.update(
+                p50=round(p50), p90=round(p90), p99=round(p99),
+                within_cadence=round(float((ages <= cadence(section, is_open)).sum()) / len(stamps), 4),
+            )
+        report[section] = entry
+    return report
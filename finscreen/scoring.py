@@ -0,0 +1,118 @@
+import numpy as np
+
+# Weights for each metric category
+FHS_WEIGHTS = {
+    'profitability': 0.25,
+    'growth': 0.25,
+    'valuation': 0.20,
+    'financial_health': 0.20,
+    'efficiency': 0.10
+}
+
+# Weights for each indicator
+TTS_WEIGHTS = {
+    'rsi': 0.20,
+    'ma': 0.25,
+    'macd': 0.15,
+    'adx': 0.10,
+    'bollinger': 0.10,
+    'volume': 0.20
+}
+
+def calculate_fhs(profitability_score, growth_score, valuation_score, financial_health_score, efficiency_score):
+    weights = FHS_WEIGHTS
+
+    # Calculate weighted score
+    fhs = (profitability_score * weights['profitability'] +
+           growth_score * weights['growth'] +
+           valuation_score * weights['valuation'] +
+           financial_health_score * weights['financial_health'] +
+           efficiency_score * weights['efficiency'])
+
+    # Interpretation of FHS score
+    if fhs > 0.5:
+        return "Strong Buy", fhs
+    elif 0.2 < fhs <= 0.5:
+        return "Buy", fhs
+    elif -0.2 <= fhs <= 0.2:
+        return "Hold", fhs
+    elif -0.5 <= fhs < -0.2:
+        return "Sell", fhs
+    else:
+        return "Strong Sell", fhs
+
+
+def calculate_tts(rsi_score, ma_score, macd_score, adx_score, bollinger_score, volume_score):
+    weights = TTS_WEIGHTS
+
+    # Calculate weighted score
+    tts = (rsi_score * weights['rsi'] +
+           ma_score * weights['ma'] +
+           macd_score * weights['macd'] +
+           adx_score * weights['adx'] +
+           bollinger_score * weights['bollinger'] +
+           volume_score * weights['volume'])
+
+    # Interpretation of TTS score
+    if tts > 0.5:
+        return "Strong Buy", tts
+    elif 0.2 < tts <= 0.5:
+        return "Buy", tts
+    elif -0.2 <= tts <= 0.2:
+        return "Hold", tts
+    elif -0.5 <= tts < -0.2:
+        return "Sell", tts
+    else:
+        return "Strong Sell", tts
+
+
+def technical_score(rsi, ma_50, ma_200, macd, adx, bollinger, volume):
+    score = 0
+    
+    # RSI scoring
+    if rsi < 30:
+        score += 2
+    elif rsi > 70:
+        score -= 2
+    
+    # Moving Averages scoring
+    if ma_50 > ma_200:
+        score += 2
+    elif ma_50 < ma_200:
+        score -= 2
+    
+    # MACD scoring
+    if macd == 'bullish':
+        score += 1
+    elif macd == 'bearish':
+        score -= 1
+
+    # ADX scoring
+    if adx > 25:
+        score += 1
+    elif adx < 20:
+        score -= 1
+    
+    # Bollinger Bands scoring
+    if bollinger == 'below':
+        score += 1
+    elif bollinger == 'above':
+        score -= 1
+
+    # Volume scoring
+    if volume == 'above_average':
+        score += 1
+    elif volume == 'below_average':
+        score -= 1
+
+    return score
+
+
+def score_labels(scores):
+    """Vectorized form of the FHS/TTS interpretation ladder for an array of scores."""
+    scores = np.asarray(scores, dtype=float)
+    return np.select(
+        [scores > 0.5, scores > 0.2, scores >= -0.2, scores >= -0.5],
+        ["Strong Buy", "Buy", "Hold", "Sell"],
+        default="Strong Sell",
+    )
@@ -0,0 +1,475 @@
+import hashlib
+import json
+import time
+import pandas as pd
+from datetime import date, datetime
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+from . import upstream
+from .upstream import yf
+from .models import Company, Sector, Industry, Exchange, Currency, Address, Officer, OfficerCompensation, CompanyFinancials, Dividend, StockPrice, LatestStockPrice, RiskMetrics, BalanceSheet, IncomeStatement, CashFlowStatement, SectionFingerprint
+
+# Model field -> yfinance `info` key
+COMPANY_FIELDS = {
+    'name': 'longName',
+    'short_name': 'shortName',
+    'long_name': 'longName',
+    'total_employees': 'fullTimeEmployees',
+}
+
+ADDRESS_FIELDS = {
+    'address1': 'address1',
+    'address2': 'address2',
+    'city': 'city',
+    'zip': 'zip',
+    'country': 'country',
+    'phone': 'phone',
+    'fax': 'fax',
+    'website': 'website',
+}
+
+STOCK_PRICE_FIELDS = {
+    'previous_close': 'previousClose',
+    'open': 'open',
+    'day_low': 'dayLow',
+    'day_high': 'dayHigh',
+    'current_price': 'currentPrice',
+    'fifty_two_week_low': 'fiftyTwoWeekLow',
+    'fifty_two_week_high': 'fiftyTwoWeekHigh',
+    'fifty_day_avg': 'fiftyDayAverage',
+    'two_hundred_day_avg': 'twoHundredDayAverage',
+    'volume': 'volume',
+    'average_volume': 'averageVolume',
+}
+
+FINANCIALS_FIELDS = {
+    'market_cap': 'marketCap',
+    'enterprise_value': 'enterpriseValue',
+    'total_cash': 'totalCash',
+    'total_debt': 'totalDebt',
+    'total_revenue': 'totalRevenue',
+    'revenue_per_share': 'revenuePerShare',
+    'gross_margin': 'grossMargins',
+    'ebitda_margin': 'ebitdaMargins',
+    'operating_margin': 'operatingMargins',
+    'profit_margin': 'profitMargins',
+    'book_value': 'bookValue',
+    'debt_to_equity_ratio': 'debtToEquity',
+    'current_ratio': 'currentRatio',
+    'quick_ratio': 'quickRatio',
+    'free_cashflow': 'freeCashflow',
+    'operating_cashflow': 'operatingCashflow',
+}
+
+DIVIDEND_FIELDS = {
+    'dividend_rate': 'dividendRate',
+    'dividend_yield': 'dividendYield',
+    'payout_ratio': 'payoutRatio',
+    'five_year_avg_dividend_yield': 'fiveYearAvgDividendYield',
+    'trailing_annual_dividend_rate': 'trailingAnnualDividendRate',
+    'trailing_annual_dividend_yield': 'trailingAnnualDividendYield',
+}
+
+RISK_METRICS_FIELDS = {
+    'audit_risk': 'auditRisk',
+    'board_risk': 'boardRisk',
+    'compensation_risk': 'compensationRisk',
+    'shareholder_rights_risk': 'shareholderRightsRisk',
+    'overall_risk': 'overallRisk',
+}
+
+OFFICER_FIELDS = {
+    'title': 'title',
+    'age': 'age',
+    'fiscal_year': 'fiscalYear',
+    'year_born': 'yearBorn',
+}
+
+COMPENSATION_FIELDS = {
+    'total_pay': 'totalPay',
+    'exercised_value': 'exercisedValue',
+    'unexercised_value': 'unexercisedValue',
+}
+
+# Model field -> balance sheet row label
+BALANCE_SHEET_FIELDS = {
+    'cash_and_cash_equivalents': 'Cash And Cash Equivalents',
+    'short_term_investments': 'Other Short Term Investments',
+    'net_receivables': 'Accounts Receivable',
+    'inventory': 'Inventory',
+    'total_current_assets': 'Total Assets',
+    'long_term_investments': 'Investments And Advances',
+    'property_plant_equipment': 'Net PPE',
+    'intangible_assets': 'Goodwill And Other Intangible Assets',
+    'total_assets': 'Total Assets',
+    'total_liabilities': 'Total Liabilities Net Minority Interest',
+    'total_equity': 'Stockholders Equity',
+}
+
+# Model field -> income statement row label
+INCOME_STATEMENT_FIELDS = {
+    'revenue': 'Total Revenue',
+    'cost_of_revenue': 'Cost Of Revenue',
+    'gross_profit': 'Gross Profit',
+    'operating_expense': 'Operating Expense',
+    'operating_income': 'Operating Income',
+    'ebitda': 'EBITDA',
+    'net_income': 'Net Income',
+    'diluted_eps': 'Diluted EPS',
+}
+
+# Model field -> cash flow statement row label
+CASH_FLOW_FIELDS = {
+    'net_cash_from_operating_activities': 'Operating Cash Flow',
+    'net_cash_used_for_investing_activities': 'Investing Cash Flow',
+    'net_cash_from_financing_activities': 'Financing Cash Flow',
+    'free_cash_flow': 'Free Cash Flow',
+    'dividends_paid': 'Cash Dividends Paid',
+}
+
+# Payload section -> (model, fields, {frequency: yfinance attribute})
+STATEMENTS = {
+    'balance_sheet': (BalanceSheet, BALANCE_SHEET_FIELDS, {
+        BalanceSheet.ANNUAL: 'balance_sheet', BalanceSheet.QUARTERLY: 'quarterly_balance_sheet',
+    }),
+    'income_statement': (IncomeStatement, INCOME_STATEMENT_FIELDS, {
+        IncomeStatement.ANNUAL: 'income_stmt', IncomeStatement.QUARTERLY: 'quarterly_income_stmt',
+    }),
+    'cash_flow_statement': (CashFlowStatement, CASH_FLOW_FIELDS, {
+        CashFlowStatement.ANNUAL: 'cashflow', CashFlowStatement.QUARTERLY: 'quarterly_cashflow',
+    }),
+}
+
+# Payload sections stored as a single row per company
+COMPANY_SECTIONS = {
+    'address': Address,
+    'financials': CompanyFinancials,
+    'dividend': Dividend,
+    'risk_metrics': RiskMetrics,
+}
+
+# Sections skipped when their fingerprint is unchanged. Stock prices are a
+# daily snapshot and always written.
+FINGERPRINT_SECTIONS = ['company', 'address', 'financials', 'dividend', 'risk_metrics', 'officers', *STATEMENTS]
+
+
+def fetch_symbol(symbol, statements=True):
+    """
+    Fetch `info` and, unless `statements` is False, the annual and quarterly
+    statements as {(section, frequency): DataFrame} (else None).
+    """
+    ticker = yf.Ticker(symbol)
+    info = upstream.call(lambda: ticker.info, 'info')
+    frames = None
+    if statements:
+        frames = {
+            (section, frequency): upstream.call(lambda attribute=attribute: getattr(ticker, attribute), attribute)
+            for section, (model, fields, attributes) in STATEMENTS.items()
+            for frequency, attribute in attributes.items()
+        }
+    # sustainability = ticker.sustainability.to_dict()
+    return info, frames
+
+
+def _pick(source, fields):
+    return {field: source.get(key) for field, key in fields.items()}
+
+
+def _clean(value):
+    return None if pd.isna(value) else value
+
+
+def normalize(symbol, info, statements):
+    """Flatten an upstream `info` dict and statements into plain per-table rows."""
+    company = _pick(info, COMPANY_FIELDS)
+    company['name'] = company['name'] or info.get('shortName') or symbol
+
+    dividend = _pick(info, DIVIDEND_FIELDS)
+    ex_dividend_date = info.get('exDividendDate')
+    dividend['ex_dividend_date'] = datetime.fromtimestamp(ex_dividend_date).date() if ex_dividend_date else None
+
+    officers = []
+    for officer_data in info.get('companyOfficers', []):
+        if not officer_data.get('name'):
+            continue
+        officer = _pick(officer_data, OFFICER_FIELDS)
+        officer['name'] = officer_data['name']
+        officer['compensation'] = _pick(officer_data, COMPENSATION_FIELDS)
+        officers.append(officer)
+
+    # None when statements were not fetched, so the stored ones are left alone.
+    statement_rows = {section: None if statements is None else [] for section in STATEMENTS}
+    for (section, frequency), frame in (statements or {}).items():
+        if frame is None or frame.empty:
+            continue
+        fields = STATEMENTS[section][1]
+        for key, value in frame.items():
+            row = {field: _clean(value.get(label)) for field, label in fields.items()}
+            row['date'] = pd.Timestamp(key).date()
+            row['frequency'] = frequency
+            statement_rows[section].append(row)
+
+    return {
+        'symbol': info.get('symbol') or symbol,
+        'sector': info.get('sector'),
+        'industry': info.get('industry'),
+        'exchange': info.get('exchange'),
+        'currency': info.get('currency'),
+        'company': company,
+        'address': _pick(info, ADDRESS_FIELDS),
+        'stock_price': _pick(info, STOCK_PRICE_FIELDS),
+        'financials': _pick(info, FINANCIALS_FIELDS),
+        'dividend': dividend,
+        'risk_metrics': _pick(info, RISK_METRICS_FIELDS),
+        'officers': officers,
+        **statement_rows,
+    }
+
+
+def timed_fetch(symbol, statements=True):
+    """Fetch and normalize one symbol, returning (payload, error, seconds)."""
+    started = time.perf_counter()
+    try:
+        info, frames = fetch_symbol(symbol, statements)
+        return normalize(symbol, info, frames), None, time.perf_counter() - started
+    except Exception as e:
+        return None, e, time.perf_counter() - started
+
+
+def _section_data(payload, section):
+    # Include the lookups each section's rows reference.
+    if section == 'company':
+        return dict(payload['company'], **{key: payload[key] for key in ['sector', 'industry', 'exchange', 'currency']})
+    if section == 'financials':
+        return dict(payload['financials'], currency=payload['currency'])
+    return payload[section]
+
+
+def fingerprint(payload):
+    """Return {section: SHA-256 hex digest} for a normalized payload, leaving out sections not fetched."""
+    return {
+        section: hashlib.sha256(json.dumps(_section_data(payload, section), sort_keys=True, default=str).encode()).hexdigest()
+        for section in FINGERPRINT_SECTIONS
+        if payload[section] is not None
+    }
+
+
+def _upsert(model, rows, unique_fields):
+    # Rows are keyed by their conflict target so a batch never touches the
+    # same row twice, and sorted so concurrent batches lock in the same order.
+    rows = sorted(rows.items())
+    if not rows:
+        return
+    update_fields = [field for field in rows[0][1] if field not in unique_fields]
+    model.objects.bulk_create(
+        [model(**row) for key, row in rows],
+        update_conflicts=True,
+        unique_fields=unique_fields,
+        update_fields=update_fields,
+    )
+
+
+def _lookup_ids(model, field, names):
+    names = sorted({name for name in names if name})
+    if not names:
+        return {}
+    model.objects.bulk_create([model(**{field: name}) for name in names], ignore_conflicts=True)
+    return dict(model.objects.filter(**{f'{field}__in': names}).values_list(field, 'id'))
+
+
+def write_payloads(payloads):
+    """
+    Write a batch of normalized payloads with one statement per table.
+
+    Sections whose fingerprint matches the one stored for the company are not
+    written. Returns {symbol: {'written': n, 'skipped': n}} counting sections.
+    """
+    digests = {payload['symbol']: fingerprint(payload) for payload in payloads}
+    stored = {
+        (symbol, section): digest
+        for symbol, section, digest in SectionFingerprint.objects.filter(company__symbol__in=list(digests)).values_list(
+            'company__symbol', 'section', 'digest'
+        )
+    }
+    changed = {
+        symbol: {section for section, digest in sections.items() if stored.get((symbol, section)) != digest}
+        for symbol, sections in digests.items()
+    }
+
+    def changed_payloads(section):
+        return [payload for payload in payloads if section in changed[payload['symbol']]]
+
+    sectors = _lookup_ids(Sector, 'sector_name', (p['sector'] for p in changed_payloads('company')))
+    industries = _lookup_ids(Industry, 'industry_name', (p['industry'] for p in changed_payloads('company')))
+    exchanges = _lookup_ids(Exchange, 'exchange_name', (p['exchange'] for p in changed_payloads('company')))
+    currencies = _lookup_ids(Currency, 'currency_code', (
+        p['currency'] for p in payloads if changed[p['symbol']] & {'company', 'financials'}
+    ))
+
+    companies = {}
+    for payload in changed_payloads('company'):
+        companies[payload['symbol']] = dict(
+            payload['company'],
+            symbol=payload['symbol'],
+            sector_id=sectors.get(payload['sector']),
+            industry_id=industries.get(payload['industry']),
+            exchange_id=exchanges.get(payload['exchange']),
+            currency_id=currencies.get(payload['currency']),
+        )
+    _upsert(Company, companies, ['symbol'])
+    company_ids = dict(Company.objects.filter(symbol__in=list(digests)).values_list('symbol', 'id'))
+    now = timezone.now()
+    Company.objects.filter(id__in=list(company_ids.values())).update(last_refreshed=now)
+    Company.objects.filter(
+        id__in=[company_ids[p['symbol']] for p in payloads if all(p[section] is not None for section in STATEMENTS)]
+    ).update(statements_refreshed=now)
+
+    for section, model in COMPANY_SECTIONS.items():
+        rows = {}
+        for payload in changed_payloads(section):
+            company_id = company_ids[payload['symbol']]
+            rows[company_id] = dict(payload[section], company_id=company_id)
+            if section == 'financials':
+                rows[company_id]['currency_id'] = currencies.get(payload['currency'])
+        _upsert(model, rows, ['company_id'])
+
+    # One price snapshot per company per day; `date` is filled by auto_now_add.
+    _upsert(StockPrice, {
+        company_ids[p['symbol']]: dict(p['stock_price'], company_id=company_ids[p['symbol']])
+        for p in payloads
+    }, ['company_id', 'date'])
+    today = date.today()
+    _upsert(LatestStockPrice, {
+        company_ids[p['symbol']]: dict(p['stock_price'], company_id=company_ids[p['symbol']], date=today)
+        for p in payloads
+    }, ['company_id'])
+
+    officers = {}
+    compensation = {}
+    for payload in changed_payloads('officers'):
+        company_id = company_ids[payload['symbol']]
+        for officer_data in payload['officers']:
+            officer = dict(officer_data, company_id=company_id)
+            compensation[(company_id, officer['name'])] = officer.pop('compensation')
+            officers[(company_id, officer['name'])] = officer
+    _upsert(Officer, officers, ['company_id', 'name'])
+    if officers:
+        officer_ids = {
+            (company_id, name): officer_id
+            for company_id, name, officer_id in Officer.objects.filter(
+                company_id__in={company_id for company_id, name in officers}
+            ).values_list('company_id', 'name', 'id')
+        }
+        _upsert(OfficerCompensation, {
+            officer_ids[key]: dict(row, officer_id=officer_ids[key])
+            for key, row in compensation.items()
+        }, ['officer_id'])
+
+    for section, (model, fields, attributes) in STATEMENTS.items():
+        rows = {}
+        for payload in changed_payloads(section):
+            company_id = company_ids[payload['symbol']]
+            for row in payload[section]:
+                rows[(company_id, row['date'], row['frequency'])] = dict(row, company_id=company_id)
+        _upsert(model, rows, ['company_id', 'date', 'frequency'])
+
+    _upsert(SectionFingerprint, {
+        (company_ids[symbol], section): dict(
+            company_id=company_ids[symbol], section=section, digest=digests[symbol][section], updated_at=now
+        )
+        for symbol, sections in changed.items()
+        for section in sections
+    }, ['company_id', 'section'])
+    return {
+        symbol: {'written': len(sections), 'skipped': len(digests[symbol]) - len(sections)}
+        for symbol, sections in changed.items()
+    }
+
+
+def _plain(value):
+    return float(value) if isinstance(value, Decimal) else value
+
+
+def _unpick(instance, fields):
+    if instance is None:
+        return {}
+    return {key: _plain(getattr(instance, field)) for field, key in fields.items()}
+
+
+def _related(company, name):
+    try:
+        return getattr(company, name)
+    except AttributeError:
+        # Reverse one-to-one with no row
+        return None
+
+
+def load_info(symbol):
+    """
+    Rebuild an `info` dict in yfinance's shape from the stored tables, or
+    return None if the symbol was never scraped.
+
+    Only the keys normalize() stores are present. The company and its
+    one-to-one sections come in one query, officers in a second.
+    """
+    company = (
+        Company.objects.select_related(
+            'sector', 'industry', 'exchange', 'currency',
+            'address', 'companyfinancials', 'dividend', 'riskmetrics', 'lateststockprice',
+        )
+        .prefetch_related(Prefetch('officer_set', queryset=Officer.objects.select_related('officercompensation').order_by('id')))
+        # Rows created before a first successful scrape carry no data yet
+        .filter(symbol=symbol, last_refreshed__isnull=False)
+        .first()
+    )
+    if company is None:
+        return None
+
+    info = {'symbol': company.symbol}
+    info.update(_unpick(company, COMPANY_FIELDS))
+    info.update({
+        'sector': company.sector and company.sector.sector_name,
+        'industry': company.industry and company.industry.industry_name,
+        'exchange': company.exchange and company.exchange.exchange_name,
+        'currency': company.currency and company.currency.currency_code,
+    })
+    for name, fields in [
+        ('address', ADDRESS_FIELDS), ('lateststockprice', STOCK_PRICE_FIELDS), ('companyfinancials', FINANCIALS_FIELDS),
+        ('dividend', DIVIDEND_FIELDS), ('riskmetrics', RISK_METRICS_FIELDS),
+    ]:
+        info.update(_unpick(_related(company, name), fields))
+
+    dividend = _related(company, 'dividend')
+    if dividend is not None and dividend.ex_dividend_date:
+        info['exDividendDate'] = int(datetime.combine(dividend.ex_dividend_date, datetime.min.time()).timestamp())
+
+    officers = []
+    for officer in company.officer_set.all():
+        officer_info = dict(_unpick(officer, OFFICER_FIELDS), name=officer.name)
+        officer_info.update(_unpick(_related(officer, 'officercompensation'), COMPENSATION_FIELDS))
+        officers.append(officer_info)
+    info['companyOfficers'] = officers
+    return info, company.last_refreshed
+
+
+def write_batch(payloads):
+    """
+    Write {symbol: payload} in a single transaction.
+
+    Returns {symbol: {'written': n, 'skipped': n, 'errors': [...]}}. If the
+    batch fails, symbols are retried one at a time so a single bad payload
+    only fails its own symbol.
+    """
+    try:
+        with transaction.atomic():
+            counts = write_payloads(list(payloads.values()))
+        return {symbol: dict(counts[payload['symbol']], errors=[]) for symbol, payload in payloads.items()}
+    except Exception as e:
+        if len(payloads) == 1:
+            return {symbol: {'written': 0, 'skipped': 0, 'errors': [{"error": str(e)}]} for symbol in payloads}
+    results = {}
+    for symbol, payload in payloads.items():
+        results.update(write_batch({symbol: payload}))
+    return results
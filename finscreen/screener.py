@@ -0,0 +1,292 @@
+import base64
+import json
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from django.db.models import F, FloatField, OuterRef, Q, Subquery
+from django.db.models.functions import Cast
+from .models import Company, CompanyFinancials, PerformanceMetrics, FundamentalIndicator, GrowthMetric
+from .scoring import FHS_WEIGHTS, score_labels
+
+# Sub-score -> {metric: direction}, where -1 means lower is better
+FHS_METRICS = {
+    'profitability': {
+        'gross_margin': 1, 'operating_margin': 1, 'profit_margin': 1,
+        'return_on_equity': 1, 'return_on_assets': 1, 'net_profit_margin': 1,
+    },
+    'growth': {
+        'revenue_growth': 1, 'earnings_growth': 1, 'eps_growth': 1,
+        'book_value_growth': 1, 'dividend_growth': 1,
+    },
+    'valuation': {
+        'trailing_pe': -1, 'forward_pe': -1, 'peg_ratio': -1,
+        'price_to_book_ratio': -1, 'enterprise_value_to_ebitda': -1,
+    },
+    'financial_health': {
+        'debt_to_equity_ratio': -1, 'current_ratio': 1, 'quick_ratio': 1,
+    },
+    'efficiency': {
+        'asset_turnover': 1, 'inventory_turnover': 1,
+    },
+}
+
+# Multiples where a non-positive value (losses, negative equity) is not comparable
+POSITIVE_ONLY = ['trailing_pe', 'forward_pe', 'peg_ratio', 'price_to_book_ratio', 'enterprise_value_to_ebitda']
+
+FHS_CACHE_KEY = 'screen:fhs'
+
+
+def _frame(queryset, fields):
+    rows = queryset.annotate(**{f'{field}_f': Cast(field, FloatField()) for field in fields}).values_list(
+        'company_id', *(f'{field}_f' for field in fields)
+    )
+    return pd.DataFrame.from_records(list(rows), columns=['company_id'] + fields).set_index('company_id')
+
+
+def _latest(model):
+    # Only each company's most recent row
+    latest_date = model.objects.filter(company_id=OuterRef('company_id')).order_by('-date').values('date')[:1]
+    return model.objects.filter(date=Subquery(latest_date))
+
+
+def load_fundamentals():
+    """One query per table for the whole universe, joined on company id."""
+    companies = pd.DataFrame.from_records(
+        list(Company.objects.values_list('id', 'symbol', 'name', 'sector__sector_name')),
+        columns=['company_id', 'symbol', 'name', 'sector'],
+    ).set_index('company_id')
+    parts = [
+        _frame(CompanyFinancials.objects.all(), [
+            'gross_margin', 'operating_margin', 'profit_margin', 'debt_to_equity_ratio', 'current_ratio', 'quick_ratio',
+        ]),
+        _frame(_latest(PerformanceMetrics), [
+            'trailing_pe', 'forward_pe', 'peg_ratio', 'price_to_book_ratio', 'enterprise_value_to_ebitda',
+        ]),
+        _frame(_latest(FundamentalIndicator), [
+            'return_on_equity', 'return_on_assets', 'net_profit_margin', 'asset_turnover', 'inventory_turnover',
+        ]),
+        _frame(_latest(GrowthMetric), [
+            'revenue_growth', 'earnings_growth', 'eps_growth', 'book_value_growth', 'dividend_growth',
+        ]),
+    ]
+    return companies.join(parts, how='left')
+
+
+def fhs_scores(frame):
+    """
+    Score every company at once.
+
+    Each metric becomes a percentile rank within the company's sector, mapped
+    to [-1, 1] and signed so that higher is always better. Sub-scores average
+    their metrics and FHS is the sub-score matrix times the FHS weights.
+    """
+    metrics = [metric for group in FHS_METRICS.values() for metric in group]
+    values = frame[metrics].copy()
+    values[POSITIVE_ONLY] = values[POSITIVE_ONLY].where(values[POSITIVE_ONLY] > 0)
+
+    sectors = frame['sector'].fillna('')
+    ranks = values.groupby(sectors).rank(method='average')
+    counts = values.groupby(sectors).transform('count')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        spread = np.where(counts > 1, 2 * (ranks - 1) / (counts - 1) - 1, np.nan)
+    normalized = pd.DataFrame(spread, index=values.index, columns=metrics)
+
+    scores = pd.DataFrame(index=frame.index)
+    for group, directions in FHS_METRICS.items():
+        signed = normalized[list(directions)] * pd.Series(directions)
+        # No data for a whole group counts as neutral
+        scores[group] = signed.mean(axis=1).fillna(0)
+
+    weights = np.array([FHS_WEIGHTS[group] for group in scores.columns])
+    scores['fhs'] = scores.to_numpy() @ weights
+    scores['label'] = score_labels(scores['fhs'])
+    result = frame[['symbol', 'name', 'sector']].join(scores).sort_values('fhs', ascending=False)
+    result['rank'] = np.arange(1, len(result) + 1)
+    return result
+
+
+def get_fhs_scores():
+    cache = caches['default']
+    scores = cache.get(FHS_CACHE_KEY)
+    if scores is None:
+        scores = fhs_scores(load_fundamentals())
+        cache.set(FHS_CACHE_KEY, scores, settings.FINSCREEN_FHS_CACHE_TTL)
+    return scores
+
+
+class ScreenError(ValueError):
+    pass
+
+
+# Screener field -> ORM path from Company. Tables holding one row per company
+# (prices come from latest_stock_price) are joined; dated tables are read
+# through their latest row (see below).
+SCREEN_FIELDS = {
+    'symbol': 'symbol',
+    'name': 'name',
+    'sector': 'sector__sector_name',
+    'industry': 'industry__industry_name',
+    'exchange': 'exchange__exchange_name',
+    'total_employees': 'total_employees',
+    'current_price': 'lateststockprice__current_price',
+    'volume': 'lateststockprice__volume',
+    'average_volume': 'lateststockprice__average_volume',
+    'fifty_two_week_low': 'lateststockprice__fifty_two_week_low',
+    'fifty_two_week_high': 'lateststockprice__fifty_two_week_high',
+    'market_cap': 'companyfinancials__market_cap',
+    'enterprise_value': 'companyfinancials__enterprise_value',
+    'total_revenue': 'companyfinancials__total_revenue',
+    'total_debt': 'companyfinancials__total_debt',
+    'gross_margin': 'companyfinancials__gross_margin',
+    'operating_margin': 'companyfinancials__operating_margin',
+    'profit_margin': 'companyfinancials__profit_margin',
+    'debt_to_equity': 'companyfinancials__debt_to_equity_ratio',
+    'current_ratio': 'companyfinancials__current_ratio',
+    'quick_ratio': 'companyfinancials__quick_ratio',
+    'free_cashflow': 'companyfinancials__free_cashflow',
+    'dividend_rate': 'dividend__dividend_rate',
+    'dividend_yield': 'dividend__dividend_yield',
+    'payout_ratio': 'dividend__payout_ratio',
+    'audit_risk': 'riskmetrics__audit_risk',
+    'board_risk': 'riskmetrics__board_risk',
+    'overall_risk': 'riskmetrics__overall_risk',
+}
+
+# Screener field -> (model, column) read from the company's most recent row
+LATEST_FIELDS = {
+    'beta': (PerformanceMetrics, 'beta'),
+    'trailing_pe': (PerformanceMetrics, 'trailing_pe'),
+    'forward_pe': (PerformanceMetrics, 'forward_pe'),
+    'peg_ratio': (PerformanceMetrics, 'peg_ratio'),
+    'price_to_book': (PerformanceMetrics, 'price_to_book_ratio'),
+    'price_to_sales': (PerformanceMetrics, 'price_to_sales_ratio'),
+    'ev_to_ebitda': (PerformanceMetrics, 'enterprise_value_to_ebitda'),
+}
+
+SCREEN_OPERATORS = {
+    'eq': 'exact',
+    'ne': 'exact',
+    'gt': 'gt',
+    'gte': 'gte',
+    'lt': 'lt',
+    'lte': 'lte',
+    'in': 'in',
+    'between': 'range',
+    'isnull': 'isnull',
+}
+
+DEFAULT_SCREEN_FIELDS = ['symbol', 'name', 'sector']
+
+SCALAR_TYPES = (str, int, float, bool, type(None))
+
+
+def _expression(field):
+    if field in SCREEN_FIELDS:
+        return F(SCREEN_FIELDS[field])
+    if field in LATEST_FIELDS:
+        model, column = LATEST_FIELDS[field]
+        return Subquery(model.objects.filter(company_id=OuterRef('id')).order_by('-date').values(column)[:1])
+    raise ScreenError(f"Unknown field '{field}'. Valid fields: {sorted(SCREEN_FIELDS) + sorted(LATEST_FIELDS)}")
+
+
+def _alias(field):
+    # Annotations may not shadow model fields such as `sector`
+    return f'f_{field}'
+
+
+def encode_cursor(value, pk):
+    return base64.urlsafe_b64encode(json.dumps([value, pk], default=str).encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        value, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise ScreenError('Invalid cursor.')
+    return value, pk
+
+
+def _message(error):
+    return '; '.join(error.messages) if isinstance(error, ValidationError) else str(error)
+
+
+def compile_screen(spec):
+    """
+    Compile a screen spec into a single queryset.
+
+    spec = {
+        "filters": [{"field": "market_cap", "op": "gt", "value": 1e10}, ...],
+        "sort": "-dividend_yield",
+        "fields": ["symbol", "market_cap"],
+        "limit": 50,
+        "cursor": "<next_cursor from the previous page>",
+    }
+
+    Returns (queryset, output fields, sort field, limit). Pages
+    are keyset-paginated on (sort value, id), so deep pages cost the same as
+    the first one.
+    """
+    if not isinstance(spec, dict):
+        raise ScreenError('The screen must be a JSON object.')
+    filters = spec.get('filters', [])
+    if not isinstance(filters, list) or not all(isinstance(f, dict) and isinstance(f.get('field'), str) for f in filters):
+        raise ScreenError('filters must be a list of {"field", "op", "value"} objects.')
+    requested = spec.get('fields') or []
+    if not isinstance(requested, list) or not all(isinstance(f, str) for f in requested) or not isinstance(spec.get('sort') or '', str):
+        raise ScreenError('fields must be a list of field names and sort a field name.')
+    sort = spec.get('sort') or 'symbol'
+    descending = sort.startswith('-')
+    sort_field = sort.lstrip('-')
+    fields = list(dict.fromkeys(spec.get('fields') or DEFAULT_SCREEN_FIELDS + [f['field'] for f in filters] + [sort_field]))
+    try:
+        limit = int(spec.get('limit', 50))
+    except (TypeError, ValueError):
+        raise ScreenError('limit must be an integer.')
+    limit = min(max(limit, 1), settings.FINSCREEN_SCREEN_MAX_LIMIT)
+
+    referenced = set(fields) | {sort_field} | {f.get('field') for f in filters}
+    queryset = Company.objects.annotate(**{_alias(field): _expression(field) for field in referenced})
+
+    for condition in filters:
+        field, op = condition.get('field'), condition.get('op', 'eq')
+        if not isinstance(op, str) or op not in SCREEN_OPERATORS:
+            raise ScreenError(f"Unknown op '{op}'. Valid ops: {sorted(SCREEN_OPERATORS)}")
+        value = condition.get('value')
+        if op in ('in', 'between') and not isinstance(value, list):
+            raise ScreenError(f"'{op}' needs a list value.")
+        if op == 'between' and len(value) != 2:
+            raise ScreenError("'between' needs [low, high].")
+        if not all(isinstance(item, SCALAR_TYPES) for item in (value if isinstance(value, list) else [value])):
+            raise ScreenError(f"'{field}' needs a number, string, boolean or null value, or a list of them.")
+        lookup = Q(**{f'{_alias(field)}__{SCREEN_OPERATORS[op]}': value})
+        try:
+            queryset = queryset.exclude(lookup) if op == 'ne' else queryset.filter(lookup)
+        except (ValidationError, ValueError, TypeError) as e:
+            raise ScreenError(f"Invalid value for '{field}': {_message(e)}")
+
+    sort_alias = _alias(sort_field)
+    queryset = queryset.filter(**{f'{sort_alias}__isnull': False})
+    if spec.get('cursor'):
+        value, pk = decode_cursor(spec['cursor'])
+        after = 'lt' if descending else 'gt'
+        try:
+            queryset = queryset.filter(
+                Q(**{f'{sort_alias}__{after}': value}) | Q(**{sort_alias: value, f'id__{after}': pk})
+            )
+        except (ValidationError, ValueError, TypeError):
+            raise ScreenError('Invalid cursor.')
+    ordering = [f'-{sort_alias}', '-id'] if descending else [sort_alias, 'id']
+    queryset = queryset.order_by(*ordering).values('id', *(_alias(field) for field in referenced))
+    return queryset, fields, sort_field, limit
+
+
+def run_screen(queryset, fields, sort_field, limit):
+    rows = list(queryset[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][_alias(sort_field)], rows[-1]['id'])
+    results = [{field: row[_alias(field)] for field in fields} for row in rows]
+    return results, next_cursor
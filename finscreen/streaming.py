@@ -0,0 +1,57 @@
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+
+class JSONErrorRenderer(BaseRenderer):
+    """
+    Base for renderers whose data goes out through frame_response(); the only
+    payloads they render themselves are errors, which are sent as JSON.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        response = (renderer_context or {}).get('response')
+        if response is not None:
+            response['Content-Type'] = 'application/json'
+        return JSONRenderer().render(data, renderer_context=renderer_context)
+
+
+class NDJSONRenderer(JSONErrorRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+
+class CSVRenderer(JSONErrorRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+
+RENDERERS = [NDJSONRenderer, CSVRenderer]
+FORMATS = {renderer.format: renderer.media_type for renderer in RENDERERS}
+
+
+def _chunks(frames, fmt, chunk_rows):
+    header = True
+    for frame in frames:
+        for start in range(0, len(frame), chunk_rows):
+            chunk = frame.iloc[start:start + chunk_rows]
+            if fmt == 'csv':
+                yield chunk.to_csv(index=False, header=header).encode()
+                header = False
+            else:
+                yield (chunk.to_json(orient='records', lines=True, date_format='iso').rstrip('\n') + '\n').encode()
+
+
+def frame_response(frames, fmt):
+    """
+    Stream DataFrames as NDJSON or CSV, `FINSCREEN_STREAM_CHUNK_ROWS` rows at a time.
+
+    Rows go straight from the frame to the socket without being turned into
+    Python dicts first. CSV frames must share the same columns.
+    """
+    return StreamingHttpResponse(
+        _chunks(frames, fmt, settings.FINSCREEN_STREAM_CHUNK_ROWS),
+        content_type=f'{FORMATS[fmt]}; charset=utf-8',
+    )
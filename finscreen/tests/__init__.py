@@ -0,0 +1,34 @@
+from datetime import date, timedelta
+import pandas as pd
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from finscreen import upstream
+
+CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'test-default'},
+    'upstream': {'BACKEND': 'finscreen.cache.BoundedLRUCache'},
+    'locks': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'test-locks'},
+}
+
+
+def bars(start, end):
+    """Flat daily bars for every weekday in [start, end]."""
+    return pd.DataFrame(
+        {'Open': 10.0, 'High': 11.0, 'Low': 9.0, 'Close': 10.5, 'Volume': 1000},
+        index=pd.bdate_range(start, end),
+    )
+
+
+def completed_bars(symbol, start, end):
+    # Nothing for today until the session has closed
+    return bars(start, min(end, date.today() - timedelta(days=1)))
+
+
+@override_settings(CACHES=CACHES, FINSCREEN_ARCHIVE_DIR=None)
+class UpstreamTestCase(TestCase):
+    """Starts every test with empty caches and a fresh upstream client."""
+
+    def setUp(self):
+        upstream.reset()
+        for alias in CACHES:
+            caches[alias].clear()
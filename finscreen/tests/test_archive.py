@@ -0,0 +1,92 @@
+import os
+import shutil
+import tempfile
+import threading
+from datetime import date
+from unittest import mock
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase
+from finscreen import archive
+
+
+def frame(days, close):
+    index = pd.to_datetime(days)
+    return pd.DataFrame({'Open': close, 'High': close, 'Low': close, 'Close': close, 'Volume': 100}, index=index)
+
+
+class ArchiveTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        override = self.settings(FINSCREEN_ARCHIVE_DIR=directory)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.directory = archive._directory('AAA')
+
+    def closes(self, start=date(2023, 1, 1), end=date(2024, 12, 31)):
+        records = archive.load('AAA', start, end)
+        return dict(zip(records['date'].astype(object), records['close']))
+
+    def test_last_append_wins_across_years(self):
+        archive.append('AAA', archive.to_records(frame(['2023-12-29', '2024-01-02'], 10.0)))
+        archive.append('AAA', archive.to_records(frame(['2024-01-02', '2024-01-03'], 11.0)))
+        expected = {date(2023, 12, 29): 10.0, date(2024, 1, 2): 11.0, date(2024, 1, 3): 11.0}
+        self.assertEqual(self.closes(), expected)
+        self.assertEqual(archive.compact('AAA'), [2023, 2024])
+        self.assertEqual(self.closes(), expected)
+        self.assertEqual(sorted(path.name for path in self.directory.glob('*.log')), [])
+        self.assertEqual(self.closes(date(2024, 1, 3), date(2024, 1, 3)), {date(2024, 1, 3): 11.0})
+
+    def test_torn_trailing_record_is_ignored(self):
+        archive.append('AAA', archive.to_records(frame(['2024-01-02'], 10.0)))
+        with open(self.directory / '2024.log', 'ab') as log:
+            log.write(b'\0' * (archive.DTYPE.itemsize // 2))
+        self.assertEqual(self.closes(), {date(2024, 1, 2): 10.0})
+
+    def test_interrupted_compaction_is_finished(self):
+        archive.append('AAA', archive.to_records(frame(['2024-01-02'], 10.0)))
+        os.replace(self.directory / '2024.log', self.directory / '2024.compacting')
+        archive.append('AAA', archive.to_records(frame(['2024-01-03'], 11.0)))
+        archive.compact('AAA')
+        archive.compact('AAA')
+        self.assertEqual(self.closes(), {date(2024, 1, 2): 10.0, date(2024, 1, 3): 11.0})
+        self.assertEqual(sorted(path.suffix for path in self.directory.iterdir()), ['.bin', '.lock'])
+
+    def test_append_during_compaction_is_kept(self):
+        archive.append('AAA', archive.to_records(frame(['2024-01-02'], 10.0)))
+        merging, release = threading.Event(), threading.Event()
+        dedupe = archive._dedupe
+
+        def slow_dedupe(records):
+            merging.set()
+            release.wait(5)
+            return dedupe(records)
+
+        with mock.patch.object(archive, '_dedupe', side_effect=slow_dedupe):
+            compaction = threading.Thread(target=archive.compact, args=['AAA'])
+            compaction.start()
+            merging.wait(5)
+            appending = threading.Thread(target=archive.append, args=['AAA', archive.to_records(frame(['2024-01-03'], 11.0))])
+            appending.start()
+            appending.join(0.2)
+            # Waits for the compaction instead of writing into the log it is folding in
+            self.assertTrue(appending.is_alive())
+            release.set()
+            compaction.join(5)
+            appending.join(5)
+        self.assertEqual(self.closes(), {date(2024, 1, 2): 10.0, date(2024, 1, 3): 11.0})
+
+    def test_ranges_round_trip(self):
+        self.assertEqual(archive.ranges('AAA'), [])
+        covered = [(date(2024, 1, 1), date(2024, 1, 31))]
+        archive.set_ranges('AAA', covered)
+        self.assertEqual(archive.ranges('AAA'), covered)
+        self.assertEqual(archive.symbols(), ['AAA'])
+
+    def test_to_frame_restores_missing_volume(self):
+        bars = frame(['2024-01-02', '2024-01-03'], 10.0)
+        bars['Volume'] = [np.nan, 5]
+        restored = archive.to_frame(archive.to_records(bars))
+        self.assertTrue(np.isnan(restored['Volume'].iloc[0]))
+        self.assertEqual(list(restored.index), [date(2024, 1, 2), date(2024, 1, 3)])
@@ -0,0 +1,125 @@
+import threading
+import time
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+from finscreen import cache, upstream
+from finscreen.singleflight import SingleFlight
+from finscreen.tests import UpstreamTestCase
+
+
+class SingleFlightTests(SimpleTestCase):
+    def test_concurrent_calls_share_one_run(self):
+        flight = SingleFlight()
+        release = threading.Event()
+        runs = []
+
+        def fn():
+            runs.append(1)
+            release.wait(5)
+            return 'value'
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(flight.do('key', fn))) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        while flight.stats['coalesced'] < 4:
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(runs), 1)
+        self.assertEqual(sorted(shared for value, shared in results), [False, True, True, True, True])
+        self.assertEqual({value for value, shared in results}, {'value'})
+
+    def test_waiters_receive_the_error(self):
+        flight = SingleFlight()
+        release = threading.Event()
+
+        def fn():
+            release.wait(5)
+            raise ValueError('boom')
+
+        errors = []
+
+        def run():
+            try:
+                flight.do('key', fn)
+            except ValueError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=run) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        while flight.stats['coalesced'] < 2:
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(errors), 3)
+
+
+@override_settings(FINSCREEN_UPSTREAM_RETRIES=0, FINSCREEN_UPSTREAM_CACHE_TTLS={'info': 60})
+class FetchTests(UpstreamTestCase):
+    def test_miss_then_hit(self):
+        calls = []
+        loader = lambda: calls.append(1) or {'price': 1}
+        first = cache.fetch('info', 'AAA', loader)
+        second = cache.fetch('info', 'aaa', loader)
+        self.assertEqual((first.status, second.status), ('MISS', 'HIT'))
+        self.assertEqual(second.value, {'price': 1})
+        self.assertEqual(len(calls), 1)
+
+    def test_params_are_part_of_the_key(self):
+        cache.fetch('info', 'AAA', lambda: 1, period='1d')
+        self.assertEqual(cache.fetch('info', 'AAA', lambda: 2, period='5d').value, 2)
+
+    def test_expired_entry_served_stale_when_upstream_fails(self):
+        key = cache.make_key('info', 'AAA', {})
+        caches['upstream'].set(key, ({'price': 1}, time.time() - 3600))
+
+        def failing():
+            raise ConnectionError('down')
+
+        result = cache.fetch('info', 'AAA', failing)
+        self.assertEqual((result.value, result.status), ({'price': 1}, 'STALE'))
+        with self.assertRaises(upstream.UpstreamError):
+            cache.fetch('info', 'BBB', failing)
+
+
+@override_settings(FINSCREEN_UPSTREAM_LOCK_CACHE='locks', FINSCREEN_UPSTREAM_LOCK_TIMEOUT=0.3)
+class CrossProcessLockTests(UpstreamTestCase):
+    def setUp(self):
+        super().setUp()
+        self.key = cache.make_key('info', 'AAA', {})
+        self.lock_key = f'lock:{self.key}'
+
+    def load(self, loader):
+        return cache._load(caches['upstream'], self.key, 60, loader, 'info')
+
+    def test_holder_releases_its_lock(self):
+        value, stored_at = self.load(lambda: 'value')
+        self.assertEqual(value, 'value')
+        self.assertIsNone(caches['locks'].get(self.lock_key))
+
+    def test_waiter_returns_the_holders_value(self):
+        caches['locks'].add(self.lock_key, 'other', 60)
+        threading.Timer(0.1, lambda: caches['upstream'].set(self.key, ('theirs', time.time()))).start()
+        value, stored_at = self.load(lambda: 'mine')
+        self.assertEqual(value, 'theirs')
+
+    def test_waiter_takes_over_a_released_lock(self):
+        caches['locks'].add(self.lock_key, 'other', 60)
+        threading.Timer(0.1, lambda: caches['locks'].delete(self.lock_key)).start()
+        seen = []
+        value, stored_at = self.load(lambda: seen.append(caches['locks'].get(self.lock_key)) or 'mine')
+        self.assertEqual(value, 'mine')
+        # The fetch ran holding the lock, which is released afterwards.
+        self.assertNotIn(seen[0], [None, 'other'])
+        self.assertIsNone(caches['locks'].get(self.lock_key))
+
+    def test_timed_out_waiter_leaves_the_holders_lock(self):
+        caches['locks'].add(self.lock_key, 'other', 60)
+        value, stored_at = self.load(lambda: 'mine')
+        self.assertEqual(value, 'mine')
+        self.assertEqual(caches['locks'].get(self.lock_key), 'other')
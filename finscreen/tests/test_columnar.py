@@ -0,0 +1,26 @@
+import io
+from unittest import mock
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from finscreen import history
+from finscreen.tests import UpstreamTestCase, completed_bars
+
+
+class ColumnarTests(UpstreamTestCase):
+    def test_errors_are_json(self):
+        for fmt in ['arrow', 'parquet']:
+            response = self.client.get(f'/api/history/AAA/?period=bogus&format={fmt}')
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response['Content-Type'], 'application/json')
+            self.assertIn('error', response.json())
+
+    def test_frames_round_trip(self):
+        with mock.patch.object(history, 'fetch_gap', side_effect=completed_bars):
+            arrow = self.client.get('/api/history/AAA/?period=1mo&format=arrow')
+            parquet = self.client.get('/api/history/AAA/?period=1mo&format=parquet')
+        self.assertEqual(arrow['Content-Type'], 'application/vnd.apache.arrow.stream')
+        frame = pa.ipc.open_stream(arrow.content).read_all().to_pandas()
+        self.assertEqual(list(frame.columns), history.OHLCV_COLUMNS)
+        self.assertEqual(frame.index.name, 'Date')
+        pd.testing.assert_frame_equal(pq.read_table(io.BytesIO(parquet.content)).to_pandas(), frame)
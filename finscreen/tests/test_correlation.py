@@ -0,0 +1,65 @@
+from datetime import date, timedelta
+import numpy as np
+import pandas as pd
+from django.db.models import F
+from django.test import TestCase, override_settings
+from finscreen import correlation
+from finscreen.models import Company, HistoricalData
+
+SYMBOLS = ['AAA', 'BBB', 'CCC']
+WINDOW = 20
+
+
+@override_settings(FINSCREEN_ARCHIVE_DIR=None)
+class IncrementalUpdateTests(TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        self.days = pd.bdate_range(end=date.today() - timedelta(days=1), periods=40).date
+        self.closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (len(self.days), len(SYMBOLS))), axis=0))
+        self.companies = [Company.objects.create(symbol=symbol, name=symbol) for symbol in SYMBOLS]
+        self.store(self.days[:-5])
+
+    def store(self, days):
+        index = {day: i for i, day in enumerate(self.days)}
+        HistoricalData.objects.bulk_create([
+            HistoricalData(company=company, date=day, high=0, low=0, close=round(self.closes[index[day], column], 4), volume=0)
+            for day in days
+            for column, company in enumerate(self.companies)
+            # A missing close is carried forward in the incremental path too
+            if not (company.symbol == 'BBB' and day == self.days[-3])
+        ])
+
+    def test_update_matches_full_build(self):
+        for decay in [1.0, correlation.decay_for(10)]:
+            state = correlation.build(SYMBOLS, WINDOW, decay)
+            self.store(self.days[-5:])
+            # Today's bar is still moving and must not be folded in
+            HistoricalData.objects.bulk_create([
+                HistoricalData(company=company, date=date.today(), high=0, low=0, close=1, volume=0)
+                for company in self.companies
+            ])
+            state, changed = correlation.refresh(state, WINDOW)
+            self.assertTrue(changed)
+            self.assertEqual(state['updates'], 5)
+            full = correlation.build(SYMBOLS, WINDOW, decay)
+            self.assertEqual(list(state['dates']), list(full['dates']))
+            self.assertEqual(state['dates'][-1].date(), self.days[-1])
+            for name in ['returns', 'last_close', 's1', 's2']:
+                np.testing.assert_allclose(state[name], full[name], rtol=0, atol=1e-12, err_msg=name)
+            for method in correlation.METHODS:
+                np.testing.assert_allclose(
+                    correlation.covariance(state, method)[0], correlation.covariance(full, method)[0], rtol=0, atol=1e-12,
+                )
+            self.assertFalse(correlation.refresh(state, WINDOW)[1])
+            HistoricalData.objects.filter(date__gte=self.days[-5]).delete()
+
+    def test_split_rebuilds_the_state(self):
+        state = correlation.build(SYMBOLS, WINDOW, 1.0)
+        self.assertFalse(correlation.refresh(state, WINDOW)[1])
+        split_day = self.days[-10]
+        Company.objects.filter(symbol='AAA').update(history_adjusted_to=split_day)
+        HistoricalData.objects.filter(company__symbol='AAA', date__lt=split_day).update(close=F('close') / 2)
+        state, changed = correlation.refresh(state, WINDOW)
+        self.assertTrue(changed)
+        self.assertEqual(state['updates'], 0)
+        np.testing.assert_allclose(state['s2'], correlation.build(SYMBOLS, WINDOW, 1.0)['s2'], rtol=0, atol=1e-12)
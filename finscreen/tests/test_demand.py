@@ -0,0 +1,56 @@
+from datetime import timedelta
+from unittest import mock
+from django.db import DatabaseError
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from finscreen import demand
+from finscreen.models import SymbolDemand
+
+
+@override_settings(FINSCREEN_DEMAND_HALF_LIFE=3600, FINSCREEN_DEMAND_FLUSH_INTERVAL=30)
+class DemandTests(TestCase):
+    def setUp(self):
+        demand._pending.clear()
+        self.addCleanup(demand._pending.clear)
+
+    def test_reads_are_counted_without_queries(self):
+        middleware = demand.DemandMiddleware(lambda request: None)
+        with self.assertNumQueries(0):
+            middleware.process_view(RequestFactory().get('/'), None, (), {'symbol': 'aaa'})
+            middleware.process_view(RequestFactory().post('/'), None, (), {'symbol': 'aaa'})
+            demand.record('AAA')
+        self.assertEqual(demand._pending, {'AAA': 2})
+
+    def test_flush_decays_the_stored_score_and_adds_reads(self):
+        SymbolDemand.objects.create(symbol='AAA', score=4, updated_at=timezone.now() - timedelta(hours=1))
+        demand.record('AAA')
+        demand.record('AAA')
+        demand.record('BBB')
+        self.assertEqual(demand.flush(), 2)
+        scores = dict(SymbolDemand.objects.values_list('symbol', 'score'))
+        self.assertAlmostEqual(scores['AAA'], 4, places=2)
+        self.assertEqual(scores['BBB'], 1)
+        self.assertEqual(demand._pending, {})
+        self.assertEqual(demand.flush(), 0)
+
+    def test_failed_flush_keeps_the_counts(self):
+        demand.record('AAA')
+        with mock.patch.object(demand.connection, 'cursor', side_effect=DatabaseError('gone')):
+            with self.assertRaises(DatabaseError):
+                demand.flush()
+        demand.record('AAA')
+        self.assertEqual(demand._pending, {'AAA': 2})
+
+    def test_flush_runs_after_the_response_once_due(self):
+        demand.record('AAA')
+        with mock.patch.object(demand, '_last_flush', demand.time.monotonic()):
+            demand.flush_due()
+            self.assertEqual(demand._pending, {'AAA': 1})
+        with mock.patch.object(demand, '_last_flush', demand.time.monotonic() - 30):
+            with mock.patch.object(demand.connection, 'cursor', side_effect=DatabaseError('gone')):
+                demand.flush_due()
+            self.assertEqual(demand._pending, {'AAA': 1})
+            demand._last_flush -= 30
+            demand.flush_due()
+        self.assertEqual(demand.scores(), {'AAA': mock.ANY})
+        self.assertEqual(demand._pending, {})
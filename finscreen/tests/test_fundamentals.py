@@ -0,0 +1,101 @@
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+import numpy as np
+import pandas as pd
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import SimpleTestCase
+from finscreen import fundamentals, screener
+from finscreen.models import Company, CompanyFinancials, FundamentalIndicator, GrowthMetric, IncomeStatement
+from finscreen.tests import UpstreamTestCase
+
+
+def statement(company, day, frequency=IncomeStatement.ANNUAL, **values):
+    """Store one period across the statement tables from {field: value}."""
+    for model, fields in fundamentals.PANEL_FIELDS.items():
+        model.objects.create(
+            company=company, date=day, frequency=frequency,
+            **{field: Decimal(str(value)) for field, value in values.items() if field in fields},
+        )
+
+
+class ComputeTests(UpstreamTestCase):
+    def setUp(self):
+        super().setUp()
+        self.company = Company.objects.create(symbol='AAA', name='AAA')
+
+    def computed(self):
+        indicators, growth = fundamentals.compute(fundamentals.load_panel())
+        return indicators.loc[self.company.id], growth.loc[self.company.id]
+
+    def test_ratios_average_the_prior_year_and_multiples_use_the_latest_period(self):
+        CompanyFinancials.objects.create(company=self.company, market_cap=Decimal(300), enterprise_value=Decimal(400))
+        statement(self.company, date(2022, 12, 31), revenue=100, cost_of_revenue=60, net_income=10, total_equity=100, total_assets=200, ebitda=20)
+        statement(self.company, date(2023, 12, 31), revenue=150, cost_of_revenue=90, net_income=15, total_equity=200, total_assets=300, ebitda=40)
+        indicators, growth = self.computed()
+        latest, earlier = indicators.loc[date(2023, 12, 31)], indicators.loc[date(2022, 12, 31)]
+        self.assertEqual(latest['return_on_equity'], 0.1)
+        self.assertEqual(latest['return_on_assets'], 0.06)
+        self.assertEqual(latest['gross_profit_margin'], 0.4)
+        self.assertEqual(earlier['return_on_equity'], 0.1)
+        self.assertEqual((latest['pe_ratio'], latest['ev_to_ebitda']), (20, 10))
+        self.assertTrue(np.isnan(earlier['pe_ratio']))
+        self.assertEqual((growth.loc[date(2023, 12, 31), 'revenue_growth'], growth.loc[date(2023, 12, 31), 'book_value_growth']), (0.5, 1))
+        self.assertTrue(growth.loc[date(2022, 12, 31)].isna().all())
+
+    def test_growth_needs_an_annual_period_about_a_year_earlier(self):
+        statement(self.company, date(2020, 12, 31), revenue=50, net_income=-10)
+        statement(self.company, date(2022, 12, 31), revenue=100, net_income=-10)
+        statement(self.company, date(2023, 12, 31), revenue=150, net_income=-5)
+        # Quarterly periods are not part of the panel
+        statement(self.company, date(2023, 9, 30), IncomeStatement.QUARTERLY, revenue=1000, net_income=500)
+        indicators, growth = self.computed()
+        self.assertEqual(list(growth.index), [date(2020, 12, 31), date(2022, 12, 31), date(2023, 12, 31)])
+        self.assertTrue(np.isnan(growth.loc[date(2022, 12, 31), 'revenue_growth']))
+        self.assertEqual(growth.loc[date(2023, 12, 31), 'revenue_growth'], 0.5)
+        # A shrinking loss reads as growth
+        self.assertEqual(growth.loc[date(2023, 12, 31), 'earnings_growth'], 0.5)
+
+
+class FitTests(SimpleTestCase):
+    def test_values_too_large_to_store_are_dropped(self):
+        frame = pd.DataFrame({
+            'return_on_equity': [0.123, 999.99, 1000, np.inf],
+            'pe_ratio': [5000, 1e8 - 1, 1e8, -np.inf],
+        })
+        fitted = fundamentals._fit(frame)
+        self.assertEqual(fitted['return_on_equity'].tolist()[:2], [0.12, 999.99])
+        self.assertEqual(fitted['pe_ratio'].tolist()[:2], [5000, 1e8 - 1])
+        self.assertTrue(fitted.iloc[2:].isna().all().all())
+
+
+class RefreshTests(UpstreamTestCase):
+    def setUp(self):
+        super().setUp()
+        self.aaa = Company.objects.create(symbol='AAA', name='AAA')
+        self.bbb = Company.objects.create(symbol='BBB', name='BBB')
+        statement(self.aaa, date(2023, 12, 31), revenue=100, net_income=10)
+        statement(self.bbb, date(2023, 12, 31), revenue=100, net_income=20)
+
+    def test_only_stale_companies_are_recomputed(self):
+        self.assertEqual(fundamentals.stale_companies(), [self.aaa.id, self.bbb.id])
+        self.assertEqual(fundamentals.refresh(), (2, 2))
+        self.assertEqual(fundamentals.stale_companies(), [])
+        self.assertEqual(fundamentals.refresh(), (0, 0))
+        statement(self.aaa, date(2024, 3, 31), IncomeStatement.QUARTERLY, revenue=30)
+        self.assertEqual(fundamentals.stale_companies(), [])
+        statement(self.aaa, date(2024, 12, 31), revenue=120, net_income=12)
+        self.assertEqual(fundamentals.stale_companies(), [self.aaa.id])
+        self.assertEqual(fundamentals.refresh(), (1, 2))
+        self.assertEqual(GrowthMetric.objects.get(company=self.aaa, date=date(2024, 12, 31)).revenue_growth, Decimal('0.2'))
+
+    def test_command_recomputes_symbols_and_clears_scores(self):
+        caches['default'].set(screener.FHS_CACHE_KEY, 'scores')
+        out = StringIO()
+        call_command('compute_fundamentals', 'bbb', stdout=out)
+        self.assertIn('Computed 1 periods for 1 companies', out.getvalue())
+        self.assertEqual(FundamentalIndicator.objects.get().net_profit_margin, Decimal('0.2'))
+        self.assertIsNone(caches['default'].get(screener.FHS_CACHE_KEY))
+        call_command('compute_fundamentals', '--full', stdout=out)
+        self.assertEqual(FundamentalIndicator.objects.count(), 2)
@@ -0,0 +1,159 @@
+import tempfile
+from datetime import date, timedelta
+from unittest import mock
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase, override_settings
+from finscreen import archive, history, views
+from finscreen.models import Company, HistoricalData, HistoricalDataRange
+from finscreen.tests import UpstreamTestCase, bars, completed_bars
+
+
+def no_bars(symbol=None, start=None, end=None):
+    return pd.DataFrame(columns=history.OHLCV_COLUMNS)
+
+
+class MissingRangesTests(SimpleTestCase):
+    def test_nothing_covered(self):
+        self.assertEqual(
+            history.missing_ranges([], date(2024, 1, 1), date(2024, 1, 31)),
+            [(date(2024, 1, 1), date(2024, 1, 31))],
+        )
+
+    def test_holes_between_and_after_covered_ranges(self):
+        covered = [(date(2023, 12, 1), date(2024, 1, 5)), (date(2024, 1, 10), date(2024, 1, 20))]
+        self.assertEqual(
+            history.missing_ranges(covered, date(2024, 1, 1), date(2024, 1, 31)),
+            [(date(2024, 1, 6), date(2024, 1, 9)), (date(2024, 1, 21), date(2024, 1, 31))],
+        )
+
+    def test_fully_covered(self):
+        covered = [(date(2024, 1, 1), date(2024, 2, 1))]
+        self.assertEqual(history.missing_ranges(covered, date(2024, 1, 5), date(2024, 1, 20)), [])
+
+    def test_merge_joins_adjacent_and_overlapping_ranges(self):
+        ranges = [(date(2024, 1, 10), date(2024, 1, 20)), (date(2024, 1, 1), date(2024, 1, 9)), (date(2024, 1, 15), date(2024, 1, 25))]
+        self.assertEqual(history._merge_ranges(ranges), [(date(2024, 1, 1), date(2024, 1, 25))])
+
+
+@override_settings(FINSCREEN_UPSTREAM_RETRIES=0)
+class EnsureTests(UpstreamTestCase):
+    def setUp(self):
+        super().setUp()
+        self.end = date.today()
+        self.start = self.end - timedelta(days=30)
+
+    def covered(self, company):
+        return list(HistoricalDataRange.objects.filter(company=company).values_list('start_date', 'end_date'))
+
+    def test_unknown_symbol_is_not_stored(self):
+        with mock.patch.object(history, 'fetch_gap', side_effect=no_bars):
+            response = self.client.get('/api/history/NOSUCH/')
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(Company.objects.filter(symbol='NOSUCH').exists())
+
+    def test_company_added_once_bars_arrive(self):
+        with mock.patch.object(history, 'fetch_gap', side_effect=lambda symbol, start, end: bars(start, end)):
+            company, fetched = history.ensure('new', self.start, self.end)
+        self.assertEqual(company.symbol, 'NEW')
+        self.assertEqual(fetched, [(self.start, self.end)])
+        self.assertEqual(self.covered(company), [(self.start, self.end - timedelta(days=1))])
+        self.assertEqual(HistoricalData.objects.filter(company=company).count(), len(pd.bdate_range(self.start, self.end)))
+
+    def test_empty_fetch_is_not_recorded_as_covered(self):
+        company = Company.objects.create(symbol='AAA', name='AAA')
+        with mock.patch.object(history, 'fetch_gap', side_effect=no_bars):
+            company, fetched = history.ensure('AAA', self.start, self.end)
+        self.assertEqual(fetched, [])
+        self.assertEqual(self.covered(company), [])
+        self.assertEqual(history.plan(company, self.start, self.end), [(self.start, self.end)])
+
+    def test_weekend_gap_is_covered_without_bars(self):
+        company = Company.objects.create(symbol='AAA', name='AAA')
+        saturday = date(2024, 1, 6)
+        history.store(company, [(saturday, saturday + timedelta(days=1))], [no_bars()])
+        self.assertEqual(self.covered(company), [(saturday, saturday + timedelta(days=1))])
+
+    def test_source_reports_what_was_fetched(self):
+        with mock.patch.object(history, 'fetch_gap', side_effect=completed_bars) as fetch:
+            first = self.client.get('/api/history/AAA/?period=1mo')
+            second = self.client.get('/api/history/AAA/?period=1mo')
+            third = self.client.get('/api/history/AAA/?period=1mo')
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first['X-Data-Source'], 'db+upstream')
+        # Only today's open tail is asked for again, and it has no bars yet.
+        self.assertEqual(second['X-Data-Source'], 'db')
+        self.assertEqual(third['X-Data-Source'], 'db')
+        self.assertEqual(fetch.call_count, 2)
+        self.assertEqual(len(third.json()), len(first.json()))
+
+    def split_bars(self, split_day):
+        # Bars as yfinance returns them after a 2:1 split: everything before it halved
+        def fetch(symbol, start, end):
+            frame = completed_bars(symbol, start, end)
+            before = frame.index.date < split_day
+            frame.loc[before, history.OHLCV_COLUMNS[:4]] /= 2
+            frame['Dividends'] = 0.0
+            frame['Stock Splits'] = np.where(frame.index.date == split_day, 2.0, 0.0)
+            return frame
+        return fetch
+
+    def test_new_split_refetches_older_bars(self):
+        split_day = pd.bdate_range(end=self.end - timedelta(days=1), periods=3)[0].date()
+        with mock.patch.object(history, 'fetch_gap', side_effect=completed_bars):
+            company, _ = history.ensure('AAA', self.start, split_day - timedelta(days=1))
+        with mock.patch.object(history, 'fetch_gap', side_effect=self.split_bars(split_day)):
+            company, fetched = history.ensure('AAA', self.start, self.end)
+        company.refresh_from_db()
+        self.assertEqual(company.history_adjusted_to, split_day)
+        self.assertEqual(self.covered(company), [(self.start, self.end - timedelta(days=1))])
+        closes = dict(HistoricalData.objects.filter(company=company).values_list('date', 'close'))
+        self.assertEqual({float(close) for day, close in closes.items() if day < split_day}, {5.25})
+        self.assertEqual({float(close) for day, close in closes.items() if day >= split_day}, {10.5})
+        self.assertEqual(len(closes), len(pd.bdate_range(self.start, self.end - timedelta(days=1))))
+
+    def test_known_actions_keep_coverage(self):
+        split_day = self.end - timedelta(days=5)
+        company = Company.objects.create(symbol='AAA', name='AAA', history_adjusted_to=split_day)
+        with mock.patch.object(history, 'fetch_gap', side_effect=completed_bars):
+            history.ensure('AAA', self.start, self.end)
+        older = self.start - timedelta(days=20)
+        frame = self.split_bars(pd.bdate_range(older, periods=3)[-1].date())('AAA', older, self.start - timedelta(days=1))
+        self.assertEqual(history.latest_action([frame]), pd.bdate_range(older, periods=3)[-1].date())
+        self.assertIsNone(history.store(company, [(older, self.start - timedelta(days=1))], [frame]))
+        self.assertEqual(self.covered(company), [(older, self.end - timedelta(days=1))])
+
+    def test_new_split_trims_archive_coverage(self):
+        split_day = self.end - timedelta(days=5)
+        with tempfile.TemporaryDirectory() as directory, self.settings(FINSCREEN_ARCHIVE_DIR=directory):
+            archive.set_ranges('AAA', [(self.start, split_day + timedelta(days=1))])
+            frame = self.split_bars(split_day)('AAA', split_day, split_day)
+            history._append_archive('AAA', [frame], [(split_day, split_day)], split_day)
+            self.assertEqual(archive.ranges('AAA'), [(split_day, split_day + timedelta(days=1))])
+
+
+class PayloadTests(UpstreamTestCase):
+    def live_bars(self, period, interval):
+        # Shaped like yfinance: tz-aware index, actions columns, unrounded prices
+        frame = completed_bars('AAA', date.today() - timedelta(days=30), date.today()) + 0.0049
+        frame['Volume'] = 1000
+        frame['Dividends'] = 0.0
+        frame['Stock Splits'] = 0.0
+        frame.index = frame.index.tz_localize('America/New_York').rename('Date')
+        if interval == '1wk':
+            frame = frame.iloc[::5]
+        return frame
+
+    def test_stored_and_live_payloads_match(self):
+        ticker = mock.Mock()
+        ticker.return_value.history.side_effect = lambda period, interval: self.live_bars(period, interval)
+        with mock.patch.object(history, 'fetch_gap', side_effect=completed_bars), mock.patch.object(views.yf, 'Ticker', ticker):
+            stored = self.client.get('/api/history/AAA/?period=1mo&interval=1d').json()
+            live = self.client.get('/api/history/AAA/?period=max&interval=1d').json()
+            weekly = self.client.get('/api/history/AAA/?period=1mo&interval=1wk').json()
+        self.assertEqual(list(stored[0]), ['Date'] + history.OHLCV_COLUMNS)
+        self.assertEqual(list(live[0]), list(stored[0]))
+        self.assertEqual(list(weekly[0]), list(stored[0]))
+        live_by_date = {row['Date']: row for row in live}
+        for row in stored:
+            self.assertEqual(live_by_date[row['Date']], row)
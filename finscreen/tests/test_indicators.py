@@ -0,0 +1,30 @@
+from datetime import date, timedelta
+import numpy as np
+import pandas as pd
+from django.test import TestCase, override_settings
+from finscreen import indicators
+from finscreen.models import Company, HistoricalData
+
+
+@override_settings(FINSCREEN_ARCHIVE_DIR=None)
+class LoadPanelTests(TestCase):
+    def test_no_rows_gives_empty_panels(self):
+        panels = indicators.load_panel(['UNKNOWN'])
+        self.assertEqual(sorted(panels), ['close', 'high', 'low', 'volume'])
+        self.assertTrue(panels['close'].empty)
+
+    def test_unknown_symbols_are_not_found(self):
+        response = self.client.get('/api/signals/technical/?symbols=UNKNOWN')
+        self.assertEqual(response.status_code, 404)
+
+    def test_rows_pivot_to_dates_by_symbols(self):
+        days = [date.today() - timedelta(days=offset) for offset in [3, 2, 1]]
+        for symbol in ['AAA', 'BBB']:
+            company = Company.objects.create(symbol=symbol, name=symbol)
+            HistoricalData.objects.bulk_create([
+                HistoricalData(company=company, date=day, high=11, low=9, close=10 + i, volume=100) for i, day in enumerate(days)
+            ])
+        close = indicators.load_panel(['AAA', 'BBB'])['close']
+        self.assertEqual(list(close.columns), ['AAA', 'BBB'])
+        self.assertEqual(list(close.index), list(pd.to_datetime(days)))
+        np.testing.assert_array_equal(close['AAA'].to_numpy(), [10.0, 11.0, 12.0])
@@ -0,0 +1,30 @@
+from unittest import mock
+from finscreen import scraper, upstream
+from finscreen.models import Company
+from finscreen.tests import UpstreamTestCase
+INFO = {'symbol': 'AAA', 'longName': 'Aaa Inc.', 'shortName': 'Aaa', 'sector': 'Technology', 'open': 10.5}
+
+
+class StoredInfoTests(UpstreamTestCase):
+    def scrape(self, info):
+        scraper.write_batch({info['symbol']: scraper.normalize(info['symbol'], info, None)})
+
+    def test_unscraped_company_is_not_found(self):
+        Company.objects.create(symbol='AAA', name='AAA')
+        self.assertIsNone(scraper.load_info('AAA'))
+        response = self.client.get('/api/info/AAA/?source=db')
+        self.assertEqual(response.status_code, 404)
+
+    def test_unscraped_company_is_not_served_when_upstream_is_down(self):
+        Company.objects.create(symbol='AAA', name='AAA')
+        with mock.patch.object(upstream, 'call', side_effect=upstream.UpstreamError()):
+            response = self.client.get('/api/info/AAA/')
+        self.assertEqual(response.status_code, 503)
+
+    def test_scraped_company_round_trips(self):
+        self.scrape(INFO)
+        response = self.client.get('/api/info/AAA/?source=db')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Data-Source'], 'db')
+        info = response.json()
+        self.assertEqual((info['longName'], info['sector'], info['open']), ('Aaa Inc.', 'Technology', 10.5))
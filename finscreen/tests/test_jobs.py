@@ -0,0 +1,66 @@
+from datetime import timedelta
+from unittest import mock
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from finscreen import jobs, scraper
+from finscreen.models import Company, ScrapJobItem
+
+
+def fetched(symbol, statements=True):
+    if symbol == 'BAD':
+        return None, LookupError('No data for BAD'), 0.01
+    return scraper.normalize(symbol, {'symbol': symbol, 'longName': f'{symbol} Inc.'}, None), None, 0.01
+
+
+class EnqueueTests(TestCase):
+    def test_symbols_are_normalized(self):
+        job = jobs.enqueue([' aapl', 'AAPL', 'msft ', ''])
+        self.assertEqual(list(job.items.order_by('id').values_list('symbol', flat=True)), ['AAPL', 'MSFT'])
+
+    def test_bad_payloads_are_400(self):
+        for payload in [{'symbols': 'AAPL'}, {'symbols': 5}, {'symbols': []}, {'symbols': ['AAPL', 5]}, {'symbols': [' ']}, ['AAPL']]:
+            response = self.client.post('/api/scrap/', payload, content_type='application/json')
+            self.assertEqual(response.status_code, 400, payload)
+        self.assertFalse(ScrapJobItem.objects.exists())
+
+    def test_queued_job_reports_its_items(self):
+        response = self.client.post('/api/scrap/', {'symbols': ['aapl']}, content_type='application/json')
+        self.assertEqual(response.status_code, 202)
+        status = self.client.get(f"/api/scrap/{response.json()['job_id']}/").json()
+        self.assertEqual(list(status['symbols']), ['AAPL'])
+        self.assertFalse(status['done'])
+
+
+@override_settings(FINSCREEN_SCRAP_JOB_LEASE=600, FINSCREEN_SCRAP_JOB_MAX_ATTEMPTS=2)
+class ClaimTests(TestCase):
+    def test_claimed_items_are_not_claimed_again(self):
+        jobs.enqueue(['AAA', 'BBB', 'CCC'])
+        first = jobs.claim(2)
+        self.assertEqual([item.symbol for item in first], ['AAA', 'BBB'])
+        self.assertEqual([item.symbol for item in jobs.claim(2)], ['CCC'])
+        self.assertEqual(jobs.claim(2), [])
+        self.assertEqual(ScrapJobItem.objects.get(symbol='AAA').attempts, 1)
+
+    def test_expired_leases_are_picked_up_until_max_attempts(self):
+        jobs.enqueue(['AAA'])
+        jobs.claim(1)
+        expired = timezone.now() - timedelta(seconds=601)
+        ScrapJobItem.objects.update(locked_at=expired)
+        self.assertEqual([item.symbol for item in jobs.claim(1)], ['AAA'])
+        ScrapJobItem.objects.update(locked_at=expired)
+        self.assertEqual(jobs.claim(1), [])
+        item = ScrapJobItem.objects.get()
+        self.assertEqual((item.status, item.error), (ScrapJobItem.FAILED, 'Worker lease expired'))
+
+
+class ProcessTests(TestCase):
+    def test_results_are_recorded_per_item(self):
+        job = jobs.enqueue(['AAA', 'BAD'])
+        with mock.patch.object(jobs, 'timed_fetch', side_effect=fetched):
+            jobs.process(jobs.claim(10), max_workers=2)
+        items = {item.symbol: item for item in job.items.all()}
+        self.assertEqual(items['AAA'].status, ScrapJobItem.DONE)
+        self.assertGreater(items['AAA'].sections_written, 0)
+        self.assertEqual((items['BAD'].status, items['BAD'].error), (ScrapJobItem.FAILED, 'No data for BAD'))
+        self.assertEqual(Company.objects.get(symbol='AAA').name, 'AAA Inc.')
+        self.assertTrue(jobs.job_status(job)['done'])
@@ -0,0 +1,59 @@
+import json
+import shutil
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+from django.core.management import call_command
+from django.test import TestCase
+from finscreen import scraper
+from finscreen.management.commands import load_universe
+from finscreen.models import Company
+
+
+def fetch_symbol(symbol):
+    if symbol == 'BAD':
+        raise LookupError(f'No data for {symbol}')
+    return {'symbol': symbol, 'longName': f'{symbol} Inc.'}, None
+
+
+class LoadUniverseTests(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.listing = Path(directory) / 'listing.csv'
+        self.checkpoint = Path(directory) / 'listing.csv.checkpoint'
+
+    def load(self, symbols, *args):
+        self.listing.write_text('Symbol,Name\n' + ''.join(f'{symbol},{symbol} Inc.\n' for symbol in symbols))
+        with mock.patch.object(scraper, 'fetch_symbol', side_effect=fetch_symbol) as fetch:
+            call_command('load_universe', self.listing, '--processes', '1', '--batch-size', '2', *args, stdout=StringIO())
+        return sorted(call.args[0] for call in fetch.call_args_list)
+
+    def test_read_symbols(self):
+        self.listing.write_text('# listing\naapl\nMSFT\n\naapl\n')
+        self.assertEqual(load_universe.read_symbols(self.listing), ['AAPL', 'MSFT'])
+        self.listing.write_text('name,ticker\nApple,aapl\n')
+        self.assertEqual(load_universe.read_symbols(self.listing), ['AAPL'])
+
+    def test_checkpoint_records_progress(self):
+        self.assertEqual(self.load(['AAA', 'BAD', 'CCC']), ['AAA', 'BAD', 'CCC'])
+        lines = [json.loads(line) for line in self.checkpoint.read_text().splitlines()]
+        self.assertEqual(lines, [{'done': ['AAA'], 'failed': {'BAD': 'fetch: No data for BAD'}}, {'done': ['CCC'], 'failed': {}}])
+        self.assertEqual(sorted(Company.objects.values_list('symbol', flat=True)), ['AAA', 'CCC'])
+
+    def test_resumed_load_skips_checkpointed_symbols(self):
+        self.checkpoint.write_text(
+            json.dumps({'done': ['AAA'], 'failed': {'BAD': 'fetch: No data for BAD'}}) + '\n'
+            # Torn line from an interrupted run
+            + '{"done": ["CC'
+        )
+        self.assertEqual(self.load(['AAA', 'BAD', 'CCC', 'DDD']), ['CCC', 'DDD'])
+        self.assertEqual(self.load(['AAA', 'BAD', 'CCC', 'DDD']), [])
+        self.assertEqual(self.load(['AAA', 'BAD', 'CCC', 'DDD'], '--retry-failed'), ['BAD'])
+
+    def test_later_success_clears_a_failure(self):
+        self.checkpoint.write_text(
+            json.dumps({'done': [], 'failed': {'AAA': 'fetch: timeout'}}) + '\n' + json.dumps({'done': ['AAA'], 'failed': {}}) + '\n'
+        )
+        self.assertEqual(load_universe.read_checkpoint(self.checkpoint), ({'AAA': None}, {}))
@@ -0,0 +1,60 @@
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase
+from finscreen import metrics
+from finscreen.models import Company
+from finscreen.tests import UpstreamTestCase
+
+
+class HistogramTests(SimpleTestCase):
+    def test_buckets_are_cumulative(self):
+        histogram = metrics.Histogram('test_seconds', 'Test.', ['route'], buckets=(0.1, 1))
+        for value in [0.05, 0.5, 5]:
+            histogram.observe(value, 'a"b')
+        self.assertEqual(histogram.render(), [
+            '# HELP test_seconds Test.',
+            '# TYPE test_seconds histogram',
+            'test_seconds_bucket{route="a\\"b",le="0.1"} 1',
+            'test_seconds_bucket{route="a\\"b",le="1"} 2',
+            'test_seconds_bucket{route="a\\"b",le="+Inf"} 3',
+            'test_seconds_sum{route="a\\"b"} 5.55',
+            'test_seconds_count{route="a\\"b"} 3',
+        ])
+
+    def test_counter(self):
+        counter = metrics.Counter('test_total', 'Test.', ['endpoint', 'status'])
+        counter.inc('info', 'HIT')
+        counter.inc('info', 'HIT', amount=2)
+        self.assertEqual(counter.render()[-1], 'test_total{endpoint="info",status="HIT"} 3')
+
+
+class MiddlewareTests(UpstreamTestCase):
+    def route_count(self, route):
+        series = {key: values[-1] for key, values in metrics.request_seconds.series.items()}
+        return sum(count for (name, method, status), count in series.items() if name == route and status == 200)
+
+    def test_requests_are_timed_by_route(self):
+        Company.objects.create(symbol='AAA', name='AAA')
+        before = self.route_count('api/screen/')
+        response = self.client.post('/api/screen/', {'fields': ['symbol']}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.route_count('api/screen/'), before + 1)
+        timing = dict(entry.split(';', 1) for entry in response['Server-Timing'].split(', '))
+        self.assertIn('total', timing)
+        self.assertIn('desc="1 queries"', timing['db'])
+
+    def test_spans_show_up_in_server_timing(self):
+        def view(request):
+            with metrics.span('work'):
+                return HttpResponse()
+        response = metrics.MetricsMiddleware(view)(RequestFactory().get('/'))
+        self.assertRegex(response['Server-Timing'], r'^total;dur=[\d.]+, work;dur=[\d.]+$')
+
+    def test_metrics_endpoint(self):
+        metrics.observe_cache('test-endpoint', 'HIT')
+        metrics.observe_cache('test-endpoint', 'MISS')
+        response = self.client.get('/api/metrics/')
+        self.assertEqual(response['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+        lines = response.content.decode().splitlines()
+        self.assertIn('finscreen_cache_hit_ratio{endpoint="test-endpoint"} 0.5', lines)
+        self.assertIn('# TYPE finscreen_request_duration_seconds histogram', lines)
+        self.assertIn('finscreen_upstream_events_total{event="calls"} 0', lines)
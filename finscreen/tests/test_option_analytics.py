@@ -0,0 +1,37 @@
+import numpy as np
+from django.test import SimpleTestCase
+from finscreen import option_analytics
+
+
+class DividendYieldTests(SimpleTestCase):
+    def test_rate_over_spot(self):
+        # A 0.4% yield, which newer yfinance reports as dividendYield 0.4
+        info = {'dividendRate': 0.8, 'dividendYield': 0.4, 'trailingAnnualDividendYield': 0.0038}
+        self.assertAlmostEqual(option_analytics._dividend_yield(info, 200.0), 0.004)
+
+    def test_trailing_yield_without_a_rate(self):
+        info = {'dividendYield': 0.4, 'trailingAnnualDividendYield': 0.0038}
+        self.assertAlmostEqual(option_analytics._dividend_yield(info, 200.0), 0.0038)
+
+    def test_no_dividend(self):
+        self.assertEqual(option_analytics._dividend_yield({'dividendRate': None}, 200.0), 0.0)
+
+
+class ImpliedVolatilityTests(SimpleTestCase):
+    def test_round_trip(self):
+        strike = np.array([[80.0, 100.0, 120.0], [80.0, 100.0, 120.0]])
+        years = np.array([[0.1], [1.0]])
+        is_call = np.array([True, False, True])
+        vol = np.array([[0.45, 0.3, 0.25], [0.35, 0.2, 0.15]])
+        premium = option_analytics.price(100.0, strike, years, 0.04, 0.004, vol, is_call)
+        iv = option_analytics.implied_volatility(premium, 100.0, strike, years, 0.04, 0.004, is_call)
+        np.testing.assert_allclose(iv, vol, atol=1e-5)
+
+    def test_premium_below_intrinsic_is_nan(self):
+        iv = option_analytics.implied_volatility([1.0], 100.0, [80.0], [0.5], 0.04, 0.0, [True])
+        self.assertTrue(np.isnan(iv[0]))
+
+    def test_max_pain(self):
+        strikes = np.array([90.0, 100.0, 110.0])
+        self.assertEqual(option_analytics.max_pain(strikes, np.array([0, 10, 50]), np.array([50, 10, 0])), 100.0)
+        self.assertIsNone(option_analytics.max_pain(np.array([]), np.array([]), np.array([])))
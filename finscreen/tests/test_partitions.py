@@ -0,0 +1,62 @@
+import unittest
+from datetime import date
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TransactionTestCase
+from finscreen.management.commands import create_partitions
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'Partitioning needs PostgreSQL.')
+class CreatePartitionsTests(TransactionTestCase):
+    # A scratch table partitioned like stock_price and historical_data in ddl.sql
+    table = 'partition_probe'
+
+    def setUp(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'CREATE TABLE {self.table} (id serial, date date NOT NULL, value integer, PRIMARY KEY (id, date)) PARTITION BY RANGE (date)')
+            cursor.execute(f'CREATE TABLE {self.table}_default PARTITION OF {self.table} DEFAULT')
+            cursor.execute(
+                f"INSERT INTO {self.table} (date, value) SELECT d, 1 FROM generate_series(%s::date, %s::date, interval '1 day') d",
+                [date(2024, 1, 15), date(2024, 3, 10)],
+            )
+
+    def tearDown(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE {self.table}')
+
+    def partitions(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT tableoid::regclass::text, count(*) FROM {self.table} GROUP BY 1 ORDER BY 1')
+            return dict(cursor.fetchall())
+
+    def run_command(self, *args):
+        out = StringIO()
+        with mock.patch.object(create_partitions, 'PARTITIONED_TABLES', [self.table]), \
+                mock.patch.object(create_partitions, 'date', wraps=date) as today:
+            today.today.return_value = date(2024, 2, 20)
+            call_command('create_partitions', *args, stdout=out)
+        return out.getvalue()
+
+    def test_rows_move_out_of_the_default_partition(self):
+        out = self.run_command('--since', '2024-01', '--ahead', '1')
+        self.assertIn(f'{self.table}_2024_01: created, 17 row(s) moved', out)
+        self.assertEqual(self.partitions(), {
+            f'{self.table}_2024_01': 17,
+            f'{self.table}_2024_02': 29,
+            f'{self.table}_2024_03': 10,
+        })
+
+    def test_existing_partitions_are_kept(self):
+        self.run_command('--since', '2024-01', '--ahead', '0')
+        out = self.run_command('--since', '2024-01', '--ahead', '1')
+        self.assertEqual(out.strip(), f'{self.table}_2024_03: created, 10 row(s) moved from the default partition')
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {self.table} (date, value) VALUES ('2024-03-31', 2) RETURNING tableoid::regclass::text")
+            self.assertEqual(cursor.fetchone()[0], f'{self.table}_2024_03')
+
+    def test_bad_since(self):
+        with self.assertRaises(CommandError):
+            self.run_command('--since', 'March')
@@ -0,0 +1,70 @@
+import heapq
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+from django.test import SimpleTestCase, TestCase
+from finscreen import scheduler
+from finscreen.models import Company
+
+# Wednesday 10:00 and 20:00 in New York
+OPEN = datetime(2024, 1, 3, 15, tzinfo=timezone.utc)
+CLOSED = datetime(2024, 1, 4, 1, tzinfo=timezone.utc)
+
+
+class PlanTests(TestCase):
+    def company(self, symbol, price_age, statements_age=timedelta(0), now=OPEN):
+        Company.objects.create(
+            symbol=symbol, name=symbol, last_refreshed=now - price_age, statements_refreshed=now - statements_age
+        )
+
+    def plan(self, now=OPEN, scores=None):
+        with mock.patch.object(scheduler.demand, 'scores', return_value=scores or {}):
+            heap = scheduler.plan(now)
+        return [heapq.heappop(heap) for _ in range(len(heap))]
+
+    def test_stalest_first_and_fresh_left_out(self):
+        self.company('FRESH', timedelta(minutes=5))
+        self.company('STALE', timedelta(minutes=30))
+        self.company('STALER', timedelta(minutes=60), statements_age=timedelta(days=8))
+        planned = self.plan()
+        self.assertEqual([(symbol, due) for priority, symbol, due in planned], [
+            ('STALER', ['price', 'statements']), ('STALE', ['price']),
+        ])
+        # Two cadences overdue, doubled while the market is open
+        self.assertAlmostEqual(-planned[1][0], 4)
+
+    def test_demand_raises_priority_and_adds_unscraped_symbols(self):
+        self.company('AAA', timedelta(minutes=30))
+        self.company('BBB', timedelta(minutes=30))
+        planned = self.plan(scores={'BBB': 50, 'NEW': 1})
+        self.assertEqual([symbol for priority, symbol, due in planned], ['NEW', 'BBB', 'AAA'])
+        self.assertEqual(planned[0][2], ['price', 'statements'])
+
+    def test_prices_wait_longer_off_hours(self):
+        self.company('AAA', timedelta(minutes=30), now=CLOSED)
+        self.company('BBB', timedelta(hours=4), now=CLOSED)
+        planned = self.plan(CLOSED)
+        self.assertEqual([symbol for priority, symbol, due in planned], ['BBB'])
+        self.assertAlmostEqual(-planned[0][0], 2)
+
+
+class TakeTests(SimpleTestCase):
+    def heap(self, *entries):
+        heap = list(entries)
+        heapq.heapify(heap)
+        return heap
+
+    def test_budget_is_respected(self):
+        heap = self.heap((-3, 'AAA', ['price']), (-2, 'BBB', ['price']), (-1, 'CCC', ['price']))
+        self.assertEqual(scheduler.take(heap, 2), [('AAA', ['price']), ('BBB', ['price'])])
+        self.assertEqual(len(heap), 1)
+
+    def test_statements_that_do_not_fit_fall_back_to_price(self):
+        statements = scheduler.cost(['price', 'statements'])
+        heap = self.heap((-3, 'AAA', ['price', 'statements']), (-2, 'BBB', ['statements']), (-1, 'CCC', ['price']))
+        self.assertEqual(scheduler.take(heap, statements - 1), [('AAA', ['price']), ('CCC', ['price'])])
+        heap = self.heap((-3, 'AAA', ['price', 'statements']), (-2, 'BBB', ['price']))
+        self.assertEqual(scheduler.take(heap, statements + 1), [('AAA', ['price', 'statements']), ('BBB', ['price'])])
+
+    def test_skipped_symbols_cost_nothing(self):
+        heap = self.heap((-3, 'AAA', ['price']), (-2, 'BBB', ['price']))
+        self.assertEqual(scheduler.take(heap, 1, skip={'AAA'}), [('BBB', ['price'])])
@@ -0,0 +1,53 @@
+import pandas as pd
+from django.test import TestCase
+from finscreen import scraper
+from finscreen.models import Address, Company, IncomeStatement, Officer, SectionFingerprint
+
+INFO = {
+    'symbol': 'AAA', 'longName': 'Aaa Inc.', 'sector': 'Technology', 'currency': 'USD', 'city': 'Austin', 'open': 10.5,
+    'companyOfficers': [{'name': 'Jane Roe', 'title': 'CEO', 'totalPay': 100}],
+}
+
+
+def statements(revenue):
+    frame = pd.DataFrame({pd.Timestamp('2023-12-31'): {'Total Revenue': revenue, 'Net Income': 10.0}})
+    return {('income_statement', IncomeStatement.ANNUAL): frame}
+
+
+class WritePayloadsTests(TestCase):
+    def scrape(self, info=INFO, frames=None):
+        return scraper.write_payloads([scraper.normalize(info['symbol'], info, frames)])['AAA']
+
+    def test_first_scrape_writes_every_section(self):
+        counts = self.scrape(frames=statements(100.0))
+        self.assertEqual(counts, {'written': len(scraper.FINGERPRINT_SECTIONS), 'skipped': 0})
+        self.assertEqual(Address.objects.get().city, 'Austin')
+        self.assertEqual(Officer.objects.get().title, 'CEO')
+        self.assertEqual(IncomeStatement.objects.get().revenue, 100)
+        self.assertEqual(SectionFingerprint.objects.count(), len(scraper.FINGERPRINT_SECTIONS))
+
+    def test_unchanged_sections_are_not_written(self):
+        self.scrape(frames=statements(100.0))
+        # Tampered rows stay as they are, so the rescrape left them alone
+        Address.objects.update(city='Tampered')
+        Officer.objects.update(title='Tampered')
+        counts = self.scrape(frames=statements(100.0))
+        self.assertEqual(counts, {'written': 0, 'skipped': len(scraper.FINGERPRINT_SECTIONS)})
+        self.assertEqual(Address.objects.get().city, 'Tampered')
+        self.assertEqual(Officer.objects.get().title, 'Tampered')
+        self.assertIsNotNone(Company.objects.get().last_refreshed)
+
+    def test_only_changed_sections_are_written(self):
+        self.scrape(frames=statements(100.0))
+        Officer.objects.update(title='Tampered')
+        counts = self.scrape(dict(INFO, city='Dallas'), statements(120.0))
+        self.assertEqual(counts, {'written': 2, 'skipped': len(scraper.FINGERPRINT_SECTIONS) - 2})
+        self.assertEqual(Address.objects.get().city, 'Dallas')
+        self.assertEqual(IncomeStatement.objects.get().revenue, 120)
+        self.assertEqual(Officer.objects.get().title, 'Tampered')
+
+    def test_statements_not_fetched_are_kept(self):
+        self.scrape(frames=statements(100.0))
+        counts = self.scrape()
+        self.assertEqual(counts, {'written': 0, 'skipped': len(scraper.FINGERPRINT_SECTIONS) - len(scraper.STATEMENTS)})
+        self.assertEqual(IncomeStatement.objects.get().revenue, 100)
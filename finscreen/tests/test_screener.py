@@ -0,0 +1,156 @@
+from datetime import date
+from decimal import Decimal
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase, TestCase
+from finscreen import screener
+from finscreen.models import Company, CompanyFinancials, PerformanceMetrics, Sector
+from finscreen.scoring import calculate_fhs
+from finscreen.tests import UpstreamTestCase
+
+FHS_COLUMNS = [metric for group in screener.FHS_METRICS.values() for metric in group]
+
+
+def fundamentals(rows):
+    """A load_fundamentals()-shaped frame from (symbol, sector, {metric: value}) rows."""
+    frame = pd.DataFrame(
+        [dict({'symbol': symbol, 'name': symbol, 'sector': sector}, **metrics) for symbol, sector, metrics in rows],
+        columns=['symbol', 'name', 'sector'] + FHS_COLUMNS,
+    )
+    frame[FHS_COLUMNS] = frame[FHS_COLUMNS].astype(float)
+    return frame
+
+
+class CompileScreenTests(SimpleTestCase):
+    def assertRejected(self, spec):
+        with self.assertRaises(screener.ScreenError):
+            screener.compile_screen(spec)
+
+    def test_unknown_field_and_op(self):
+        self.assertRejected({'filters': [{'field': 'nope', 'op': 'gt', 'value': 1}]})
+        self.assertRejected({'filters': [{'field': 'market_cap', 'op': 'like', 'value': 1}]})
+        self.assertRejected({'sort': '-nope'})
+
+    def test_malformed_payloads(self):
+        self.assertRejected(['market_cap'])
+        self.assertRejected({'filters': ['x']})
+        self.assertRejected({'filters': [{'op': 'gt', 'value': 1}]})
+        self.assertRejected({'filters': [{'field': 'market_cap', 'op': {'a': 1}, 'value': 1}]})
+        self.assertRejected({'filters': [{'field': 'market_cap', 'op': 'gt', 'value': {'a': 1}}]})
+        self.assertRejected({'filters': [{'field': 'market_cap', 'op': 'in', 'value': [{'a': 1}]}]})
+        self.assertRejected({'fields': [{'a': 1}]})
+        self.assertRejected({'sort': ['symbol']})
+
+    def test_value_of_the_wrong_type(self):
+        self.assertRejected({'filters': [{'field': 'market_cap', 'op': 'gt', 'value': 'abc'}]})
+
+    def test_list_operators_need_lists(self):
+        self.assertRejected({'filters': [{'field': 'sector', 'op': 'in', 'value': 'Technology'}]})
+        self.assertRejected({'filters': [{'field': 'market_cap', 'op': 'between', 'value': [1]}]})
+
+    def test_limit_and_cursor(self):
+        self.assertRejected({'limit': 'many'})
+        self.assertRejected({'cursor': 'not-a-cursor'})
+        self.assertRejected({'sort': 'market_cap', 'cursor': screener.encode_cursor('abc', 1)})
+
+    def test_default_fields_include_filters_and_sort(self):
+        queryset, fields, sort_field, limit = screener.compile_screen({
+            'filters': [{'field': 'market_cap', 'op': 'gt', 'value': 1}], 'sort': '-dividend_yield',
+        })
+        self.assertEqual(fields, ['symbol', 'name', 'sector', 'market_cap', 'dividend_yield'])
+        self.assertEqual((sort_field, limit), ('dividend_yield', 50))
+
+
+class ScreenViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for i, symbol in enumerate(['AAA', 'BBB', 'CCC', 'DDD']):
+            company = Company.objects.create(symbol=symbol, name=symbol)
+            CompanyFinancials.objects.create(company=company, market_cap=Decimal(1000 * (i + 1)))
+
+    def screen(self, spec):
+        return self.client.post('/api/screen/', spec, content_type='application/json')
+
+    def test_bad_payloads_are_400(self):
+        for filters in [
+            [{'field': 'market_cap', 'op': 'gt', 'value': 'abc'}],
+            [{'field': 'market_cap', 'op': 'gt', 'value': {'a': 1}}],
+            ['x'],
+        ]:
+            response = self.screen({'filters': filters})
+            self.assertEqual(response.status_code, 400, filters)
+            self.assertIn('error', response.json())
+
+    def test_filters_sort_and_pages(self):
+        spec = {
+            'filters': [{'field': 'market_cap', 'op': 'gte', 'value': 2000}],
+            'sort': '-market_cap', 'fields': ['symbol', 'market_cap'], 'limit': 2,
+        }
+        first = self.screen(spec).json()
+        self.assertEqual([row['symbol'] for row in first['results']], ['DDD', 'CCC'])
+        second = self.screen(dict(spec, cursor=first['next_cursor'])).json()
+        self.assertEqual([row['symbol'] for row in second['results']], ['BBB'])
+        self.assertIsNone(second['next_cursor'])
+
+    def test_ne_excludes(self):
+        response = self.screen({'filters': [{'field': 'symbol', 'op': 'ne', 'value': 'AAA'}], 'fields': ['symbol']})
+        self.assertEqual([row['symbol'] for row in response.json()['results']], ['BBB', 'CCC', 'DDD'])
+
+
+class FhsScoresTests(SimpleTestCase):
+    def test_ranks_are_spread_within_each_sector(self):
+        scores = screener.fhs_scores(fundamentals([
+            ('AAA', 'Tech', {'gross_margin': 0.1}),
+            ('BBB', 'Tech', {'gross_margin': 0.3}),
+            ('CCC', 'Tech', {'gross_margin': 0.2}),
+            ('DDD', 'Energy', {'gross_margin': 0.9}),
+        ])).set_index('symbol')
+        np.testing.assert_allclose(scores.loc[['AAA', 'CCC', 'BBB'], 'profitability'], [-1, 0, 1])
+        # Alone in its sector, so nothing to rank against
+        self.assertEqual(scores.loc['DDD', 'profitability'], 0)
+        np.testing.assert_allclose(scores['fhs'], scores['profitability'] * 0.25)
+        self.assertEqual(list(scores.sort_values('rank').index), ['BBB', 'CCC', 'DDD', 'AAA'])
+
+    def test_lower_multiples_rank_higher_and_losses_are_left_out(self):
+        scores = screener.fhs_scores(fundamentals([
+            ('AAA', 'Tech', {'trailing_pe': 10}),
+            ('BBB', 'Tech', {'trailing_pe': 40}),
+            ('CCC', 'Tech', {'trailing_pe': -5}),
+        ])).set_index('symbol')
+        np.testing.assert_allclose(scores.loc[['AAA', 'BBB', 'CCC'], 'valuation'], [1, -1, 0])
+
+    def test_labels_follow_calculate_fhs(self):
+        scores = screener.fhs_scores(fundamentals([
+            (f'S{i}', 'Tech', dict.fromkeys(FHS_COLUMNS, float(i))) for i in range(1, 8)
+        ]))
+        for row in scores.itertuples():
+            label, fhs = calculate_fhs(row.profitability, row.growth, row.valuation, row.financial_health, row.efficiency)
+            self.assertEqual(row.label, label)
+            self.assertAlmostEqual(row.fhs, fhs)
+
+
+class FhsScreenViewTests(UpstreamTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        sectors = {name: Sector.objects.create(sector_name=name) for name in ['Tech', 'Energy']}
+        for symbol, sector, margin, pe in [
+            ('AAA', 'Tech', '0.10', '30'), ('BBB', 'Tech', '0.30', '10'), ('CCC', 'Tech', '0.20', '20'),
+            ('DDD', 'Energy', '0.50', '8'), ('EEE', 'Energy', '0.40', '12'),
+        ]:
+            company = Company.objects.create(symbol=symbol, name=symbol, sector=sectors[sector])
+            CompanyFinancials.objects.create(company=company, gross_margin=Decimal(margin))
+            PerformanceMetrics.objects.create(company=company, date=date(2024, 1, 1), trailing_pe=Decimal('99'))
+            PerformanceMetrics.objects.create(company=company, date=date(2024, 6, 1), trailing_pe=Decimal(pe))
+
+    def test_filters_and_pages(self):
+        first = self.client.get('/api/screen/fhs/?sector=Tech&page_size=2').json()
+        self.assertEqual(first['count'], 3)
+        self.assertEqual([row['symbol'] for row in first['results']], ['BBB', 'CCC'])
+        self.assertAlmostEqual(first['results'][0]['fhs'], 0.25 + 0.20)
+        second = self.client.get('/api/screen/fhs/?sector=Tech&page_size=2&page=2').json()
+        self.assertEqual([row['symbol'] for row in second['results']], ['AAA'])
+        strong = self.client.get('/api/screen/fhs/?min_score=0.4').json()
+        self.assertEqual(sorted(row['symbol'] for row in strong['results']), ['BBB', 'DDD'])
+
+    def test_bad_numbers_are_400(self):
+        self.assertEqual(self.client.get('/api/screen/fhs/?page=first').status_code, 400)
@@ -0,0 +1,25 @@
+from unittest import mock
+from django.test import override_settings
+from finscreen import history
+from finscreen.tests import UpstreamTestCase, completed_bars
+
+
+@override_settings(FINSCREEN_STREAM_CHUNK_ROWS=5)
+class StreamingTests(UpstreamTestCase):
+    def test_errors_are_json(self):
+        for fmt in ['csv', 'ndjson']:
+            response = self.client.get(f'/api/history/AAA/?period=bogus&format={fmt}')
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response['Content-Type'], 'application/json')
+            self.assertIn('error', response.json())
+
+    def test_frames_stream_in_chunks(self):
+        with mock.patch.object(history, 'fetch_gap', side_effect=completed_bars):
+            csv = self.client.get('/api/history/AAA/?period=1mo&format=csv')
+            ndjson = self.client.get('/api/history/AAA/?period=1mo&format=ndjson')
+        self.assertEqual(csv['Content-Type'], 'text/csv; charset=utf-8')
+        lines = b''.join(csv.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'Date,Open,High,Low,Close,Volume')
+        rows = b''.join(ndjson.streaming_content).decode().splitlines()
+        self.assertEqual(ndjson['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        self.assertEqual(len(rows), len(lines) - 1)
@@ -0,0 +1,85 @@
+import socket
+from unittest import mock
+import requests
+from django.test import SimpleTestCase, override_settings
+from finscreen import upstream
+
+try:
+    from curl_cffi.requests.exceptions import DNSError
+except ImportError:
+    # yfinance before curl_cffi went through requests, which raises socket errors
+    DNSError = socket.gaierror
+
+
+@override_settings(
+    FINSCREEN_UPSTREAM_RETRIES=2, FINSCREEN_UPSTREAM_BACKOFF_BASE=0, FINSCREEN_UPSTREAM_BREAKER_THRESHOLD=3,
+    FINSCREEN_UPSTREAM_BREAKER_RESET=60, FINSCREEN_UPSTREAM_RATE=1000, FINSCREEN_UPSTREAM_BURST=1000,
+)
+class CallTests(SimpleTestCase):
+    def setUp(self):
+        upstream.reset()
+
+    def tearDown(self):
+        upstream.reset()
+
+    def test_network_and_rate_limit_errors_are_retried(self):
+        fn = mock.Mock(side_effect=[DNSError('Could not resolve host'), upstream.YFRateLimitError(), 'ok'])
+        self.assertEqual(upstream.call(fn), 'ok')
+        self.assertEqual(fn.call_count, 3)
+        self.assertEqual(upstream.stats['retried'], 2)
+        self.assertEqual(upstream.get_breaker(upstream.YAHOO).state, 'closed')
+
+    def test_other_errors_fail_straight_away(self):
+        not_found = requests.HTTPError('404 Client Error', response=mock.Mock(status_code=404))
+        for error in [KeyError('regularMarketPrice'), not_found, FileNotFoundError('tz cache'), PermissionError('tz cache')]:
+            fn = mock.Mock(side_effect=error)
+            with self.assertRaises(type(error)):
+                upstream.call(fn)
+            self.assertEqual(fn.call_count, 1, error)
+            self.assertEqual(upstream.get_breaker(upstream.YAHOO).failures, 0)
+
+    def test_rate_limit_and_server_errors_are_retried(self):
+        fn = mock.Mock(side_effect=[
+            requests.HTTPError('429 Client Error', response=mock.Mock(status_code=429)),
+            requests.HTTPError('503 Server Error', response=mock.Mock(status_code=503)),
+            'ok',
+        ])
+        self.assertEqual(upstream.call(fn), 'ok')
+        self.assertEqual(fn.call_count, 3)
+
+    def test_exhausted_retries_open_the_breaker(self):
+        fn = mock.Mock(side_effect=DNSError('Could not resolve host'))
+        with self.assertRaises(upstream.UpstreamError):
+            upstream.call(fn)
+        self.assertEqual(fn.call_count, 3)
+        self.assertEqual(upstream.get_breaker(upstream.YAHOO).state, 'open')
+        with self.assertRaises(upstream.CircuitOpen):
+            upstream.call(fn)
+        self.assertEqual(fn.call_count, 3)
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    def test_half_open_trial(self):
+        breaker = upstream.CircuitBreaker(threshold=2, reset_after=30)
+        breaker.failure()
+        self.assertTrue(breaker.allow())
+        breaker.failure()
+        self.assertFalse(breaker.allow())
+        with mock.patch.object(upstream.time, 'monotonic', return_value=breaker.opened_at + 30):
+            self.assertTrue(breaker.allow())
+            self.assertEqual(breaker.state, 'half-open')
+            self.assertFalse(breaker.allow())
+            breaker.failure()
+        self.assertEqual(breaker.state, 'open')
+        with mock.patch.object(upstream.time, 'monotonic', return_value=breaker.opened_at + 30):
+            self.assertTrue(breaker.allow())
+        breaker.success()
+        self.assertEqual(breaker.state, 'closed')
+
+
+class TokenBucketTests(SimpleTestCase):
+    def test_burst_then_budget(self):
+        bucket = upstream.TokenBucket(rate=1, capacity=2)
+        self.assertEqual(bucket.acquire(0), 0)
+        self.assertEqual(bucket.acquire(0), 0)
+        self.assertIsNone(bucket.acquire(0.1))
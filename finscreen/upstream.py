@@ -0,0 +1,264 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+import requests
+import yfinance
+from django.conf import settings
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from . import metrics
+
+# Every yfinance call goes to Yahoo Finance.
+YAHOO = 'finance.yahoo.com'
+
+try:
+    from yfinance.exceptions import YFRateLimitError
+except ImportError:
+    # Older yfinance raises the HTTP client's HTTPError for a 429
+    class YFRateLimitError(Exception):
+        pass
+
+try:
+    from curl_cffi import requests as curl_requests
+except ImportError:
+    # Older yfinance fetches through requests only
+    curl_requests = None
+
+
+def get_client():
+    """The module-like object serving `Ticker` and `download`, per FINSCREEN_YFINANCE_CLIENT."""
+    if settings.FINSCREEN_YFINANCE_CLIENT == 'replay':
+        from . import replay
+        return replay.client()
+    return yfinance
+
+
+class _Client:
+    # Resolves the client on every use, so tests and benchmarks can switch it
+    # with override_settings.
+    def __getattr__(self, name):
+        return getattr(get_client(), name)
+
+
+yf = _Client()
+
+
+class UpstreamError(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Upstream data provider unavailable.'
+
+
+class CircuitOpen(UpstreamError):
+    default_detail = 'Upstream data provider unavailable; circuit open.'
+
+
+class UpstreamTimeout(UpstreamError):
+    default_detail = 'Upstream data provider timed out.'
+
+
+# Connection failures and timeouts from the HTTP clients yfinance has used,
+# and their errors for an HTTP status.
+TRANSPORT_ERRORS = (requests.ConnectionError, requests.Timeout, ConnectionError, TimeoutError)
+HTTP_ERRORS = (requests.HTTPError,)
+if curl_requests is not None:
+    TRANSPORT_ERRORS += (curl_requests.exceptions.ConnectionError, curl_requests.exceptions.Timeout)
+    HTTP_ERRORS += (curl_requests.exceptions.HTTPError,)
+
+
+class TokenBucket:
+    """Allow `rate` calls per second on average with bursts of up to `capacity`."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, max_wait):
+        """Take a token, sleeping as needed. Returns seconds waited, or None if that would exceed `max_wait`."""
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            if waited + delay > max_wait:
+                return None
+            time.sleep(delay)
+            waited += delay
+
+
+class CircuitBreaker:
+    """
+    Open after `threshold` consecutive failures and fail fast for `reset_after`
+    seconds; then let a single trial call through and close again if it succeeds.
+    """
+
+    def __init__(self, threshold, reset_after):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at = None
+        self.trial = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        return 'half-open' if self.trial else 'open'
+
+    def allow(self):
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if not self.trial and time.monotonic() - self.opened_at >= self.reset_after:
+                self.trial = True
+                return True
+            return False
+
+    def success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial = False
+
+    def failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.trial or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+                self.trial = False
+
+
+stats = {'calls': 0, 'throttled': 0, 'retried': 0, 'short_circuited': 0, 'timeouts': 0, 'failures': 0}
+_stats_lock = threading.Lock()
+_breakers = {}
+_bucket = None
+_executor = None
+_setup_lock = threading.Lock()
+
+
+def _count(name):
+    with _stats_lock:
+        stats[name] += 1
+
+
+def _setup():
+    global _bucket, _executor
+    with _setup_lock:
+        if _bucket is None:
+            _bucket = TokenBucket(settings.FINSCREEN_UPSTREAM_RATE, settings.FINSCREEN_UPSTREAM_BURST)
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.FINSCREEN_UPSTREAM_MAX_WORKERS, thread_name_prefix='upstream'
+            )
+
+
+def reset():
+    """Drop the rate limiter, worker pool, breakers and counters so changed settings apply."""
+    global _bucket, _executor
+    with _setup_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+        _bucket = _executor = None
+        _breakers.clear()
+    with _stats_lock:
+        for name in stats:
+            stats[name] = 0
+
+
+def get_breaker(host):
+    with _setup_lock:
+        if host not in _breakers:
+            _breakers[host] = CircuitBreaker(
+                settings.FINSCREEN_UPSTREAM_BREAKER_THRESHOLD, settings.FINSCREEN_UPSTREAM_BREAKER_RESET
+            )
+        return _breakers[host]
+
+
+def _retryable(error):
+    # Rate limiting, server errors and network trouble; anything else (bad
+    # symbol, parse errors, local failures) fails straight away and does not
+    # count against the breaker.
+    if isinstance(error, HTTP_ERRORS):
+        status_code = getattr(error.response, 'status_code', None)
+        return status_code is not None and (status_code == 429 or status_code >= 500)
+    return isinstance(error, TRANSPORT_ERRORS + (YFRateLimitError, UpstreamTimeout))
+
+
+def _backoff(attempt):
+    # Full jitter
+    return random.uniform(0, min(settings.FINSCREEN_UPSTREAM_BACKOFF_MAX, settings.FINSCREEN_UPSTREAM_BACKOFF_BASE * 2 ** attempt))
+
+
+def _run(fn, name):
+    future = _executor.submit(fn)
+    started = time.perf_counter()
+    outcome = 'error'
+    try:
+        value = future.result(timeout=settings.FINSCREEN_UPSTREAM_TIMEOUT)
+        outcome = 'ok'
+        return value
+    except FutureTimeout:
+        # The worker thread cannot be interrupted; it finishes in the background.
+        future.cancel()
+        _count('timeouts')
+        outcome = 'timeout'
+        raise UpstreamTimeout()
+    finally:
+        metrics.observe_upstream(name, time.perf_counter() - started, outcome)
+
+
+def call(fn, name='other', host=YAHOO):
+    """
+    Run an upstream call through the shared rate limiter, retry loop and circuit breaker.
+
+    `name` is the yfinance attribute fetched, used to label timings.
+
+    Raises CircuitOpen while the host's breaker is open and UpstreamError once
+    retries are exhausted; both render as 503 in views.
+    """
+    _setup()
+    breaker = get_breaker(host)
+    _count('calls')
+    attempts = settings.FINSCREEN_UPSTREAM_RETRIES + 1
+    for attempt in range(attempts):
+        if not breaker.allow():
+            _count('short_circuited')
+            raise CircuitOpen()
+        waited = _bucket.acquire(settings.FINSCREEN_UPSTREAM_MAX_WAIT)
+        if waited is None:
+            _count('throttled')
+            raise UpstreamError('Upstream rate limit budget exhausted.')
+        if waited:
+            _count('throttled')
+        try:
+            value = _run(fn, name)
+        except Exception as e:
+            if not _retryable(e):
+                # The host answered, so it counts as healthy.
+                breaker.success()
+                raise
+            breaker.failure()
+            if attempt == attempts - 1:
+                _count('failures')
+                raise UpstreamError(f'Upstream call failed after {attempts} attempt(s): {e}') from e
+            _count('retried')
+            time.sleep(_backoff(attempt))
+        else:
+            breaker.success()
+            return value
+
+
+def get_stats():
+    with _stats_lock:
+        counters = dict(stats)
+    with _setup_lock:
+        counters['breakers'] = {host: breaker.state for host, breaker in _breakers.items()}
+    return counters
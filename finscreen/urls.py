@@ -1,8 +1,10 @@
 from django.urls import path
-from . import views
+from . import async_views, views
 
 urlpatterns = [
     path('scrap/', views.scrap_data),
+    path('scrap/<int:job_id>/', views.get_scrap_job),
+    path('history/batch/', views.get_stock_history_batch),
     path('history/<str:symbol>/', views.get_stock_history),
     path('info/<str:symbol>/', views.get_stock_info),
     path('actions/<str:symbol>/', views.get_stock_actions),
@@ -19,6 +21,15 @@ urlpatterns = [
     path('calendar/<str:symbol>/', views.get_stock_calendar),
     path('options/<str:symbol>/', views.get_stock_options),
     path('option_chain/<str:symbol>/<str:expiration>/', views.get_stock_option_chain),
+    path('option_analytics/<str:symbol>/', views.get_option_analytics),
     path('isin/<str:symbol>/', views.get_stock_isin),
-    path('news/<str:symbol>/', views.get_stock_news)
+    path('news/<str:symbol>/', views.get_stock_news),
+    path('signals/technical/', views.get_technical_signals),
+    path('analytics/correlation/', views.get_correlation),
+    path('screen/', views.screen),
+    path('screen/fhs/', views.get_fhs_screen),
+    path('cache/stats/', views.get_cache_stats),
+    path('metrics/', views.get_metrics),
+    path('async/<str:endpoint>/<str:symbol>/', async_views.get_stock_data),
+    path('dashboard/<str:symbol>/', async_views.get_dashboard_tile)
 ]
@@ -1,156 +1,157 @@
 from rest_framework.response import Response
-from .models import Company, Sector, Industry, Exchange, Currency, Address, Officer, OfficerCompensation, CompanyFinancials, Dividend, StockPrice, RiskMetrics, PerformanceMetrics, AnalystOpinion, BalanceSheet, EsgScore
-import yfinance as yf
+from .models import ScrapJob
+from . import cache, columnar, correlation, history, indicators, jobs, metrics, option_analytics, screener, streaming, upstream
+from .scraper import load_info
+from .upstream import yf
+import numpy as np
 import pandas as pd  # Import pandas here
-from datetime import datetime
-from django.db import transaction
-from rest_framework.decorators import api_view
+import time
+from datetime import date
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils import timezone
+from rest_framework.decorators import api_view, renderer_classes
+from rest_framework.settings import api_settings
 from rest_framework import status
 
-def calculate_fhs(profitability_score, growth_score, valuation_score, financial_health_score, efficiency_score):
-    # Weights for each metric category
-    weights = {
-        'profitability': 0.25,
-        'growth': 0.25,
-        'valuation': 0.20,
-        'financial_health': 0.20,
-        'efficiency': 0.10
-    }
-
-    # Calculate weighted score
-    fhs = (profitability_score * weights['profitability'] +
-           growth_score * weights['growth'] +
-           valuation_score * weights['valuation'] +
-           financial_health_score * weights['financial_health'] +
-           efficiency_score * weights['efficiency'])
-
-    # Interpretation of FHS score
-    if fhs > 0.5:
-        return "Strong Buy", fhs
-    elif 0.2 < fhs <= 0.5:
-        return "Buy", fhs
-    elif -0.2 <= fhs <= 0.2:
-        return "Hold", fhs
-    elif -0.5 <= fhs < -0.2:
-        return "Sell", fhs
-    else:
-        return "Strong Sell", fhs
-
-
-def calculate_tts(rsi_score, ma_score, macd_score, adx_score, bollinger_score, volume_score):
-    # Weights for each indicator
-    weights = {
-        'rsi': 0.20,
-        'ma': 0.25,
-        'macd': 0.15,
-        'adx': 0.10,
-        'bollinger': 0.10,
-        'volume': 0.20
-    }
-
-    # Calculate weighted score
-    tts = (rsi_score * weights['rsi'] +
-           ma_score * weights['ma'] +
-           macd_score * weights['macd'] +
-           adx_score * weights['adx'] +
-           bollinger_score * weights['bollinger'] +
-           volume_score * weights['volume'])
-
-    # Interpretation of TTS score
-    if tts > 0.5:
-        return "Strong Buy", tts
-    elif 0.2 < tts <= 0.5:
-        return "Buy", tts
-    elif -0.2 <= tts <= 0.2:
-        return "Hold", tts
-    elif -0.5 <= tts < -0.2:
-        return "Sell", tts
-    else:
-        return "Strong Sell", tts
-
-
-def technical_score(rsi, ma_50, ma_200, macd, adx, bollinger, volume):
-    score = 0
-    
-    # RSI scoring
-    if rsi < 30:
-        score += 2
-    elif rsi > 70:
-        score -= 2
-    
-    # Moving Averages scoring
-    if ma_50 > ma_200:
-        score += 2
-    elif ma_50 < ma_200:
-        score -= 2
-    
-    # MACD scoring
-    if macd == 'bullish':
-        score += 1
-    elif macd == 'bearish':
-        score -= 1
-
-    # ADX scoring
-    if adx > 25:
-        score += 1
-    elif adx < 20:
-        score -= 1
-    
-    # Bollinger Bands scoring
-    if bollinger == 'below':
-        score += 1
-    elif bollinger == 'above':
-        score -= 1
-
-    # Volume scoring
-    if volume == 'above_average':
-        score += 1
-    elif volume == 'below_average':
-        score -= 1
-
-    return score
+@api_view(['GET'])
+@renderer_classes(api_settings.DEFAULT_RENDERER_CLASSES + streaming.RENDERERS + columnar.RENDERERS)
+def get_stock_history(request, symbol):
+    period = request.query_params.get('period', '1mo')
+    interval = request.query_params.get('interval', '1d')
+    if period not in history.PERIODS or interval not in history.INTERVALS:
+        return Response(
+            {"error": f"period must be one of {history.PERIODS} and interval one of {history.INTERVALS}."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
 
+    # Daily bars over a fixed window are served from the local archive when it
+    # has them, else from historical_data, backfilling only the dates that
+    # have not been stored yet.
+    start = history.period_start(period)
+    if interval == '1d' and start is not None:
+        end = date.today()
+        frame = history.read_archive(symbol, start, end)
+        if frame is not None:
+            source = 'archive'
+        else:
+            company, fetched = history.ensure(symbol, start, end)
+            if company is None:
+                return Response({"error": f"No price history found for {symbol}."}, status=status.HTTP_404_NOT_FOUND)
+            frame = history.load(company, start, end)
+            source = 'db+upstream' if fetched else 'db'
+        frame = history.response_frame(frame)
+        if request.accepted_renderer.format in columnar.FORMATS:
+            response = columnar.frame_response(frame, request.accepted_renderer.format)
+        elif request.accepted_renderer.format in streaming.FORMATS:
+            response = streaming.frame_response([frame.reset_index()], request.accepted_renderer.format)
+        else:
+            response = Response(frame.reset_index().to_dict('records'))
+        response['X-Data-Source'] = source
+        return response
+
+    cached = cache.fetch(
+        'history', symbol, lambda: yf.Ticker(symbol).history(period=period, interval=interval),
+        period=period, interval=interval,
+    )
+    frame = history.response_frame(cached.value, interval)
+    if request.accepted_renderer.format in columnar.FORMATS:
+        return cache.respond(columnar.frame_response(frame, request.accepted_renderer.format), cached)
+    if request.accepted_renderer.format in streaming.FORMATS:
+        return cache.respond(streaming.frame_response([frame.reset_index()], request.accepted_renderer.format), cached)
+    return cache.respond(Response(frame.reset_index().to_dict('records')), cached)
 
+@api_view(['POST'])
+def get_stock_history_batch(request):
+    symbols = list(dict.fromkeys(str(symbol).upper() for symbol in request.data.get("symbols", [])))
+    period = request.data.get("period", "1mo")
+    interval = request.data.get("interval", "1d")
+    start = request.data.get("start")
+    end = request.data.get("end")
+
+    max_symbols = settings.FINSCREEN_HISTORY_BATCH_MAX_SYMBOLS
+    if not symbols or len(symbols) > max_symbols:
+        return Response(
+            {"error": f"Provide between 1 and {max_symbols} symbols."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if period not in history.PERIODS or interval not in history.INTERVALS:
+        return Response(
+            {"error": f"period must be one of {history.PERIODS} and interval one of {history.INTERVALS}."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
 
-@api_view(['GET'])
-def get_stock_history(request, symbol):
-    ticker = yf.Ticker(symbol)
-    history = ticker.history(period="1mo")
-    history_json = history.to_dict('records')
-    return Response(history_json)
+    # The whole symbol list is one upstream call, so it is cached as one entry.
+    frames = cache.fetch(
+        'history_batch', '*',
+        lambda: history.download(symbols, period=period, interval=interval, start=start, end=end),
+        symbols=tuple(sorted(symbols)), period=period, interval=interval, start=start, end=end,
+    )
+    data = {symbol: history.to_columnar(frame) for symbol, frame in frames.value.items()}
+    missing = [symbol for symbol in symbols if symbol not in data or not data[symbol]['index']]
+    return cache.respond(Response({'period': period, 'interval': interval, 'data': data, 'missing': missing}), frames)
+
+INFO_SOURCES = ['auto', 'db', 'live']
+
+def _stored_info_response(stored):
+    info, last_refreshed = stored
+    response = Response(info)
+    response['X-Data-Source'] = 'db'
+    response['Age'] = max(int((timezone.now() - last_refreshed).total_seconds()), 0)
+    return response
 
 @api_view(['GET'])
 def get_stock_info(request, symbol):
-    ticker = yf.Ticker(symbol)
-    info = ticker.info
-    return Response(info)
+    # ?source=db serves only stored data, live always asks upstream, and auto
+    # (the default) serves stored data scraped within FINSCREEN_INFO_MAX_AGE,
+    # falling back to it as well when upstream is unavailable.
+    source = request.query_params.get('source', 'auto')
+    if source not in INFO_SOURCES:
+        return Response({"error": f"source must be one of {INFO_SOURCES}."}, status=status.HTTP_400_BAD_REQUEST)
+
+    stored = None
+    if source != 'live':
+        stored = load_info(symbol.upper())
+        if source == 'db':
+            if stored is None:
+                return Response({"error": f"No stored data for {symbol}."}, status=status.HTTP_404_NOT_FOUND)
+            return _stored_info_response(stored)
+        if stored and (timezone.now() - stored[1]).total_seconds() < settings.FINSCREEN_INFO_MAX_AGE:
+            return _stored_info_response(stored)
+
+    try:
+        info = cache.fetch('info', symbol, lambda: yf.Ticker(symbol).info)
+    except upstream.UpstreamError:
+        if stored is None:
+            raise
+        return _stored_info_response(stored)
+    response = cache.respond(Response(info.value), info)
+    response['X-Data-Source'] = 'upstream'
+    return response
 
 @api_view(['GET'])
 def get_stock_actions(request, symbol):
-    ticker = yf.Ticker(symbol)
-    actions = ticker.actions
-    actions_json = actions.reset_index().to_dict('records')
-    return Response(actions_json)
+    actions = cache.fetch('actions', symbol, lambda: yf.Ticker(symbol).actions)
+    actions_json = actions.value.reset_index().to_dict('records')
+    return cache.respond(Response(actions_json), actions)
 
 @api_view(['GET'])
 def get_stock_dividends(request, symbol):
-    ticker = yf.Ticker(symbol)
-    dividends = ticker.dividends
+    dividends = cache.fetch('dividends', symbol, lambda: yf.Ticker(symbol).dividends)
     #dividends_json = dividends.to_dict('records')
-    return Response(dividends)
+    return cache.respond(Response(dividends.value), dividends)
 
 @api_view(['GET'])
 def get_stock_splits(request, symbol):
-    ticker = yf.Ticker(symbol)
-    splits = ticker.splits
-    splits_json = splits.to_dict()
-    return Response(splits_json)
+    splits = cache.fetch('splits', symbol, lambda: yf.Ticker(symbol).splits)
+    splits_json = splits.value.to_dict()
+    return cache.respond(Response(splits_json), splits)
 
 @api_view(['GET'])
 def get_stock_financials(request, symbol):
     try:
-        ticker = yf.Ticker(symbol)
-        balance_sheet = ticker.balance_sheet
+        cached = cache.fetch('financials', symbol, lambda: yf.Ticker(symbol).balance_sheet)
+        balance_sheet = cached.value
 
         if not balance_sheet.empty:
             for key, value in balance_sheet.items():
@@ -171,7 +172,7 @@ def get_stock_financials(request, symbol):
                         "total_liabilities": balance_sheet_series.get("Total Liabilities Net Minority Interest"),
                         "total_equity": balance_sheet_series.get("Stockholders Equity"),
                     }
-                    return Response(balance_sheet_dict)
+                    return cache.respond(Response(balance_sheet_dict), cached)
         else:
             return Response(
                 {"error": "No balance sheet data found for this symbol."},
@@ -184,264 +185,231 @@ def get_stock_financials(request, symbol):
         )
 
 @api_view(['GET'])
+@renderer_classes(api_settings.DEFAULT_RENDERER_CLASSES + columnar.RENDERERS)
 def get_stock_quarterly_financials(request, symbol):
-    ticker = yf.Ticker(symbol)
-    quarterly_financials = ticker.quarterly_financials
-    quarterly_financials_json = quarterly_financials.to_dict()
-    return Response(quarterly_financials_json)
+    quarterly_financials = cache.fetch('quarterly_financials', symbol, lambda: yf.Ticker(symbol).quarterly_financials)
+    if request.accepted_renderer.format in columnar.FORMATS:
+        return cache.respond(columnar.frame_response(quarterly_financials.value, request.accepted_renderer.format), quarterly_financials)
+    quarterly_financials_json = quarterly_financials.value.to_dict()
+    return cache.respond(Response(quarterly_financials_json), quarterly_financials)
 
 @api_view(['GET'])
 def get_stock_sustainability(request, symbol):
-    ticker = yf.Ticker(symbol)
-    sustainability = ticker.sustainability
-    sustainability_json = sustainability.to_dict()
-    return Response(sustainability_json)
+    sustainability = cache.fetch('sustainability', symbol, lambda: yf.Ticker(symbol).sustainability)
+    sustainability_json = sustainability.value.to_dict()
+    return cache.respond(Response(sustainability_json), sustainability)
 
 @api_view(['GET'])
 def get_stock_recommendations(request, symbol):
-    ticker = yf.Ticker(symbol)
-    recommendations = ticker.recommendations
-    recommendations_json = recommendations.reset_index().to_dict('records')
-    return Response(recommendations_json)
+    recommendations = cache.fetch('recommendations', symbol, lambda: yf.Ticker(symbol).recommendations)
+    recommendations_json = recommendations.value.reset_index().to_dict('records')
+    return cache.respond(Response(recommendations_json), recommendations)
 
 @api_view(['GET'])
+@renderer_classes(api_settings.DEFAULT_RENDERER_CLASSES + columnar.RENDERERS)
 def get_stock_earnings(request, symbol):
-    ticker = yf.Ticker(symbol)
-    earnings = ticker.earnings
-    earnings_json = earnings.to_dict()
-    return Response(earnings_json)
+    earnings = cache.fetch('earnings', symbol, lambda: yf.Ticker(symbol).earnings)
+    if request.accepted_renderer.format in columnar.FORMATS and isinstance(earnings.value, pd.DataFrame):
+        return cache.respond(columnar.frame_response(earnings.value, request.accepted_renderer.format), earnings)
+    earnings_json = earnings.value.to_dict()
+    return cache.respond(Response(earnings_json), earnings)
 
 @api_view(['GET'])
 def get_stock_quarterly_earnings(request, symbol):
-    ticker = yf.Ticker(symbol)
-    quarterly_earnings = ticker.quarterly_earnings
-    quarterly_earnings_json = quarterly_earnings.to_dict()
-    return Response(quarterly_earnings_json)
+    quarterly_earnings = cache.fetch('quarterly_earnings', symbol, lambda: yf.Ticker(symbol).quarterly_earnings)
+    quarterly_earnings_json = quarterly_earnings.value.to_dict()
+    return cache.respond(Response(quarterly_earnings_json), quarterly_earnings)
 
 @api_view(['GET'])
 def get_stock_major_holders(request, symbol):
-    ticker = yf.Ticker(symbol)
-    major_holders = ticker.major_holders
-    major_holders_json = major_holders.to_dict()
-    return Response(major_holders_json)
+    major_holders = cache.fetch('major_holders', symbol, lambda: yf.Ticker(symbol).major_holders)
+    major_holders_json = major_holders.value.to_dict()
+    return cache.respond(Response(major_holders_json), major_holders)
 
 @api_view(['GET'])
 def get_stock_institutional_holders(request, symbol):
-    ticker = yf.Ticker(symbol)
-    institutional_holders = ticker.institutional_holders
-    institutional_holders_json = institutional_holders.reset_index().to_dict('records')
-    return Response(institutional_holders_json)
+    institutional_holders = cache.fetch('institutional_holders', symbol, lambda: yf.Ticker(symbol).institutional_holders)
+    institutional_holders_json = institutional_holders.value.reset_index().to_dict('records')
+    return cache.respond(Response(institutional_holders_json), institutional_holders)
 
 @api_view(['GET'])
 def get_stock_calendar(request, symbol):
-    ticker = yf.Ticker(symbol)
-    calendar = ticker.calendar
-    calendar_json = calendar.to_dict()
-    return Response(calendar_json)
+    calendar = cache.fetch('calendar', symbol, lambda: yf.Ticker(symbol).calendar)
+    calendar_json = calendar.value.to_dict()
+    return cache.respond(Response(calendar_json), calendar)
 
 @api_view(['GET'])
 def get_stock_options(request, symbol):
-    ticker = yf.Ticker(symbol)
-    options = ticker.options
-    return Response({'options': list(options)})
+    options = cache.fetch('options', symbol, lambda: yf.Ticker(symbol).options)
+    return cache.respond(Response({'options': list(options.value)}), options)
 
 @api_view(['GET'])
+@renderer_classes(api_settings.DEFAULT_RENDERER_CLASSES + streaming.RENDERERS)
 def get_stock_option_chain(request, symbol, expiration):
-    ticker = yf.Ticker(symbol)
-    options = ticker.option_chain(expiration)
-    calls_json = options.calls.reset_index().to_dict('records')
-    puts_json = options.puts.reset_index().to_dict('records')
-    return Response({'calls': calls_json, 'puts': puts_json})
+    options = cache.fetch('option_chain', symbol, lambda: option_analytics.load_chain(symbol, expiration), expiration=expiration)
+    if request.accepted_renderer.format in streaming.FORMATS:
+        frames = [options.value[side].assign(type=side.rstrip('s')) for side in ('calls', 'puts')]
+        return cache.respond(streaming.frame_response(frames, request.accepted_renderer.format), options)
+    calls_json = options.value['calls'].reset_index().to_dict('records')
+    puts_json = options.value['puts'].reset_index().to_dict('records')
+    return cache.respond(Response({'calls': calls_json, 'puts': puts_json}), options)
+
+@api_view(['GET'])
+def get_option_analytics(request, symbol):
+    try:
+        max_expirations = int(request.GET.get('expirations', settings.FINSCREEN_OPTION_MAX_EXPIRATIONS))
+    except ValueError:
+        return Response({"error": "expirations must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        result = option_analytics.analyze(symbol, max(max_expirations, 1))
+    except LookupError as e:
+        return Response({"error": str(e)}, status=status.HTTP_404_NOT_FOUND)
+    include_contracts = request.GET.get('contracts', 'true').lower() != 'false'
+    expirations = []
+    for entry in result['expirations']:
+        entry = dict(entry)
+        contracts = entry.pop('contracts')
+        if include_contracts:
+            contracts = contracts.astype(object).where(contracts.notna(), None)
+            entry['contracts'] = contracts.to_dict('records')
+        expirations.append(entry)
+    result['expirations'] = expirations
+    return Response(result)
 
 @api_view(['GET'])
 def get_stock_isin(request, symbol):
-    ticker = yf.Ticker(symbol)
-    isin_code = ticker.isin
-    return Response({'isin': isin_code})
+    isin_code = cache.fetch('isin', symbol, lambda: yf.Ticker(symbol).isin)
+    return cache.respond(Response({'isin': isin_code.value}), isin_code)
 
 @api_view(['GET'])
 def get_stock_news(request, symbol):
-    ticker = yf.Ticker(symbol)
-    news = ticker.news
-    return Response({'news': news})
+    news = cache.fetch('news', symbol, lambda: yf.Ticker(symbol).news)
+    return cache.respond(Response({'news': news.value}), news)
+
+@api_view(['GET'])
+def get_technical_signals(request):
+    symbols = [symbol.upper() for symbol in request.query_params.get('symbols', '').split(',') if symbol]
+    panels = indicators.load_panel(symbols)
+    if panels['close'].empty:
+        return Response({"error": "No stored price history found."}, status=status.HTTP_404_NOT_FOUND)
+
+    signals = indicators.compute(panels)
+    label = request.query_params.get('label')
+    if label:
+        signals = signals[signals['label'] == label]
+    signals['as_of'] = signals['as_of'].dt.strftime('%Y-%m-%d')
+    signals = signals.astype(object).where(signals.notna(), None)
+    return Response([
+        {'symbol': symbol, **row} for symbol, row in zip(signals.index, signals.to_dict('records'))
+    ])
+
+@api_view(['POST'])
+def get_correlation(request):
+    symbols = list(dict.fromkeys(str(symbol).upper() for symbol in request.data.get("symbols", [])))
+    method = request.data.get("method", "sample")
+    max_symbols = settings.FINSCREEN_CORRELATION_MAX_SYMBOLS
+    if not 2 <= len(symbols) <= max_symbols:
+        return Response({"error": f"Provide between 2 and {max_symbols} symbols."}, status=status.HTTP_400_BAD_REQUEST)
+    if method not in correlation.METHODS:
+        return Response({"error": f"method must be one of {correlation.METHODS}."}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        window = int(request.data.get("window", settings.FINSCREEN_CORRELATION_WINDOW))
+        halflife = float(request.data.get("halflife", settings.FINSCREEN_CORRELATION_EWMA_HALFLIFE))
+    except (TypeError, ValueError):
+        return Response({"error": "window and halflife must be numbers."}, status=status.HTTP_400_BAD_REQUEST)
+    if window < 2 or halflife <= 0:
+        return Response({"error": "window must be at least 2 and halflife positive."}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        result, cache_status = correlation.compute(symbols, window, method, halflife)
+    except correlation.CorrelationError as e:
+        return Response({"error": str(e)}, status=status.HTTP_404_NOT_FOUND)
+    if request.data.get("annualize"):
+        result['covariance'] = result['covariance'] * correlation.TRADING_DAYS
+    for matrix in ['covariance', 'correlation']:
+        values = result[matrix]
+        result[matrix] = np.where(np.isfinite(values), values, None).tolist()
+    response = Response({'method': method, 'window': window, 'halflife': halflife if method == 'ewma' else None, **result})
+    response['X-Cache'] = cache_status
+    return response
+
+@api_view(['GET'])
+def get_fhs_screen(request):
+    try:
+        page = max(int(request.query_params.get('page', 1)), 1)
+        page_size = min(max(int(request.query_params.get('page_size', 50)), 1), 500)
+        min_score = request.query_params.get('min_score')
+        min_score = float(min_score) if min_score is not None else None
+    except ValueError:
+        return Response({"error": "page, page_size and min_score must be numbers."}, status=status.HTTP_400_BAD_REQUEST)
+
+    scores = screener.get_fhs_scores()
+    sector = request.query_params.get('sector')
+    if sector:
+        scores = scores[scores['sector'] == sector]
+    label = request.query_params.get('label')
+    if label:
+        scores = scores[scores['label'] == label]
+    if min_score is not None:
+        scores = scores[scores['fhs'] >= min_score]
+
+    rows = scores.iloc[(page - 1) * page_size:page * page_size]
+    rows = rows.astype(object).where(rows.notna(), None)
+    return Response({
+        'count': len(scores),
+        'page': page,
+        'page_size': page_size,
+        'results': rows.to_dict('records'),
+    })
+
+@api_view(['POST'])
+def screen(request):
+    try:
+        queryset, fields, sort_field, limit = screener.compile_screen(request.data)
+        started = time.perf_counter()
+        results, next_cursor = screener.run_screen(queryset, fields, sort_field, limit)
+        query_ms = (time.perf_counter() - started) * 1000
+    except screener.ScreenError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    response = Response({'count': len(results), 'next_cursor': next_cursor, 'results': results})
+    response['X-Query-Time'] = f'{query_ms:.2f}ms'
+    if settings.DEBUG or request.data.get('explain'):
+        plan = queryset[:limit + 1].explain()
+        response['X-Query-Plan'] = ' | '.join(line.strip() for line in plan.splitlines() if line.strip())
+    return response
+
+@api_view(['GET'])
+def get_cache_stats(request):
+    return Response(cache.get_stats())
+
+@api_view(['GET'])
+def get_metrics(request):
+    stats = cache.get_stats()
+    upstream_stats = stats.pop('upstream')
+    return HttpResponse(metrics.render(stats, upstream_stats), content_type='text/plain; version=0.0.4; charset=utf-8')
 
 @api_view(['POST'])
 def scrap_data(request):
+    symbols = request.data.get("symbols") if isinstance(request.data, dict) else None
+    if not isinstance(symbols, list) or not all(isinstance(symbol, str) for symbol in symbols) \
+            or not any(symbol.strip() for symbol in symbols):
+        return Response(
+            {'status': 'error', 'message': 'symbols must be a non-empty list of ticker strings.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
     try:
-        symbols = request.data.get("symbols", [])
-        results = {}
-        for symbol in symbols:
-            symbol_responses = []
-            try:
-                ticker = yf.Ticker(symbol)
-                info = ticker.info
-                balance_sheet = ticker.balance_sheet
-                # sustainability = ticker.sustainability.to_dict()
-
-
-                with transaction.atomic():
-                    sector, created = Sector.objects.get_or_create(sector_name=info.get('sector'))
-
-                    industry, created = Industry.objects.get_or_create(industry_name=info.get('industry'))
-
-                    exchange, created = Exchange.objects.get_or_create(exchange_name=info.get('exchange'))
-
-                    currency, created = Currency.objects.get_or_create(currency_code=info.get('currency'))
-
-                    company, created = Company.objects.update_or_create(
-                        symbol=info.get('symbol'),
-                        defaults={
-                            'name': info.get('longName'),
-                            'short_name': info.get('shortName'),
-                            'long_name': info.get('longName'),
-                            'sector_id': sector.id,
-                            'industry_id': industry.id,
-                            'total_employees': info.get('fullTimeEmployees'),
-                            'exchange_id': exchange.id,
-                            'currency_id': currency.id
-                        }
-                    )
-
-                    Address.objects.update_or_create(
-                        company_id=company.id,
-                        defaults={
-                            'address1': info.get('address1'),
-                            'address2': info.get('address2'),
-                            'city': info.get('city'),
-                            'zip': info.get('zip'),
-                            'country': info.get('country'),
-                            'phone': info.get('phone'),
-                            'fax': info.get('fax'),
-                            'website': info.get('website'),
-                        }
-                    )
-                    
-                    StockPrice.objects.update_or_create(
-                        company_id=company.id,
-                        defaults={
-                            'previous_close' : info.get('previousClose'),
-                            'open' : info.get('open'),
-                            'day_low' : info.get('dayLow'),
-                            'day_high' : info.get('dayHigh'),
-                            'current_price' : info.get('currentPrice'),
-                            'fifty_two_week_low' : info.get('fiftyTwoWeekLow'),
-                            'fifty_two_week_high' : info.get('fiftyTwoWeekHigh'),
-                            'fifty_day_avg' : info.get('fiftyDayAverage'),
-                            'two_hundred_day_avg' : info.get('twoHundredDayAverage'),
-                            'volume' : info.get('volume'),
-                            'average_volume' : info.get('averageVolume'),
-                        }
-                    )
-
-                    for officer_data in info.get('companyOfficers', []):
-                        officer, created = Officer.objects.update_or_create(
-                            company_id=company.id,
-                            name=officer_data.get('name'),
-                            defaults={
-                                'title': officer_data.get('title'),
-                                'age': officer_data.get('age'),
-                                'fiscal_year': officer_data.get('fiscalYear'),
-                                'year_born': officer_data.get('yearBorn'),
-                            }
-                        )
-                        OfficerCompensation.objects.update_or_create(
-                            officer_id=officer.id,
-                            defaults={
-                                'total_pay': officer_data.get('totalPay', None),
-                                'exercised_value': officer_data.get('exercisedValue', None),
-                                'unexercised_value': officer_data.get('unexercisedValue', None),
-                            }
-                        )
-
-                    CompanyFinancials.objects.update_or_create(
-                        company_id=company.id,
-                        defaults={
-                            'market_cap': info.get('marketCap'),
-                            'enterprise_value': info.get('enterpriseValue'),
-                            'total_cash': info.get('totalCash'),
-                            'total_debt': info.get('totalDebt'),
-                            'total_revenue': info.get('totalRevenue'),
-                            'revenue_per_share': info.get('revenuePerShare'),
-                            'gross_margin': info.get('grossMargins'),
-                            'ebitda_margin': info.get('ebitdaMargins'),
-                            'operating_margin': info.get('operatingMargins'),
-                            'profit_margin': info.get('profitMargins'),
-                            'book_value': info.get('bookValue'),
-                            'debt_to_equity_ratio': info.get('debtToEquity'),
-                            'current_ratio': info.get('currentRatio'),
-                            'quick_ratio': info.get('quickRatio'),
-                            'free_cashflow': info.get('freeCashflow'),
-                            'operating_cashflow': info.get('operatingCashflow'),
-                            'currency_id': currency.id,
-                        }
-                    )
-
-                    Dividend.objects.update_or_create(
-                        company_id=company.id,
-                        defaults={
-                            'dividend_rate': info.get('dividendRate'),
-                            'dividend_yield': info.get('dividendYield'),
-                            'payout_ratio': info.get('payoutRatio'),
-                            'ex_dividend_date': datetime.fromtimestamp(info.get('exDividendDate')) if info.get('exDividendDate') else None,
-                            'five_year_avg_dividend_yield': info.get('fiveYearAvgDividendYield'),
-                            'trailing_annual_dividend_rate': info.get('trailingAnnualDividendRate'),
-                            'trailing_annual_dividend_yield': info.get('trailingAnnualDividendYield'),
-                        }
-                    )
-
-                    RiskMetrics.objects.update_or_create(
-                        company_id=company.id,
-                        defaults={
-                            'audit_risk': info.get('auditRisk'),
-                            'board_risk': info.get('boardRisk'),
-                            'compensation_risk': info.get('compensationRisk'),
-                            'shareholder_rights_risk': info.get('shareholderRightsRisk'),
-                            'overall_risk': info.get('overallRisk'),
-                        }
-                    )
-                    
-                    # EsgScore.objects.update_or_create(
-                    #     company_id=company.id,
-                    #     defaults={
-                    #         'environmental_score': sustainability.get('environmentalScore'),
-                    #         'social_score': sustainability.get('socialScore'),
-                    #         'governance_score': sustainability.get('governanceScore'),
-                    #         'total_esg_score': sustainability.get('totalEsg'),
-                    #         'esg_rating': sustainability.get('esgPerformance'),
-                    #     }
-                    # )
-
-                    if not balance_sheet.empty:
-                        for key, value in balance_sheet.items():
-                            value = pd.Series(value)
-                            if isinstance(value, (dict, pd.Series)):
-                                balance_sheet_series = value.where(pd.notna(value), None).to_dict()
-                                balance_sheet_dict = {
-                                    "date": key,
-                                    "cash_and_cash_equivalents": balance_sheet_series.get("Cash And Cash Equivalents"),
-                                    "short_term_investments": balance_sheet_series.get("Other Short Term Investments"),
-                                    "net_receivables": balance_sheet_series.get("Accounts Receivable"),
-                                    "inventory": balance_sheet_series.get("Inventory"),
-                                    "total_current_assets": balance_sheet_series.get("Total Assets"),
-                                    "long_term_investments": balance_sheet_series.get("Investments And Advances"),
-                                    "property_plant_equipment": balance_sheet_series.get("Net PPE"),
-                                    "intangible_assets": balance_sheet_series.get("Goodwill And Other Intangible Assets"),
-                                    "total_assets": balance_sheet_series.get("Total Assets"),
-                                    "total_liabilities": balance_sheet_series.get("Total Liabilities Net Minority Interest"),
-                                    "total_equity": balance_sheet_series.get("Stockholders Equity"),
-                                }
-
-                                BalanceSheet.objects.update_or_create(
-                                    company_id=company.id,
-                                    defaults=balance_sheet_dict
-                                )
-
-            except Exception as e:
-                symbol_responses.append({"error": str(e)})
-
-            results[symbol] = symbol_responses
-
-        return Response({'status': 'success', 'message': 'Data scraped and inserted successfully', 'data': results})
+        job = jobs.enqueue(symbols)
+        return Response(
+            {'status': 'queued', 'message': 'Scrape job queued', 'job_id': job.id},
+            status=status.HTTP_202_ACCEPTED
+        )
     except Exception as e:
         return Response({'status': 'error', 'message': str(e)}, status=500)
 
+@api_view(['GET'])
+def get_scrap_job(request, job_id):
+    job = ScrapJob.objects.filter(id=job_id).first()
+    if job is None:
+        return Response({"error": "Scrape job not found."}, status=status.HTTP_404_NOT_FOUND)
+    return Response(jobs.job_status(job))